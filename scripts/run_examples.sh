@@ -26,7 +26,7 @@ install_package() {
 # Function to run an example
 run_example() {
     echo "Running example: $1"
-    python "src/examples/$1"
+    python -m "src.examples.${1%.py}"
 }
 
 # Main execution
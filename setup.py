@@ -12,6 +12,7 @@ setup(
     package_dir={"": "src"},
     install_requires=[
         "openai>=1.0.0",
+        "httpx>=0.24.0",
         "python-dotenv>=0.19.0",
         "pydantic>=2.0.0",
         "fastapi>=0.100.0",
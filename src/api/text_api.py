@@ -5,30 +5,49 @@ This module provides API endpoints for text processing and analysis.
 It serves as the interface between the frontend and the core analysis functionality.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import os
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
 import logging
 from pathlib import Path
 from src.ciabot.core.text_processor import TextProcessor
-from src.ciabot.core.ciaprofile import (
-    generate_profile_prompt,
-    analyze_text_with_reasoning,
-    generate_structured_profile,
-    generate_detailed_report,
-    generate_intelligence_report,
-    calculate_metrics,
-    generate_security_profile
+from src.ciabot.core.llm_cache import get_response_cache
+from src.ciabot.core.rate_limit import get_call_limiter, get_rate_limiter
+from src.ciabot.core.usage import get_usage_tracker
+from src.ciabot.core.backends import get_router
+from src.ciabot.core.pipeline import AnalysisContext, StageResult, StageScheduler
+from src.ciabot.core.analysis import (
+    REQUEST_DEADLINE,
+    ThroughputReport,
+    analysis_flights,
+    analyze,
+    analyze_batch,
+    build_analysis_stages
 )
+from src.ciabot.core.jobs import JobQueue, create_job_queue
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="CIA Profile Generator API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the job queue workers for the lifetime of the app."""
+    # Jobs interrupted by a restart are requeued when the workers start
+    queue = get_job_queue()
+    await queue.start()
+    yield
+    await queue.stop()
+
+app = FastAPI(title="CIA Profile Generator API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -44,6 +63,21 @@ class TextRequest(BaseModel):
     content: str
     source: str = "web"
     format: str = "plain"
+    # Opt-in: one combined call for the profile, metrics and security profile
+    fused: bool = False
+
+class JobRequest(TextRequest):
+    """Model for queued analysis requests."""
+    priority: int = 0
+
+class BatchDocument(TextRequest):
+    """A single document of a batch analysis request."""
+    id: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    """Model for batch analysis requests."""
+    documents: List[BatchDocument]
+    concurrency: int = Field(4, ge=1, le=64)
 
 class AnalysisResponse(BaseModel):
     """Model for analysis responses."""
@@ -64,6 +98,72 @@ def safe_model_dump(obj: Any, default_value: Any = None) -> Any:
         logger.error(f"Error in safe_model_dump: {str(e)}")
         return default_value
 
+def _stage_error(result: StageResult) -> Optional[str]:
+    """Return a description of the stage failure, or None if it succeeded."""
+    if not result.ok:
+        return str(result.error)
+    if result.value is None:
+        return "no result returned"
+    return None
+
+def text_stage_output(result: StageResult, label: str) -> str:
+    """Convert a text-producing stage result into a response string."""
+    error = _stage_error(result)
+    if error is not None:
+        logger.error(f"Error {label}: {error}")
+        return f"Error {label}: {error}"
+    value = safe_model_dump(result.value, f"Error {label}")
+    if not isinstance(value, str):
+        value = str(value)
+    logger.info(f"Completed stage {result.name} in {result.duration:.2f}s")
+    return value
+
+def dict_stage_output(result: StageResult, label: str) -> Dict[str, Any]:
+    """Convert a model-producing stage result into a response dictionary."""
+    error = _stage_error(result)
+    if error is not None:
+        logger.error(f"Failed to {label}: {error}")
+        return {"error": f"Failed to {label}: {error}"}
+    logger.info(f"Completed stage {result.name} in {result.duration:.2f}s")
+    return safe_model_dump(result.value, {"error": f"Failed to {label}"})
+
+# Response field conversion for each reported stage: (converter, error label)
+STAGE_OUTPUTS = {
+    "structured_profile": (dict_stage_output, "generate structured profile"),
+    "reasoning": (text_stage_output, "in reasoning analysis"),
+    "detailed_report": (text_stage_output, "generating detailed report"),
+    "intelligence_report": (text_stage_output, "generating intelligence report"),
+    "metrics": (dict_stage_output, "calculate metrics"),
+    "security_profile": (dict_stage_output, "generate security profile"),
+}
+
+def stage_output(result: StageResult) -> Any:
+    """Convert a stage result into its AnalysisResponse field value."""
+    converter, label = STAGE_OUTPUTS[result.name]
+    return converter(result, label)
+
+async def run_analysis(request: TextRequest) -> AnalysisResponse:
+    """
+    Run the full stage pipeline for a text analysis request.
+    
+    Stages are run by a dependency-aware scheduler, so independent model calls
+    overlap and the analysis takes roughly as long as its slowest dependency chain.
+    
+    Args:
+        request: TextRequest containing the text to analyze
+        
+    Returns:
+        AnalysisResponse containing all analysis results
+    """
+    processor = TextProcessor.from_text(
+        content=request.content,
+        source=request.source,
+        format=request.format
+    )
+    
+    results = await analyze(processor.content, fused=request.fused)
+    return AnalysisResponse(**{name: stage_output(results[name]) for name in STAGE_OUTPUTS})
+
 @app.post("/api/analyze", response_model=AnalysisResponse)
 async def analyze_text(request: TextRequest) -> AnalysisResponse:
     """
@@ -76,101 +176,210 @@ async def analyze_text(request: TextRequest) -> AnalysisResponse:
         AnalysisResponse containing all analysis results
     """
     try:
-        # Process the text
-        processor = TextProcessor.from_text(
-            content=request.content,
-            source=request.source,
-            format=request.format
-        )
-        
-        # Generate profile prompt
-        try:
-            prompt = generate_profile_prompt(processor.text)
-            logger.info("Generated profile prompt successfully")
-        except Exception as e:
-            logger.error(f"Error generating profile prompt: {str(e)}")
-            prompt = "Error generating prompt"
-        
-        # Analyze text with reasoning
-        try:
-            reasoning = analyze_text_with_reasoning(processor.text, prompt)
-            reasoning = safe_model_dump(reasoning, "Error in reasoning analysis")
-            if not isinstance(reasoning, str):
-                reasoning = str(reasoning)
-            logger.info("Completed reasoning analysis")
-        except Exception as e:
-            logger.error(f"Error in reasoning analysis: {str(e)}")
-            reasoning = f"Error in reasoning analysis: {str(e)}"
-        
-        # Generate structured profile
-        try:
-            profile = generate_structured_profile(processor.text)
-            structured_profile = safe_model_dump(profile, {"error": "Failed to generate structured profile"})
-            logger.info("Generated structured profile")
-        except Exception as e:
-            logger.error(f"Error generating structured profile: {str(e)}")
-            structured_profile = {"error": f"Failed to generate structured profile: {str(e)}"}
+        response = await run_analysis(request)
+        logger.info("Successfully created analysis response")
+        return response
         
-        # Generate detailed report
-        try:
-            detailed = generate_detailed_report(processor.text)
-            detailed = safe_model_dump(detailed, "Error generating detailed report")
-            if not isinstance(detailed, str):
-                detailed = str(detailed)
-            logger.info("Generated detailed report")
-        except Exception as e:
-            logger.error(f"Error generating detailed report: {str(e)}")
-            detailed = f"Error generating detailed report: {str(e)}"
+    except Exception as e:
+        logger.error(f"Unexpected error in analyze_text: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def run_analysis_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: run a queued analysis and return its response as a dictionary."""
+    response = await run_analysis(TextRequest(**payload))
+    return response.model_dump()
+
+# The queue behind /api/jobs; created on first use so importing the app has no side effects
+job_queue: Optional[JobQueue] = None
+
+def get_job_queue() -> JobQueue:
+    """Return the analysis job queue, creating it from the environment if needed."""
+    global job_queue
+    if job_queue is None:
+        job_queue = create_job_queue(run_analysis_job)
+    return job_queue
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(request: JobRequest) -> Dict[str, Any]:
+    """
+    Queue a text analysis and return immediately.
+    
+    The analysis runs on the job worker pool; poll GET /api/jobs/{job_id} for
+    its status and, once it has succeeded, its AnalysisResponse.
+    
+    Args:
+        request: JobRequest containing the text to analyze and its priority
         
-        # Generate intelligence report
-        try:
-            intelligence = generate_intelligence_report(processor.text)
-            intelligence = safe_model_dump(intelligence, "Error generating intelligence report")
-            if not isinstance(intelligence, str):
-                intelligence = str(intelligence)
-            logger.info("Generated intelligence report")
-        except Exception as e:
-            logger.error(f"Error generating intelligence report: {str(e)}")
-            intelligence = f"Error generating intelligence report: {str(e)}"
+    Returns:
+        The job id and status
+    """
+    job = get_job_queue().submit(request.model_dump(exclude={"priority"}), priority=request.priority)
+    logger.info(f"Queued job {job.id} with priority {job.priority}")
+    return {"job_id": job.id, "status": job.status}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """Report a job's status, and its result once finished."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a queued or running job."""
+    job = get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/analyze/stream")
+async def analyze_text_stream(request: TextRequest) -> StreamingResponse:
+    """
+    Analyze text and stream results as Server-Sent Events.
+    
+    Emits a "stage" event with the stage's result the moment each stage of
+    the analysis completes, "token" events carrying report text as it is
+    generated, and a final "done" event. Stage results have the same shape as
+    the corresponding AnalysisResponse fields.
+    
+    Args:
+        request: TextRequest containing the text to analyze
         
-        # Calculate metrics
+    Returns:
+        A text/event-stream response
+    """
+    processor = TextProcessor.from_text(
+        content=request.content,
+        source=request.source,
+        format=request.format
+    )
+    context = AnalysisContext(text=processor.content, fused=request.fused)
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    def on_token(stage_name: str, delta: str) -> None:
+        queue.put_nowait(format_sse("token", {"stage": stage_name, "delta": delta}))
+    
+    def on_complete(result: StageResult) -> None:
+        if result.name in STAGE_OUTPUTS:
+            queue.put_nowait(format_sse("stage", {"stage": result.name, "result": stage_output(result)}))
+    
+    async def run() -> None:
+        start = time.perf_counter()
         try:
-            metrics = calculate_metrics(processor.text)
-            metrics_dict = safe_model_dump(metrics, {"error": "Failed to calculate metrics"})
-            logger.info("Calculated metrics")
+            scheduler = StageScheduler(
+                build_analysis_stages(context, on_token),
+                context=context,
+                on_complete=on_complete,
+                deadline=REQUEST_DEADLINE
+            )
+            await scheduler.run()
+            queue.put_nowait(format_sse("done", {"duration": time.perf_counter() - start}))
         except Exception as e:
-            logger.error(f"Error calculating metrics: {str(e)}")
-            metrics_dict = {"error": f"Failed to calculate metrics: {str(e)}"}
-        
-        # Generate security profile
+            logger.error(f"Unexpected error in analyze_text_stream: {str(e)}")
+            queue.put_nowait(format_sse("error", {"error": str(e)}))
+        finally:
+            queue.put_nowait(None)
+    
+    async def events():
+        task = asyncio.ensure_future(run())
         try:
-            security = generate_security_profile(processor.text)
-            security_profile = safe_model_dump(security, {"error": "Failed to generate security profile"})
-            logger.info("Generated security profile")
-        except Exception as e:
-            logger.error(f"Error generating security profile: {str(e)}")
-            security_profile = {"error": f"Failed to generate security profile: {str(e)}"}
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                yield message
+        finally:
+            # Stop the analysis if the client disconnects early
+            task.cancel()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/analyze/batch")
+async def analyze_text_batch(request: BatchRequest) -> StreamingResponse:
+    """
+    Analyze many texts and stream each result as newline-delimited JSON.
+    
+    Up to `concurrency` documents are analyzed at once, and their model calls
+    share the process-wide call limiter with every other request. Each line is
+    {"id", "result"} (an AnalysisResponse) or {"id", "error"}, written in
+    completion order; the final line is {"summary"} with throughput counters.
+    
+    Args:
+        request: BatchRequest containing the documents to analyze
         
-        response = AnalysisResponse(
-            structured_profile=structured_profile,
-            reasoning=reasoning,
-            detailed_report=detailed,
-            intelligence_report=intelligence,
-            metrics=metrics_dict,
-            security_profile=security_profile
+    Returns:
+        An application/x-ndjson response
+    """
+    documents = (
+        (document.id or str(index), document)
+        for index, document in enumerate(request.documents)
+    )
+    report = ThroughputReport()
+    
+    async def handler(document: BatchDocument) -> Dict[str, Any]:
+        return (await run_analysis(document)).model_dump()
+    
+    async def lines():
+        results = analyze_batch(
+            documents, handler,
+            concurrency=request.concurrency,
+            report=report,
+            measure=lambda document: len(document.content)
         )
-        logger.info("Successfully created analysis response")
-        return response
-        
-    except Exception as e:
-        logger.error(f"Unexpected error in analyze_text: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        async for item in results:
+            if item.ok:
+                yield json.dumps({"id": item.id, "result": item.result}) + "\n"
+            else:
+                logger.error(f"Error analyzing batch document {item.id}: {item.error}")
+                yield json.dumps({"id": item.id, "error": item.error}) + "\n"
+        logger.info(f"Batch analysis complete: {report.to_dict()}")
+        yield json.dumps({"summary": report.to_dict()}) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @app.get("/api/health")
 async def health_check() -> Dict[str, str]:
     """Health check endpoint."""
     return {"status": "healthy"}
 
+@app.get("/api/cache/stats")
+async def cache_stats() -> Dict[str, Any]:
+    """Report response cache hit/miss counters."""
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats.to_dict()}
+
+@app.get("/api/rate-limits")
+async def rate_limit_stats() -> Dict[str, Any]:
+    """Report the model call budgets and how often calls have had to wait."""
+    return {"in_flight": get_call_limiter().in_flight, **get_rate_limiter().to_dict()}
+
+@app.get("/api/usage")
+async def usage_stats() -> Dict[str, Any]:
+    """Report prompt tokens served from the provider's prompt cache versus uncached, per call."""
+    tracker = get_usage_tracker()
+    return {**tracker.report(), "recent": tracker.recent_calls()}
+
+@app.get("/api/analyze/in-flight")
+async def in_flight_stats() -> Dict[str, Any]:
+    """Report the analyses running now and how many requests joined one already running."""
+    return analysis_flights.to_dict()
+
+@app.get("/api/routing")
+async def routing_stats() -> Dict[str, Any]:
+    """Report where each call purpose is routed, the tier latencies and how often SLOs forced a fallback."""
+    return get_router().to_dict()
+
 # Mount static files after API routes
 static_dir = Path(__file__).parent / "static"
 static_dir.mkdir(exist_ok=True)
@@ -0,0 +1,141 @@
+"""
+Profile Aggregation Module
+
+This module merges the profiles of many text samples from the same subject.
+Traits, emotional states and cognitive patterns are grouped by a normalized
+name in a dictionary, so merging is linear in the number of items however many
+samples there are. For each group it keeps weighted statistics of the score
+(confidence, intensity or significance) and the evidence each sample gave for
+it, so every merged finding can be traced back to the samples behind it.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Merged list fields of a profile: field -> (name attribute, score attribute)
+MERGED_FIELDS = {
+    "personality_traits": ("trait", "confidence"),
+    "emotional_states": ("emotion", "intensity"),
+    "cognitive_patterns": ("pattern", "significance"),
+}
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_key(name: str) -> str:
+    """Normalize an item name so spelling variants such as "Risk-averse" and "risk averse" match."""
+    return _NON_WORD.sub(" ", name).strip().lower()
+
+
+@dataclass
+class ItemStats:
+    """Weighted statistics and provenance of one finding across samples."""
+    item: Any  # The highest-scoring instance, used as the merged item
+    weight: float = 0.0
+    weighted_sum: float = 0.0
+    weighted_squares: float = 0.0
+    low: float = math.inf
+    high: float = -math.inf
+    evidence: List[Dict[str, Any]] = field(default_factory=list)
+
+    def add(self, item: Any, score: float, weight: float, sample: Any) -> None:
+        """Record one sample's instance of the finding."""
+        if score > self.high:
+            self.item = item
+        self.weight += weight
+        self.weighted_sum += score * weight
+        self.weighted_squares += score * score * weight
+        self.low = min(self.low, score)
+        self.high = max(self.high, score)
+        self.evidence.append({"sample": sample, "score": score, "evidence": getattr(item, "evidence", None)})
+
+    @property
+    def samples(self) -> int:
+        """Number of samples the finding appeared in."""
+        return len(self.evidence)
+
+    @property
+    def mean(self) -> float:
+        """Weighted mean score."""
+        return self.weighted_sum / self.weight if self.weight else 0.0
+
+    @property
+    def std(self) -> float:
+        """Weighted standard deviation of the score."""
+        if not self.weight:
+            return 0.0
+        return math.sqrt(max(self.weighted_squares / self.weight - self.mean ** 2, 0.0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "mean": round(self.mean, 4),
+            "std": round(self.std, 4),
+            "min": self.low,
+            "max": self.high,
+            "evidence": self.evidence,
+        }
+
+
+class ProfileAggregator:
+    """Accumulates sample profiles and produces the merged findings."""
+
+    def __init__(self):
+        self.samples = 0
+        self.stats: Dict[str, Dict[str, ItemStats]] = {name: {} for name in MERGED_FIELDS}
+
+    def add(self, profile: Any, sample: Any, weight: float = 1.0) -> None:
+        """
+        Add the findings of one sample's profile.
+
+        Args:
+            profile: The sample's PsychologicalProfile
+            sample: Identifies the sample in the provenance, e.g. its number
+            weight: Weight of the sample's scores, e.g. its length in tokens
+        """
+        self.samples += 1
+        for name, (key_attribute, score_attribute) in MERGED_FIELDS.items():
+            groups = self.stats[name]
+            for item in getattr(profile, name, None) or []:
+                key = normalize_key(getattr(item, key_attribute))
+                stats = groups.get(key)
+                if stats is None:
+                    stats = groups[key] = ItemStats(item)
+                stats.add(item, getattr(item, score_attribute), weight, sample)
+
+    def merged(self, name: str) -> List[Any]:
+        """
+        Return the merged items of a field, in order of first appearance.
+
+        Each is the highest-scoring instance of its group with the score
+        replaced by the weighted mean across the samples it appeared in.
+        """
+        score_attribute = MERGED_FIELDS[name][1]
+        return [
+            stats.item.model_copy(update={score_attribute: stats.mean})
+            for stats in self.stats[name].values()
+        ]
+
+    def apply(self, profile: Any) -> Any:
+        """Replace the merged fields of a profile with the merged items, in place."""
+        for name in MERGED_FIELDS:
+            setattr(profile, name, self.merged(name))
+        return profile
+
+    def provenance(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Describe each merged finding: its score statistics and the evidence from each sample.
+
+        Args:
+            name: Limit the description to one field
+
+        Returns:
+            field -> normalized name -> statistics and evidence
+        """
+        names = [name] if name else list(MERGED_FIELDS)
+        return {
+            field_name: {key: stats.to_dict() for key, stats in self.stats[field_name].items()}
+            for field_name in names
+        }
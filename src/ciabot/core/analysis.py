@@ -0,0 +1,279 @@
+"""
+Analysis Pipeline Module
+
+This module defines the stage graph for a full text analysis and runs it, for
+a single text or for a whole corpus. It is shared by the API and the example
+scripts so both schedule the model calls the same way.
+"""
+
+import asyncio
+import functools
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from src.ciabot.core.ciaprofile import (
+    generate_profile_prompt,
+    aanalyze_text_with_reasoning,
+    agenerate_structured_profile,
+    agenerate_detailed_report,
+    agenerate_intelligence_report,
+    astream_detailed_report,
+    astream_intelligence_report,
+    acalculate_metrics,
+    agenerate_security_profile,
+    agenerate_combined_profile,
+    presplit_chunks
+)
+from src.ciabot.core.pipeline import AnalysisContext, Stage, StageResult, StageScheduler
+from src.ciabot.core.coalesce import SingleFlight
+from src.ciabot.core.llm_cache import make_cache_key
+
+# Time limits for a single model-calling stage and for a whole analysis, in seconds
+STAGE_TIMEOUT = float(os.getenv("CIABOT_STAGE_TIMEOUT", "300"))
+REQUEST_DEADLINE = float(os.getenv("CIABOT_REQUEST_DEADLINE", "900"))
+
+# Analyses in progress; identical concurrent analyses share one run
+analysis_flights = SingleFlight()
+
+
+def build_analysis_stages(
+    context: AnalysisContext,
+    on_token: Optional[Callable[[str, str], None]] = None,
+    stage_timeout: Optional[float] = STAGE_TIMEOUT
+) -> List[Stage]:
+    """
+    Build the stage graph for a full analysis of the context's text.
+
+    The structured profile is extracted from the reasoning stage's output
+    rather than re-running the reasoning pass, and the detailed report follows
+    the structured profile. Everything else can start immediately.
+
+    In fused mode (context.fused) a single combined extraction call replaces
+    the reasoning, structured profile, metrics and security profile calls, and
+    those stages take their results from it.
+
+    Args:
+        context: The per-request analysis context
+        on_token: Optional callback receiving (stage name, text delta). When
+            given, the long-form report stages stream their output through it.
+        stage_timeout: Time limit for each model-calling stage (None for no limit)
+
+    Returns:
+        The stages to hand to a StageScheduler
+    """
+    text = context.text
+
+    async def collect(stage_name: str, deltas) -> str:
+        parts = []
+        async for delta in deltas:
+            parts.append(delta)
+            on_token(stage_name, delta)
+        return "".join(parts)
+
+    async def reasoning(prompt):
+        return await aanalyze_text_with_reasoning(text, prompt)
+
+    async def structured_profile(reasoning):
+        return await agenerate_structured_profile(text, context.tone, analysis=reasoning)
+
+    async def detailed_report(structured_profile):
+        if on_token is not None:
+            return await collect("detailed_report", astream_detailed_report(structured_profile, context.tone))
+        return await agenerate_detailed_report(structured_profile, context.tone)
+
+    async def intelligence_report():
+        if on_token is not None:
+            return await collect("intelligence_report", astream_intelligence_report(text, context.tone))
+        return await agenerate_intelligence_report(text, context.tone)
+
+    if context.fused:
+        async def combined():
+            result = await agenerate_combined_profile(text)
+            if result is None:
+                raise ValueError("Combined extraction returned no result")
+            return result
+
+        return [
+            Stage("combined", combined, timeout=stage_timeout),
+            Stage("reasoning", lambda combined: combined.analysis, depends_on=["combined"]),
+            Stage("structured_profile", lambda combined: combined.profile, depends_on=["combined"]),
+            Stage("metrics", lambda combined: combined.metrics, depends_on=["combined"]),
+            Stage("security_profile", lambda combined: combined.security_profile, depends_on=["combined"]),
+            Stage("detailed_report", detailed_report, depends_on=["structured_profile"], timeout=stage_timeout),
+            Stage("intelligence_report", intelligence_report, timeout=stage_timeout),
+        ]
+
+    return [
+        Stage("prompt", lambda: generate_profile_prompt(text, context.analysis_type)),
+        Stage("reasoning", reasoning, depends_on=["prompt"], timeout=stage_timeout),
+        Stage("structured_profile", structured_profile, depends_on=["reasoning"], timeout=stage_timeout),
+        Stage("detailed_report", detailed_report, depends_on=["structured_profile"], timeout=stage_timeout),
+        Stage("intelligence_report", intelligence_report, timeout=stage_timeout),
+        Stage("metrics", functools.partial(acalculate_metrics, text), timeout=stage_timeout),
+        Stage("security_profile", functools.partial(agenerate_security_profile, text), timeout=stage_timeout),
+    ]
+
+
+async def analyze(
+    text: str,
+    tone: str = "balanced",
+    analysis_type: str = "general",
+    fused: bool = False,
+    timeouts: bool = True,
+    chunks: Optional[List[str]] = None
+) -> Dict[str, StageResult]:
+    """
+    Run every analysis stage for a text within the request deadline.
+
+    If an analysis of the same text with the same options is already running,
+    this waits for it and returns its results instead of starting another.
+
+    Args:
+        text: The text to analyze
+        tone: Tone of the generated reports
+        analysis_type: Type of analysis prompt to generate
+        fused: Extract the profile, metrics and security profile in one call
+        timeouts: Apply the stage timeouts and the request deadline; batch runs
+            turn them off, since their calls wait for batch jobs
+        chunks: Optional chunks of the text of at most MAX_INPUT_TOKENS, e.g. from
+            TextStream.chunks, used by the chunked stages instead of splitting the text
+
+    Returns:
+        The result of each stage, keyed by stage name
+    """
+    options = {"tone": tone, "analysis_type": analysis_type, "fused": fused, "timeouts": timeouts}
+
+    async def run() -> Dict[str, StageResult]:
+        context = AnalysisContext(text=text, tone=tone, analysis_type=analysis_type, fused=fused)
+        stages = build_analysis_stages(context, stage_timeout=STAGE_TIMEOUT if timeouts else None)
+        scheduler = StageScheduler(stages, context=context, deadline=REQUEST_DEADLINE if timeouts else None)
+        with presplit_chunks(text, chunks):
+            return await scheduler.run()
+
+    return await analysis_flights.run(make_cache_key({"text": text, **options}), run)
+
+
+@dataclass
+class BatchItemResult:
+    """The outcome of analyzing one document of a batch."""
+    id: str
+    result: Any = None
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the document was analyzed without raising."""
+        return self.error is None
+
+
+@dataclass
+class ThroughputReport:
+    """Aggregate counters for a batch run."""
+    documents: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    characters: int = 0
+    elapsed: float = 0.0
+    durations: List[float] = field(default_factory=list)
+
+    @property
+    def documents_per_minute(self) -> float:
+        """Completed documents per minute of wall-clock time."""
+        return self.documents * 60 / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def characters_per_second(self) -> float:
+        """Input characters processed per second of wall-clock time."""
+        return self.characters / self.elapsed if self.elapsed else 0.0
+
+    def record(self, item: BatchItemResult, characters: int) -> None:
+        """Count a completed document."""
+        self.documents += 1
+        self.characters += characters
+        self.durations.append(item.duration)
+        if item.ok:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the counters to a dictionary."""
+        return {
+            "documents": self.documents,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "characters": self.characters,
+            "elapsed": round(self.elapsed, 3),
+            "documents_per_minute": round(self.documents_per_minute, 2),
+            "characters_per_second": round(self.characters_per_second, 1),
+            "mean_document_seconds": (
+                round(sum(self.durations) / len(self.durations), 3) if self.durations else 0.0
+            ),
+        }
+
+
+async def analyze_batch(
+    documents: Iterable[Tuple[str, Any]],
+    handler: Callable[[Any], Awaitable[Any]],
+    concurrency: int = 4,
+    report: Optional[ThroughputReport] = None,
+    measure: Callable[[Any], int] = len
+) -> AsyncIterator[BatchItemResult]:
+    """
+    Analyze many documents, yielding each result as soon as it completes.
+
+    At most `concurrency` documents are in progress at once; documents are
+    pulled from the iterable lazily, so a large corpus is never loaded all at
+    once. Model calls from all documents also share the process-wide call
+    limiter.
+
+    Args:
+        documents: (id, document) pairs to analyze, usually the document text
+        handler: Coroutine function analyzing one document
+        concurrency: Maximum documents analyzed at the same time
+        report: Optional ThroughputReport updated as documents complete
+        measure: Returns the size of a document in characters for the report
+
+    Yields:
+        A BatchItemResult per document, in completion order
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    if report is None:
+        report = ThroughputReport()
+    iterator = iter(documents)
+    # Bounded, so workers wait for the consumer rather than racing through the corpus
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    start = time.perf_counter()
+
+    async def worker() -> None:
+        for doc_id, document in iterator:
+            doc_start = time.perf_counter()
+            try:
+                item = BatchItemResult(id=doc_id, result=await handler(document))
+            except Exception as e:
+                item = BatchItemResult(id=doc_id, error=str(e))
+            item.duration = time.perf_counter() - doc_start
+            await queue.put((item, measure(document)))
+
+    async def run_workers() -> None:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        await queue.put(None)
+
+    task = asyncio.ensure_future(run_workers())
+    try:
+        while True:
+            entry = await queue.get()
+            if entry is None:
+                break
+            item, characters = entry
+            report.record(item, characters)
+            report.elapsed = time.perf_counter() - start
+            yield item
+        await task
+    finally:
+        # Stop outstanding work if the consumer goes away early
+        task.cancel()
+        report.elapsed = time.perf_counter() - start
@@ -0,0 +1,691 @@
+"""
+Model Backends Module
+
+This module keeps a registry of the backends model calls can be sent to and
+routes each call to one of them by its purpose ("reasoning", "metrics", ...).
+A backend supplies OpenAI-compatible sync and async clients and the model used
+when a route does not name one. Registered out of the box:
+
+- "openai": the OpenAI API (registered by ciaprofile, which owns its clients)
+- "deepseek": the DeepSeek API, keyed by DEEPSEEK_API_KEY
+- "local": any OpenAI-compatible endpoint at CIABOT_LOCAL_BASE_URL
+- "fake": a deterministic in-process stand-in with configurable latency and
+  output length, for running and load-testing the pipeline offline
+
+Routes are read from CIABOT_BACKEND (the default backend) and CIABOT_ROUTES,
+a comma-separated list of purpose=backend[:model] entries, for example
+"metrics=fake,reasoning=deepseek:deepseek-reasoner".
+
+Purposes without a route of their own are routed by tier. Each purpose
+declares a quality tier ("fast" for short JSON answers, "standard", "report"
+for long-form writing), and a backend can name a model per tier, so short
+stages run on a small, fast model of the default backend. A tier may also have
+a latency SLO and a fallback tier: when the tier's model has recently been
+slower than the SLO, or the expected latency no longer fits the request
+deadline, the call goes to the fallback tier's model instead.
+"""
+
+import asyncio
+import copy
+import functools
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from openai import AsyncOpenAI, OpenAI
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice, ChoiceDelta
+from openai.types.completion_usage import PromptTokensDetails
+from src.ciabot.core.tokens import count_tokens
+from src.ciabot.core.rate_limit import MESSAGE_OVERHEAD_TOKENS
+from src.ciabot.core.retry import remaining_time
+
+
+class Backend:
+    """A chat completion endpoint that model calls can be routed to."""
+
+    def __init__(
+        self,
+        name: str,
+        default_model: str,
+        supports_json_schema: bool = True,
+        rate_limited: bool = False,
+        cacheable: bool = True,
+        tier_models: Optional[Dict[str, str]] = None,
+        concurrency_limited: bool = True
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            name: Name the backend is registered and routed under
+            default_model: Model used when a route does not name one
+            supports_json_schema: Whether the endpoint accepts json_schema
+                response formats; if not, requests fall back to JSON mode with
+                the schema in the system prompt
+            rate_limited: Whether calls count against the shared rate limiter,
+                which tracks the OpenAI account's limits
+            cacheable: Whether responses may be stored in the response cache
+            tier_models: Model per quality tier, e.g. {"fast": "small-model"};
+                tiers not listed use the route's model
+            concurrency_limited: Whether calls hold a slot of the shared call
+                limiter while in flight
+        """
+        self.name = name
+        self.default_model = default_model
+        self.supports_json_schema = supports_json_schema
+        self.rate_limited = rate_limited
+        self.cacheable = cacheable
+        self.tier_models = dict(tier_models or {})
+        self.concurrency_limited = concurrency_limited
+
+    def model_for(self, tier: str) -> Optional[str]:
+        """Return the model this backend uses for a quality tier, if it names one."""
+        return self.tier_models.get(tier)
+
+    def client(self) -> Any:
+        """Return the synchronous client."""
+        raise NotImplementedError
+
+    def async_client(self) -> Any:
+        """Return the async client."""
+        raise NotImplementedError
+
+    def prepare(self, request: Dict[str, Any], model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Adapt a request to this backend.
+
+        Args:
+            request: The chat completion request, without a model
+            model: The model to use (defaults to the backend's default model)
+
+        Returns:
+            A new request ready to send to this backend's clients
+        """
+        request = {**request, "model": model or self.default_model}
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema" and not self.supports_json_schema:
+            schema = json.dumps(response_format["json_schema"]["schema"], separators=(",", ":"))
+            messages = copy.deepcopy(request["messages"])
+            messages[0]["content"] += f"\n\nRespond with a JSON object that matches this JSON schema:\n{schema}"
+            request.update(messages=messages, response_format={"type": "json_object"})
+        return request
+
+
+class ClientBackend(Backend):
+    """A backend reached through OpenAI-compatible client objects."""
+
+    def __init__(
+        self,
+        name: str,
+        default_model: str,
+        client_factory: Callable[[], Any],
+        async_client_factory: Callable[[], Any],
+        **options: Any
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            name: Name the backend is registered and routed under
+            default_model: Model used when a route does not name one
+            client_factory: Returns the synchronous client; called for every
+                request, so it should cache the client it creates
+            async_client_factory: Returns the async client, likewise
+            **options: Backend capability flags
+        """
+        super().__init__(name, default_model, **options)
+        self._client_factory = client_factory
+        self._async_client_factory = async_client_factory
+
+    def client(self) -> Any:
+        return self._client_factory()
+
+    def async_client(self) -> Any:
+        return self._async_client_factory()
+
+
+def openai_compatible_backend(
+    name: str,
+    base_url: str,
+    api_key_env: str,
+    default_model: str,
+    supports_json_schema: bool = True,
+    tier_models: Optional[Dict[str, str]] = None
+) -> ClientBackend:
+    """
+    Create a backend for an OpenAI-compatible API, with clients built on first use.
+
+    Args:
+        name: Name the backend is registered under
+        base_url: The API's base URL
+        api_key_env: Environment variable holding the API key
+        default_model: Model used when a route does not name one
+        supports_json_schema: Whether the API accepts json_schema response formats
+        tier_models: Model per quality tier
+
+    Returns:
+        The backend
+    """
+    def api_key() -> str:
+        # Local servers usually ignore the key, but the client requires one
+        return os.getenv(api_key_env) or "not-needed"
+
+    @functools.lru_cache(maxsize=None)
+    def make_client() -> OpenAI:
+        return OpenAI(api_key=api_key(), base_url=base_url, max_retries=0)
+
+    @functools.lru_cache(maxsize=None)
+    def make_async_client() -> AsyncOpenAI:
+        return AsyncOpenAI(api_key=api_key(), base_url=base_url, max_retries=0)
+
+    return ClientBackend(
+        name, default_model, make_client, make_async_client,
+        supports_json_schema=supports_json_schema, tier_models=tier_models
+    )
+
+
+# ===== FAKE BACKEND =====
+
+_FAKE_WORDS = (
+    "subject", "pattern", "analysis", "evidence", "behavior", "tendency", "language",
+    "indicates", "suggests", "consistent", "careful", "structured", "the", "a", "of", "and",
+)
+
+
+def _fake_value(schema: Dict[str, Any], defs: Dict[str, Any], rng: random.Random) -> Any:
+    """Generate a value that matches a JSON schema node."""
+    if "$ref" in schema:
+        return _fake_value(defs[schema["$ref"].split("/")[-1]], defs, rng)
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return _fake_value(options[0], defs, rng) if options else None
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: _fake_value(node, defs, rng) for name, node in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_fake_value(schema.get("items", {}), defs, rng)]
+    if kind == "number":
+        return round(rng.random(), 2)
+    if kind == "integer":
+        return rng.randint(0, 10)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "null":
+        return None
+    return " ".join(rng.choice(_FAKE_WORDS) for _ in range(4))
+
+
+class _FakeCompletions:
+    def __init__(self, backend: "FakeBackend", is_async: bool):
+        self._backend = backend
+        self._async = is_async
+
+    def create(self, **request: Any) -> Any:
+        if self._async:
+            return self._backend._acreate(request)
+        return self._backend._create(request)
+
+
+class _FakeClient:
+    """Stands in for an OpenAI client: exposes chat.completions.create."""
+
+    def __init__(self, backend: "FakeBackend", is_async: bool):
+        completions = _FakeCompletions(backend, is_async)
+        self.chat = type("Chat", (), {"completions": completions})()
+
+
+class FakeBackend(Backend):
+    """
+    A deterministic in-process backend that returns canned completions.
+
+    Responses depend only on the request, so repeated runs are identical.
+    Requests with a json_schema response format get a JSON object matching the
+    schema; others get text of the configured length. Each call takes the
+    configured latency, which makes the backend useful for load tests.
+    """
+
+    def __init__(self, latency: float = 0.0, completion_tokens: int = 200, default_model: str = "fake"):
+        """
+        Initialize the fake backend.
+
+        Args:
+            latency: Seconds each call takes before responding
+            completion_tokens: Length of text responses, in tokens (capped by max_tokens)
+            default_model: Model name reported in responses
+        """
+        super().__init__("fake", default_model, cacheable=False)
+        self.latency = latency
+        self.completion_tokens = completion_tokens
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._client = _FakeClient(self, is_async=False)
+        self._async_client = _FakeClient(self, is_async=True)
+
+    def client(self) -> Any:
+        return self._client
+
+    def async_client(self) -> Any:
+        return self._async_client
+
+    def _content(self, request: Dict[str, Any]) -> str:
+        """Generate the response content for a request."""
+        seed = hashlib.sha256(json.dumps(request.get("messages"), sort_keys=True, default=str).encode())
+        rng = random.Random(seed.hexdigest())
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            return json.dumps(_fake_value(schema, schema.get("$defs", {}), rng))
+        if response_format.get("type") == "json_object":
+            return "{}"
+        limit = request.get("max_tokens") or request.get("max_completion_tokens") or self.completion_tokens
+        words = [rng.choice(_FAKE_WORDS) for _ in range(min(limit, self.completion_tokens))]
+        return " ".join(words).capitalize() + "."
+
+    def _usage(self, request: Dict[str, Any], content: str) -> CompletionUsage:
+        prompt_tokens = sum(
+            count_tokens(str(message.get("content") or "")) + MESSAGE_OVERHEAD_TOKENS
+            for message in request.get("messages", [])
+        )
+        completion_tokens = count_tokens(content)
+        return CompletionUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            prompt_tokens_details=PromptTokensDetails(cached_tokens=0),
+        )
+
+    def _completion(self, request: Dict[str, Any]) -> ChatCompletion:
+        with self._lock:
+            self.calls += 1
+        content = self._content(request)
+        return ChatCompletion(
+            id=f"fake-{self.calls}",
+            object="chat.completion",
+            created=int(time.time()),
+            model=request["model"],
+            choices=[Choice(
+                index=0,
+                finish_reason="stop",
+                message=ChatCompletionMessage(role="assistant", content=content),
+            )],
+            usage=self._usage(request, content),
+        )
+
+    def _chunks(self, completion: ChatCompletion, include_usage: bool) -> List[ChatCompletionChunk]:
+        """Split a completion into the chunks of a stream."""
+        def chunk(choices, usage=None):
+            return ChatCompletionChunk(
+                id=completion.id, object="chat.completion.chunk", created=completion.created,
+                model=completion.model, choices=choices, usage=usage,
+            )
+
+        content = completion.choices[0].message.content
+        words = content.split(" ")
+        chunks = [
+            chunk([ChunkChoice(index=0, delta=ChoiceDelta(content=word + (" " if i < len(words) - 1 else "")))])
+            for i, word in enumerate(words)
+        ]
+        chunks.append(chunk([ChunkChoice(index=0, delta=ChoiceDelta(), finish_reason="stop")]))
+        if include_usage:
+            chunks.append(chunk([], completion.usage))
+        return chunks
+
+    def _create(self, request: Dict[str, Any]) -> Any:
+        stream = request.pop("stream", False)
+        include_usage = (request.pop("stream_options", None) or {}).get("include_usage", False)
+        if self.latency:
+            time.sleep(self.latency)
+        completion = self._completion(request)
+        if stream:
+            return iter(self._chunks(completion, include_usage))
+        return completion
+
+    async def _acreate(self, request: Dict[str, Any]) -> Any:
+        stream = request.pop("stream", False)
+        include_usage = (request.pop("stream_options", None) or {}).get("include_usage", False)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        completion = self._completion(request)
+        if stream:
+            return _async_iter(self._chunks(completion, include_usage))
+        return completion
+
+
+async def _async_iter(items: List[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+# ===== REGISTRY =====
+
+_backends: Dict[str, Backend] = {}
+_registry_lock = threading.Lock()
+
+
+def register_backend(backend: Backend) -> Backend:
+    """Register a backend under its name, replacing any backend of that name."""
+    with _registry_lock:
+        _backends[backend.name] = backend
+    return backend
+
+
+def get_backend(name: str) -> Backend:
+    """
+    Return a registered backend.
+
+    Raises:
+        ValueError: If no backend is registered under the name
+    """
+    backend = _backends.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown model backend '{name}' (available: {', '.join(available_backends())})")
+    return backend
+
+
+def available_backends() -> List[str]:
+    """Return the names of the registered backends."""
+    return sorted(_backends)
+
+
+register_backend(openai_compatible_backend(
+    "deepseek", "https://api.deepseek.com", "DEEPSEEK_API_KEY", "deepseek-chat",
+    supports_json_schema=False
+))
+register_backend(openai_compatible_backend(
+    "local",
+    os.getenv("CIABOT_LOCAL_BASE_URL", "http://localhost:8000/v1"),
+    "CIABOT_LOCAL_API_KEY",
+    os.getenv("CIABOT_LOCAL_MODEL", "local-model"),
+    supports_json_schema=os.getenv("CIABOT_LOCAL_JSON_SCHEMA", "1") != "0",
+    tier_models={"fast": os.environ["CIABOT_LOCAL_FAST_MODEL"]} if os.getenv("CIABOT_LOCAL_FAST_MODEL") else None
+))
+register_backend(FakeBackend(
+    latency=float(os.getenv("CIABOT_FAKE_LATENCY", "0")),
+    completion_tokens=int(os.getenv("CIABOT_FAKE_COMPLETION_TOKENS", "200"))
+))
+
+
+# ===== ROUTING =====
+
+@dataclass(frozen=True)
+class Route:
+    """Where calls for a purpose go: a backend, and optionally a model on it."""
+    backend: str
+    model: Optional[str] = None
+
+    @classmethod
+    def parse(cls, value: str) -> "Route":
+        """Parse "backend" or "backend:model"."""
+        backend, _, model = value.strip().partition(":")
+        return cls(backend=backend.strip(), model=model.strip() or None)
+
+
+def parse_routes(spec: str) -> Dict[str, Route]:
+    """
+    Parse a route specification such as "metrics=fake,reasoning=deepseek:deepseek-reasoner".
+
+    Raises:
+        ValueError: If an entry is not of the form purpose=backend[:model]
+    """
+    routes = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        purpose, sep, target = entry.partition("=")
+        if not sep or not purpose.strip() or not target.strip():
+            raise ValueError(f"Invalid route '{entry}': expected purpose=backend[:model]")
+        routes[purpose.strip()] = Route.parse(target)
+    return routes
+
+
+@dataclass(frozen=True)
+class Tier:
+    """A quality tier: how long its calls may take and where they go when that is at risk."""
+    name: str
+    latency_slo: Optional[float] = None  # Seconds
+    fallback: Optional[str] = None  # Tier used while the SLO is at risk
+
+
+def _slo(name: str, default: float) -> Optional[float]:
+    """Read a tier's latency SLO from the environment; 0 disables it."""
+    value = float(os.getenv(name, str(default)))
+    return value or None
+
+
+def default_tiers() -> Dict[str, Tier]:
+    """Return the built-in tiers, with SLOs from CIABOT_FAST_SLO and CIABOT_STANDARD_SLO."""
+    return {
+        "fast": Tier("fast", _slo("CIABOT_FAST_SLO", 20.0)),
+        "standard": Tier("standard", _slo("CIABOT_STANDARD_SLO", 90.0), fallback="fast"),
+        # Long-form writing keeps its model however long it takes
+        "report": Tier("report"),
+    }
+
+
+DEFAULT_TIER = "standard"
+
+_purpose_tiers: Dict[str, str] = {}
+
+
+def declare_tiers(tiers: Dict[str, str]) -> None:
+    """Declare the quality tier of call purposes, as purpose -> tier name."""
+    with _registry_lock:
+        _purpose_tiers.update(tiers)
+
+
+def tier_of(purpose: str) -> str:
+    """Return the declared tier of a call purpose."""
+    return _purpose_tiers.get(purpose, DEFAULT_TIER)
+
+
+# Seconds after which a model's latency observations are forgotten
+LATENCY_MAX_AGE = float(os.getenv("CIABOT_LATENCY_MAX_AGE", "300"))
+
+
+class LatencyTracker:
+    """
+    Exponentially weighted mean latency of recent calls, per backend and model.
+
+    Observations expire max_age seconds after the last one. A model that
+    calls were routed away from because it was slow is then no longer
+    expected to be slow, so the next call probes it again.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        max_age: Optional[float] = LATENCY_MAX_AGE,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            alpha: Weight of each new observation
+            max_age: Seconds after the last observation that a mean expires (None: never)
+            clock: Time source, in seconds
+        """
+        self.alpha = alpha
+        self.max_age = max_age
+        self.clock = clock
+        self._means: Dict[Tuple[str, str], float] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._updated: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def _fresh_mean(self, key: Tuple[str, str]) -> Optional[float]:
+        mean = self._means.get(key)
+        if mean is not None and self.max_age is not None and self.clock() - self._updated[key] > self.max_age:
+            return None
+        return mean
+
+    def record(self, backend: str, model: str, seconds: float) -> None:
+        """Record the latency of a completed call."""
+        key = (backend, model)
+        with self._lock:
+            mean = self._fresh_mean(key)
+            self._means[key] = seconds if mean is None else mean + self.alpha * (seconds - mean)
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._updated[key] = self.clock()
+
+    def expected(self, backend: str, model: str) -> Optional[float]:
+        """Return the expected latency of a call, or None before any recent call has completed."""
+        with self._lock:
+            return self._fresh_mean((backend, model))
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                f"{backend}:{model}": {"mean_seconds": round(mean, 3), "calls": self._counts[(backend, model)]}
+                for (backend, model), mean in self._means.items()
+            }
+
+
+class Router:
+    """Chooses the backend and model for each call purpose."""
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, Route]] = None,
+        default: Route = Route("openai"),
+        tiers: Optional[Dict[str, Tier]] = None
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            routes: Route per call purpose; these purposes skip tier routing
+            default: Route for purposes without one
+            tiers: Quality tiers by name (defaults to default_tiers())
+        """
+        self.routes = dict(routes or {})
+        self.default = default
+        self.tiers = tiers if tiers is not None else default_tiers()
+        self.latency = LatencyTracker()
+        self.fallbacks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def tier_route(self, tier: str) -> Route:
+        """Return the route for a tier: the default backend with its model for the tier."""
+        model = get_backend(self.default.backend).model_for(tier)
+        return Route(self.default.backend, model or self.default.model)
+
+    def _model(self, route: Route) -> str:
+        return route.model or get_backend(route.backend).default_model
+
+    def at_risk(self, tier: Tier, route: Route) -> bool:
+        """
+        Decide whether a call on a route would put the tier's latency SLO at risk.
+
+        It is at risk when recent calls on the route averaged more than the SLO,
+        or when the expected latency (the SLO until calls have been observed) is
+        more than the time left before the request deadline. Observations
+        expire (see LatencyTracker), so a route that recovers is used again.
+        """
+        expected = self.latency.expected(route.backend, self._model(route))
+        if tier.latency_slo is not None and expected is not None and expected > tier.latency_slo:
+            return True
+        remaining = remaining_time()
+        budget = expected if expected is not None else tier.latency_slo
+        return remaining is not None and budget is not None and budget > remaining
+
+    def route(self, purpose: str) -> Route:
+        """Return the route for a call purpose."""
+        if purpose in self.routes:
+            return self.routes[purpose]
+        tier = self.tiers.get(tier_of(purpose)) or self.tiers.get(DEFAULT_TIER) or Tier(DEFAULT_TIER)
+        route = self.tier_route(tier.name)
+        if tier.fallback and self.at_risk(tier, route):
+            fallback = self.tier_route(tier.fallback)
+            if fallback != route:
+                with self._lock:
+                    self.fallbacks[purpose] = self.fallbacks.get(purpose, 0) + 1
+                return fallback
+        return route
+
+    def resolve(self, request: Dict[str, Any], purpose: str) -> Tuple[Backend, Dict[str, Any]]:
+        """
+        Pick the backend for a request and adapt the request to it.
+
+        Args:
+            request: The chat completion request, without a model
+            purpose: What the call is for
+
+        Returns:
+            The backend and the request to send to it
+        """
+        route = self.route(purpose)
+        backend = get_backend(route.backend)
+        return backend, backend.prepare(request, route.model)
+
+    def record_latency(self, backend: str, model: str, seconds: float) -> None:
+        """Record how long a call took, for the SLO checks."""
+        self.latency.record(backend, model, seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the routing table, the tiers and the observed latencies."""
+        return {
+            "default": {"backend": self.default.backend, "model": self.default.model},
+            "routes": {
+                purpose: {"backend": route.backend, "model": route.model}
+                for purpose, route in self.routes.items()
+            },
+            "tiers": {
+                name: {
+                    "model": self._model(self.tier_route(name)),
+                    "latency_slo": tier.latency_slo,
+                    "fallback": tier.fallback,
+                }
+                for name, tier in self.tiers.items()
+            },
+            "purpose_tiers": dict(_purpose_tiers),
+            "latency": self.latency.to_dict(),
+            "fallbacks": dict(self.fallbacks),
+        }
+
+
+_router: Optional[Router] = None
+
+
+def configure_routes(
+    routes: Any = None,
+    default_backend: str = "openai",
+    tiers: Optional[Dict[str, Tier]] = None
+) -> Router:
+    """
+    Replace the process-wide router.
+
+    Args:
+        routes: Route per purpose, as a dict of Routes or "backend[:model]"
+            strings, or a specification string for parse_routes
+        default_backend: Backend (optionally "backend:model") for unrouted purposes
+        tiers: Quality tiers by name (defaults to default_tiers())
+
+    Returns:
+        The new router
+    """
+    global _router
+    if isinstance(routes, str):
+        routes = parse_routes(routes)
+    routes = {
+        purpose: route if isinstance(route, Route) else Route.parse(route)
+        for purpose, route in (routes or {}).items()
+    }
+    _router = Router(routes, Route.parse(default_backend), tiers)
+    return _router
+
+
+def get_router() -> Router:
+    """
+    Return the process-wide router.
+
+    On first use it is read from CIABOT_ROUTES and CIABOT_BACKEND (default "openai").
+    """
+    if _router is None:
+        configure_routes(os.getenv("CIABOT_ROUTES", ""), os.getenv("CIABOT_BACKEND", "openai"))
+    return _router
@@ -0,0 +1,395 @@
+"""
+Batch API Module
+
+This module runs model calls through the OpenAI Batch API, for offline corpus
+runs that do not need interactive latency. Batch jobs are priced below online
+calls and have their own queue limits, so they do not count against the
+online rate limits.
+
+The batch backend is a drop-in backend for the router: the analysis pipeline
+runs unchanged, and each call it makes is queued instead of sent. When no new
+call has been queued for a short while (or a batch is full), the queued calls
+are written to a JSONL file, submitted as one batch job and polled until it
+finishes; each call then receives its own response. Stages that depend on
+earlier results queue their calls once those results arrive, so a corpus run
+becomes a few rounds of batches: reasoning, metrics and reports first, then
+the structured profiles, then the detailed reports.
+
+FakeBatchClient stands in for the Batch API in tests and offline runs.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+import httpx
+from openai.types import Batch, FileObject
+from openai.types.chat import ChatCompletion
+from src.ciabot.core.backends import (
+    Backend,
+    FakeBackend,
+    Route,
+    Tier,
+    configure_routes,
+    get_backend,
+    get_router,
+    register_backend
+)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Batch API limits per job
+MAX_BATCH_REQUESTS = 50000
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+
+# Batch job states after which the job makes no further progress
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+BATCH_POLL_INTERVAL = float(os.getenv("CIABOT_BATCH_POLL_INTERVAL", "30"))
+BATCH_IDLE_SECONDS = float(os.getenv("CIABOT_BATCH_IDLE_SECONDS", "2"))
+
+
+class BatchRequestError(Exception):
+    """Raised for a queued call whose batch job or batch request failed."""
+
+
+@dataclass
+class _QueuedCall:
+    custom_id: str
+    line: bytes
+    future: asyncio.Future
+
+
+@dataclass
+class BatchStats:
+    """Counters for the batch jobs submitted by a backend."""
+    batches: int = 0
+    requests: int = 0
+    failed_requests: int = 0
+    wait_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the counters to a dictionary."""
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "wait_seconds": round(self.wait_seconds, 1),
+        }
+
+
+class _BatchCompletions:
+    def __init__(self, backend: "BatchBackend"):
+        self._backend = backend
+
+    async def create(self, **request: Any) -> ChatCompletion:
+        return await self._backend.submit(request)
+
+
+class _BatchClient:
+    """Stands in for an async OpenAI client: chat.completions.create queues the call."""
+
+    def __init__(self, backend: "BatchBackend"):
+        completions = _BatchCompletions(backend)
+        self.chat = type("Chat", (), {"completions": completions})()
+
+
+class BatchBackend(Backend):
+    """
+    A backend that sends another backend's calls through the Batch API.
+
+    Only async calls are supported; they wait until their batch job finishes,
+    which may take up to the completion window.
+    """
+
+    def __init__(
+        self,
+        backend: Backend,
+        batch_client: Any = None,
+        name: str = "batch",
+        idle_seconds: float = BATCH_IDLE_SECONDS,
+        poll_interval: float = BATCH_POLL_INTERVAL,
+        max_requests: int = MAX_BATCH_REQUESTS,
+        max_bytes: int = MAX_BATCH_BYTES,
+        completion_window: str = "24h"
+    ):
+        """
+        Initialize the batch backend.
+
+        Args:
+            backend: The backend whose models the batches run on
+            batch_client: Async client with the files and batches resources
+                (defaults to the backend's async client)
+            name: Name the backend is registered and routed under
+            idle_seconds: Submit the queued calls once none has been added for this long
+            poll_interval: Seconds between batch job status checks
+            max_requests: Submit the queued calls once this many are queued
+            max_bytes: Submit the queued calls before the input file exceeds this size
+            completion_window: Time the Batch API is given to finish a job
+        """
+        super().__init__(
+            name, backend.default_model,
+            supports_json_schema=backend.supports_json_schema,
+            cacheable=backend.cacheable,
+            tier_models=backend.tier_models,
+            concurrency_limited=False
+        )
+        self.backend = backend
+        self.idle_seconds = idle_seconds
+        self.poll_interval = poll_interval
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.completion_window = completion_window
+        self.stats = BatchStats()
+        self._batch_client = batch_client
+        self._client = _BatchClient(self)
+        self._ids = itertools.count(1)
+        self._queue: List[_QueuedCall] = []
+        self._queued_bytes = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._jobs: set = set()
+
+    def client(self) -> Any:
+        raise NotImplementedError("The batch backend only serves async calls")
+
+    def async_client(self) -> Any:
+        return self._client
+
+    def batch_client(self) -> Any:
+        """Return the client batch jobs are submitted with."""
+        return self._batch_client if self._batch_client is not None else self.backend.async_client()
+
+    async def submit(self, request: Dict[str, Any]) -> ChatCompletion:
+        """Queue a chat completion request and wait for its batch to finish."""
+        if request.get("stream"):
+            raise ValueError("Batch requests cannot be streamed")
+        # Per-call options such as the deadline timeout do not apply to batch jobs
+        body = {key: value for key, value in request.items() if key not in ("timeout", "stream_options")}
+        custom_id = f"request-{next(self._ids)}"
+        line = json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body})
+        line = line.encode() + b"\n"
+        if self._queue and self._queued_bytes + len(line) > self.max_bytes:
+            self.flush()
+        call = _QueuedCall(custom_id, line, asyncio.get_running_loop().create_future())
+        self._queue.append(call)
+        self._queued_bytes += len(line)
+        if len(self._queue) >= self.max_requests:
+            self.flush()
+        else:
+            self._schedule_flush()
+        return await call.future
+
+    def _schedule_flush(self) -> None:
+        """Restart the idle timer after a call was queued."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(self.idle_seconds, self.flush)
+
+    def flush(self) -> None:
+        """Submit the queued calls as a batch job now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        calls, self._queue, self._queued_bytes = self._queue, [], 0
+        if not calls:
+            return
+        job = asyncio.ensure_future(self._run(calls))
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+
+    async def _run(self, calls: List[_QueuedCall]) -> None:
+        """Run one batch job and hand each call its result."""
+        start = time.monotonic()
+        try:
+            results = await self._run_job(calls)
+        except Exception as e:
+            results = {call.custom_id: e for call in calls}
+        self.stats.batches += 1
+        self.stats.requests += len(calls)
+        self.stats.wait_seconds += time.monotonic() - start
+        for call in calls:
+            if call.future.done():
+                continue
+            result = results.get(call.custom_id)
+            if isinstance(result, ChatCompletion):
+                call.future.set_result(result)
+                continue
+            self.stats.failed_requests += 1
+            if not isinstance(result, Exception):
+                result = BatchRequestError(f"Batch returned no result for {call.custom_id}")
+            call.future.set_exception(result)
+
+    async def _run_job(self, calls: List[_QueuedCall]) -> Dict[str, Union[ChatCompletion, Exception]]:
+        """Upload the calls, submit the job, wait for it and read its output files."""
+        client = self.batch_client()
+        upload = await client.files.create(
+            file=("batch.jsonl", b"".join(call.line for call in calls)), purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=upload.id, endpoint=BATCH_ENDPOINT, completion_window=self.completion_window
+        )
+        while batch.status not in TERMINAL_STATUSES:
+            await asyncio.sleep(self.poll_interval)
+            batch = await client.batches.retrieve(batch.id)
+
+        results: Dict[str, Union[ChatCompletion, Exception]] = {}
+        # An expired or cancelled job still returns the requests it completed
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await client.files.content(file_id)
+                for line in content.text.splitlines():
+                    if line.strip():
+                        custom_id, result = _parse_result_line(line)
+                        results[custom_id] = result
+        if batch.status != "completed":
+            error = BatchRequestError(f"Batch {batch.id} {batch.status}: {_batch_errors(batch)}")
+            for call in calls:
+                results.setdefault(call.custom_id, error)
+        return results
+
+
+def _parse_result_line(line: str) -> Tuple[str, Union[ChatCompletion, Exception]]:
+    """Parse one line of a batch output or error file into (custom_id, completion or error)."""
+    entry = json.loads(line)
+    response = entry.get("response") or {}
+    body = response.get("body") or {}
+    if response.get("status_code") == 200:
+        return entry["custom_id"], ChatCompletion.model_validate(body)
+    error = entry.get("error") or body.get("error") or {}
+    message = error.get("message") if isinstance(error, dict) else str(error)
+    status = response.get("status_code")
+    return entry["custom_id"], BatchRequestError(f"Batch request failed ({status}): {message}")
+
+
+def _batch_errors(batch: Batch) -> str:
+    """Describe the errors reported for a batch job."""
+    errors = getattr(batch.errors, "data", None) or []
+    return "; ".join(error.message or error.code or "" for error in errors) or "no details"
+
+
+def enable_batch_mode(backend: str = "openai", **options: Any) -> BatchBackend:
+    """
+    Send every call routed to a backend through the Batch API instead.
+
+    Registers a BatchBackend wrapping the backend and reroutes the process-wide
+    router to it. Latency SLOs are dropped, since batch jobs take minutes to hours.
+
+    Args:
+        backend: Name of the backend whose calls are batched
+        **options: Options for the BatchBackend
+
+    Returns:
+        The batch backend
+    """
+    batch = register_backend(BatchBackend(get_backend(backend), **options))
+    router = get_router()
+
+    def batched(route: Route) -> Route:
+        return Route(batch.name, route.model) if route.backend == backend else route
+
+    default = batched(router.default)
+    configure_routes(
+        {purpose: batched(route) for purpose, route in router.routes.items()},
+        f"{default.backend}:{default.model}" if default.model else default.backend,
+        {name: Tier(name) for name in router.tiers}
+    )
+    return batch
+
+
+# ===== FAKE BATCH API =====
+
+class _FakeFiles:
+    def __init__(self, api: "FakeBatchClient"):
+        self._api = api
+
+    async def create(self, file: Any, purpose: str) -> FileObject:
+        filename, data = file
+        return self._api._store(data, filename, purpose)
+
+    async def content(self, file_id: str) -> httpx.Response:
+        # Has the .text, .content and .read() of the response the client returns
+        return httpx.Response(200, content=self._api.files_data[file_id])
+
+
+class _FakeBatches:
+    def __init__(self, api: "FakeBatchClient"):
+        self._api = api
+
+    async def create(self, input_file_id: str, endpoint: str, completion_window: str) -> Batch:
+        return self._api._create_batch(input_file_id, endpoint, completion_window)
+
+    async def retrieve(self, batch_id: str) -> Batch:
+        return self._api._retrieve_batch(batch_id)
+
+
+class FakeBatchClient:
+    """
+    An in-process stand-in for the Batch API's files and batches resources.
+
+    Jobs stay in progress for the configured number of status checks, then
+    complete with responses from a FakeBackend, written to an output file in
+    the Batch API's format.
+    """
+
+    def __init__(self, backend: Optional[FakeBackend] = None, polls: int = 1):
+        """
+        Initialize the fake Batch API.
+
+        Args:
+            backend: Answers the batched requests (defaults to a new FakeBackend)
+            polls: Status checks a job stays in progress for
+        """
+        self.backend = backend or FakeBackend()
+        self.polls = polls
+        self.files = _FakeFiles(self)
+        self.batches = _FakeBatches(self)
+        self.files_data: Dict[str, bytes] = {}
+        self.jobs: Dict[str, Batch] = {}
+        self._checks: Dict[str, int] = {}
+        self._ids = itertools.count(1)
+
+    def _store(self, data: bytes, filename: str, purpose: str) -> FileObject:
+        file_id = f"file-{next(self._ids)}"
+        self.files_data[file_id] = data
+        return FileObject(
+            id=file_id, bytes=len(data), created_at=int(time.time()), filename=filename,
+            object="file", purpose=purpose, status="processed",
+        )
+
+    def _create_batch(self, input_file_id: str, endpoint: str, completion_window: str) -> Batch:
+        batch = Batch(
+            id=f"batch-{next(self._ids)}", completion_window=completion_window, created_at=int(time.time()),
+            endpoint=endpoint, input_file_id=input_file_id, object="batch", status="validating",
+        )
+        self.jobs[batch.id] = batch
+        self._checks[batch.id] = 0
+        return batch
+
+    def _retrieve_batch(self, batch_id: str) -> Batch:
+        batch = self.jobs[batch_id]
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        self._checks[batch_id] += 1
+        if self._checks[batch_id] < self.polls:
+            batch = batch.model_copy(update={"status": "in_progress"})
+        else:
+            batch = batch.model_copy(update={"status": "completed", "output_file_id": self._answer(batch).id})
+        self.jobs[batch_id] = batch
+        return batch
+
+    def _answer(self, batch: Batch) -> FileObject:
+        """Answer every request of a job and store the output file."""
+        lines = []
+        for line in self.files_data[batch.input_file_id].decode().splitlines():
+            entry = json.loads(line)
+            completion = self.backend._completion(dict(entry["body"]))
+            lines.append(json.dumps({
+                "id": f"response-{next(self._ids)}",
+                "custom_id": entry["custom_id"],
+                "response": {"status_code": 200, "request_id": completion.id, "body": completion.model_dump()},
+                "error": None,
+            }))
+        return self._store("\n".join(lines).encode(), "output.jsonl", "batch_output")
@@ -5,21 +5,97 @@ CIA Profile Generator
 This module uses OpenAI's ChatGPT API to generate CIA-level psychological profiles
 based on text analysis. It leverages structured outputs, prompt generation, and
 enhanced reasoning to create comprehensive profiles.
+
+Every model-calling function has an async counterpart prefixed with "a"
+(e.g. acalculate_metrics) that uses the shared AsyncOpenAI client. Both variants
+build their requests and parse their responses with the same helpers.
 """
 
 import os
+import re
 import json
-from typing import List, Dict, Any, Optional, Union
+import time
+import asyncio
+import functools
+import contextlib
+import contextvars
+import difflib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Union, AsyncIterator, Callable, Iterable, Tuple, TypeVar
+import httpx
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from src.templates.profile_templates import get_profile_template, get_example_profile
+from src.ciabot.core.llm_cache import get_response_cache
+from src.ciabot.core.features import compute_neurolinguistic_features
+from src.ciabot.core.rate_limit import estimate_request_tokens, get_call_limiter, get_rate_limiter
+from src.ciabot.core.retry import acall_with_retry, call_with_retry, remaining_time
+from src.ciabot.core.usage import get_usage_tracker
+from src.ciabot.core.messages import assemble_messages, duplicated_tokens
+from src.ciabot.core.tokens import chunk_text, count_tokens, fit_to_budget, split_sentences
+from src.ciabot.core.schemas import json_schema_format
+from src.ciabot.core.backends import Backend, ClientBackend, declare_tiers, get_router, register_backend
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def _observe_rate_limits(response: httpx.Response) -> None:
+    """Feed the rate-limit headers of every API response to the shared rate limiter."""
+    get_rate_limiter().observe_headers(response.headers, response.status_code)
+
+async def _aobserve_rate_limits(response: httpx.Response) -> None:
+    _observe_rate_limits(response)
+
+# Initialize OpenAI client; retries are handled by the retry module
+client = OpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    max_retries=0,
+    http_client=httpx.Client(
+        timeout=httpx.Timeout(600.0, connect=10.0),
+        event_hooks={"response": [_observe_rate_limits]}
+    )
+)
+
+# Shared pooled HTTP transport for the async client, so concurrent analyses
+# reuse keep-alive connections instead of opening one per call
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+http_client = httpx.AsyncClient(
+    limits=httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_CONNECTIONS
+    ),
+    timeout=httpx.Timeout(600.0, connect=10.0),
+    event_hooks={"response": [_aobserve_rate_limits]}
+)
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client, max_retries=0)
+
+# Model for calls routed to the OpenAI backend without a model of their own,
+# and the small model for the "fast" tier
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+OPENAI_FAST_MODEL = os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini")
+
+# The clients are looked up on every call, so replacing them (as the tests do) takes effect
+OPENAI_BACKEND = register_backend(ClientBackend(
+    "openai", OPENAI_MODEL, lambda: client, lambda: async_client,
+    rate_limited=True, tier_models={"fast": OPENAI_FAST_MODEL}
+))
+
+# Quality tier of each call purpose. The short JSON stages run on the fast model;
+# the reports keep the default model and never fall back to a faster one.
+declare_tiers({
+    "metrics": "fast",
+    "security_profile": "fast",
+    "reasoning": "standard",
+    "structured_profile": "standard",
+    "combined_profile": "standard",
+    "detailed_report": "report",
+    "intelligence_report": "report",
+})
+
+# Largest text, in tokens, sent to the model in one call. Longer texts are profiled
+# in chunks of this size, and the other analyses see an excerpt that fits.
+MAX_INPUT_TOKENS = int(os.getenv("CIABOT_MAX_INPUT_TOKENS", "12000"))
 
 # ===== STRUCTURED OUTPUTS =====
 
@@ -181,17 +257,52 @@ class PsychologicalProfile(BaseModel):
     leadership_potential: Optional[LeadershipPotential] = None
     team_dynamics: Optional[TeamDynamics] = None
 
+class CombinedProfile(BaseModel):
+    """The outputs of a single combined extraction call, split by kind."""
+    analysis: str
+    profile: PsychologicalProfile
+    metrics: Optional[ProfileMetrics] = None
+    security_profile: Optional[SecurityProfile] = None
+
+class CombinedProfileResponse(PsychologicalProfile):
+    """The response of a combined extraction call: a profile whose metrics and security profile are required."""
+    profile_metrics: ProfileMetrics
+    security_profile: SecurityProfile
+    analysis: str
+
+# Profile fields the model is not asked for: neurolinguistic features are computed
+# locally, and the remaining sections are not part of the extraction
+PROFILE_EXCLUDED_FIELDS = (
+    "neurolinguistic_features",
+    "communication_style",
+    "decision_making",
+    "stress_response",
+    "leadership_potential",
+    "team_dynamics",
+)
+
+# Structured-output formats sent as response_format, compiled from the models once
+PROFILE_RESPONSE_FORMAT = json_schema_format(
+    PsychologicalProfile, "psychological_profile", PROFILE_EXCLUDED_FIELDS
+)
+PROFILE_WITH_EVIDENCE_RESPONSE_FORMAT = json_schema_format(
+    PsychologicalProfile, "psychological_profile_with_evidence", PROFILE_EXCLUDED_FIELDS,
+    (("neurolinguistic_evidence", "string[]"),)
+)
+COMBINED_PROFILE_RESPONSE_FORMAT = json_schema_format(
+    CombinedProfileResponse, "combined_profile", PROFILE_EXCLUDED_FIELDS
+)
+METRICS_RESPONSE_FORMAT = json_schema_format(ProfileMetrics, "profile_metrics")
+SECURITY_PROFILE_RESPONSE_FORMAT = json_schema_format(SecurityProfile, "security_profile")
+
 # ===== PROMPT GENERATION =====
 
-def generate_profile_prompt(text: str, analysis_type: str = "general") -> str:
-    """Generate a specialized prompt for psychological profiling."""
-    base_prompt = f"""You are an expert CIA psychological profiler with extensive experience in behavioral analysis, neuro-linguistic programming, and counterintelligence operations.
-Your task is to conduct a comprehensive neuro-linguistic psycho-analysis of the following text to generate a detailed psychological profile.
+# Static instructions for the reasoning prompt. They come before the text so every
+# call shares a byte-identical prefix the provider can serve from its prompt cache.
+PROFILE_PROMPT_INSTRUCTIONS = """You are an expert CIA psychological profiler with extensive experience in behavioral analysis, neuro-linguistic programming, and counterintelligence operations.
+Your task is to conduct a comprehensive neuro-linguistic psycho-analysis of the text given at the end of this prompt to generate a detailed psychological profile.
 Focus on both explicit statements and implicit patterns that reveal psychological traits, behavioral tendencies, and potential vulnerabilities.
 
-Text to analyze:
-{text}
-
 Conduct a CIA-level psychological assessment that includes:
 
 1. Personality Traits:
@@ -273,34 +384,366 @@ Format the output as a structured JSON object matching the PsychologicalProfile
 Ensure all assessments are evidence-based and avoid speculative conclusions.
 Apply neuro-linguistic programming principles to identify embedded commands, presuppositions, and linguistic patterns that reveal deeper psychological structures."""
 
-    # Add type-specific directives
-    if analysis_type == "technical":
-        base_prompt += """
+# Type-specific directives appended to the static instructions
+ANALYSIS_TYPE_DIRECTIVES = {
+    "technical": """
 Additional focus areas for technical analysis:
 - Technical communication patterns and knowledge gaps
 - Problem-solving methodology and approach
 - Code/documentation style and attention to detail
 - Technical decision-making and risk assessment
 - Collaboration in technical contexts and knowledge sharing
-- Information security practices and vulnerabilities"""
-    elif analysis_type == "social":
-        base_prompt += """
+- Information security practices and vulnerabilities""",
+    "social": """
 Additional focus areas for social analysis:
 - Social interaction patterns and relationship dynamics
 - Group behavior and conformity indicators
 - Social influence and persuasion techniques
 - Communication in social contexts and impression management
 - Social positioning and status indicators
-- Relationship building and maintenance strategies"""
+- Relationship building and maintenance strategies""",
+}
+
+def generate_profile_prompt(text: str, analysis_type: str = "general") -> str:
+    """
+    Generate a specialized prompt for psychological profiling.
+    
+    The static instructions and analysis-type directives come first and the
+    text last, so prompts for different texts share a cacheable prefix.
+    
+    Args:
+        text: The text to analyze
+        analysis_type: "general", "technical" or "social"
+        
+    Returns:
+        The prompt
+    """
+    instructions = PROFILE_PROMPT_INSTRUCTIONS + ANALYSIS_TYPE_DIRECTIVES.get(analysis_type, "")
+    return f"{instructions}\n\nText to analyze:\n{text}"
+
+# ===== MODEL CALLS =====
+
+def _usage_tokens(completion: Any) -> Optional[int]:
+    """Return the total tokens reported for a completion, if any."""
+    usage = getattr(completion, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    return total if isinstance(total, int) else None
+
+def _call_options() -> Dict[str, Any]:
+    """Per-call options that are not part of the request, such as a deadline timeout."""
+    remaining = remaining_time()
+    return {} if remaining is None else {"timeout": max(remaining, 0.001)}
+
+def _send(backend: Backend, request: Dict[str, Any], purpose: str) -> Any:
+    """Make one attempt at a request with the backend's synchronous client."""
+    # Wait for rate-limit budget before taking a call slot
+    limiter = get_rate_limiter() if backend.rate_limited else None
+    reserved = limiter.acquire(estimate_request_tokens(request)) if limiter is not None else 0
+    try:
+        with get_call_limiter().limit():
+            start = time.monotonic()
+            completion = backend.client().chat.completions.create(**request, **_call_options())
+            get_router().record_latency(backend.name, request["model"], time.monotonic() - start)
+    except BaseException:
+        # A failed attempt used no tokens; its retry reserves them again
+        if limiter is not None:
+            limiter.release(reserved)
+        raise
+    if limiter is not None:
+        limiter.record_usage(reserved, _usage_tokens(completion))
+    get_usage_tracker().record(purpose, request["model"], getattr(completion, "usage", None))
+    return completion
+
+async def _asend(backend: Backend, request: Dict[str, Any], purpose: str) -> Any:
+    """Make one attempt at a request with the backend's async client."""
+    limiter = get_rate_limiter() if backend.rate_limited else None
+    reserved = await limiter.aacquire(estimate_request_tokens(request)) if limiter is not None else 0
+    try:
+        # Batched calls wait in a batch job, not on a connection, so they take no call slot
+        async with get_call_limiter().alimit() if backend.concurrency_limited else contextlib.nullcontext():
+            start = time.monotonic()
+            completion = await backend.async_client().chat.completions.create(**request, **_call_options())
+            get_router().record_latency(backend.name, request["model"], time.monotonic() - start)
+    except BaseException:
+        if limiter is not None:
+            limiter.release(reserved)
+        raise
+    if limiter is not None:
+        limiter.record_usage(reserved, _usage_tokens(completion))
+    get_usage_tracker().record(purpose, request["model"], getattr(completion, "usage", None))
+    return completion
+
+def _resolve(request: Dict[str, Any], purpose: str) -> Tuple[Backend, Dict[str, Any]]:
+    """Route a request to its backend and adapt the request to it."""
+    return get_router().resolve(request, purpose)
 
-    return base_prompt
+def _check_request(request: Dict[str, Any], purpose: str) -> None:
+    """Flag a request that repeats content across its messages."""
+    wasted = duplicated_tokens(request["messages"])
+    if wasted:
+        print(f"Warning: {purpose} request repeats content worth about {wasted} prompt tokens")
+        get_usage_tracker().record_duplication(purpose, wasted)
+
+def _complete(request: Dict[str, Any], purpose: str = "completion") -> str:
+    """Send a chat completion request with the synchronous client and return its content."""
+    backend, request = _resolve(request, purpose)
+    _check_request(request, purpose)
+    cache = get_response_cache() if backend.cacheable else None
+    if cache is not None:
+        cached = cache.get(request)
+        if cached is not None:
+            return cached
+    
+    completion = call_with_retry(lambda: _send(backend, request, purpose))
+    content = completion.choices[0].message.content
+    if cache is not None and isinstance(content, str):
+        cache.set(request, content)
+    return content
+
+async def _acomplete(request: Dict[str, Any], purpose: str = "completion") -> str:
+    """Send a chat completion request with the async client and return its content."""
+    backend, request = _resolve(request, purpose)
+    _check_request(request, purpose)
+    cache = get_response_cache() if backend.cacheable else None
+    if cache is not None:
+        cached = await cache.aget(request)
+        if cached is not None:
+            return cached
+    
+    completion = await acall_with_retry(lambda: _asend(backend, request, purpose))
+    content = completion.choices[0].message.content
+    if cache is not None and isinstance(content, str):
+        await cache.aset(request, content)
+    return content
+
+async def _astream(request: Dict[str, Any], purpose: str = "completion") -> AsyncIterator[str]:
+    """
+    Send a chat completion request in streaming mode and yield content deltas.
+    
+    Opening the stream is retried; an error after deltas have been yielded is raised.
+    """
+    backend, request = _resolve(request, purpose)
+    _check_request(request, purpose)
+    cache = get_response_cache() if backend.cacheable else None
+    if cache is not None:
+        cached = await cache.aget(request)
+        if cached is not None:
+            yield cached
+            return
+    
+    async def open_stream():
+        limiter = get_rate_limiter() if backend.rate_limited else None
+        reserved = await limiter.aacquire(estimate_request_tokens(request)) if limiter is not None else 0
+        try:
+            return await backend.async_client().chat.completions.create(
+                **request,
+                stream=True,
+                stream_options={"include_usage": True},
+                **_call_options()
+            )
+        except BaseException:
+            if limiter is not None:
+                limiter.release(reserved)
+            raise
+    
+    parts = []
+    # The call slot is held until the stream has been fully read
+    async with get_call_limiter().alimit():
+        stream = await acall_with_retry(open_stream)
+        async for chunk in stream:
+            if not chunk.choices:
+                # The final chunk carries the usage of the whole stream
+                get_usage_tracker().record(purpose, request["model"], getattr(chunk, "usage", None))
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+    if cache is not None:
+        await cache.aset(request, "".join(parts))
+
+# ===== LONG TEXTS =====
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Heads each chunk's analysis when a long text is analyzed in parts
+CHUNK_ANALYSIS_HEADER = "### Part {index} of {total}"
+_CHUNK_HEADER_RE = re.compile(r"^### Part \d+ of \d+\n", re.MULTILINE)
+
+# A text and its chunks, split before the analysis started (e.g. while the text was streamed in)
+_presplit: contextvars.ContextVar[Optional[Tuple[str, List[str]]]] = contextvars.ContextVar("presplit", default=None)
+
+@contextlib.contextmanager
+def presplit_chunks(text: str, chunks: Optional[List[str]]):
+    """
+    Use already computed chunks of a text for the calls made in this context.
+    
+    split_into_chunks returns them for this exact text object instead of
+    splitting it again. Tasks and executor jobs started from the context see
+    them when they copy the context.
+    
+    Args:
+        text: The text, which the chunks joined together must give back
+        chunks: Its chunks of at most MAX_INPUT_TOKENS (None to split as usual)
+    """
+    if chunks is None:
+        yield
+        return
+    token = _presplit.set((text, list(chunks)))
+    try:
+        yield
+    finally:
+        _presplit.reset(token)
+
+def split_into_chunks(text: str) -> List[str]:
+    """Split a text into chunks that each fit in one model call (one chunk if it already fits)."""
+    presplit = _presplit.get()
+    if presplit is not None and presplit[0] is text:
+        return list(presplit[1])
+    return chunk_text(text, MAX_INPUT_TOKENS)
+
+def join_chunk_analyses(analyses: List[str]) -> str:
+    """Combine the analyses of a text's chunks into one analysis, headed by part."""
+    total = len(analyses)
+    return "\n\n".join(
+        f"{CHUNK_ANALYSIS_HEADER.format(index=index, total=total)}\n{analysis.strip()}"
+        for index, analysis in enumerate(analyses, 1)
+    )
+
+def split_chunk_analyses(analysis: str) -> List[str]:
+    """Split an analysis made by join_chunk_analyses back into its parts."""
+    parts = _CHUNK_HEADER_RE.split(analysis)
+    if len(parts) == 1:
+        return [analysis]
+    return [part.strip() for part in parts[1:]]
+
+def _map_parallel(func: Callable[[T], R], items: Iterable[T]) -> List[R]:
+    """Apply a blocking function to each item on worker threads, keeping the order."""
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    # Threads carry over the caller's context, e.g. its deadline
+    with ThreadPoolExecutor(max_workers=min(len(items), get_call_limiter().max_concurrent)) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, func, item) for item in items]
+        return [future.result() for future in futures]
+
+def _strongest(items: List[Any], key: str, score: Optional[str] = None) -> List[Any]:
+    """Keep one item per distinct key value, the highest scoring one if a score is given."""
+    best: Dict[str, Any] = {}
+    for item in items:
+        name = getattr(item, key).strip().lower()
+        if name not in best or (score and getattr(item, score) > getattr(best[name], score)):
+            best[name] = item
+    return list(best.values())
+
+def _unique(values: List[str]) -> List[str]:
+    """Drop repeated strings, keeping the first occurrence."""
+    return list(dict.fromkeys(values))
+
+def merge_profiles(profiles: List[PsychologicalProfile], weights: Optional[List[float]] = None) -> PsychologicalProfile:
+    """
+    Reduce profiles of consecutive parts of a text into one profile of the whole text.
+
+    Traits, states and patterns are combined, keeping the strongest instance of
+    each; scores are averaged by part weight; single-valued sections come from
+    the heaviest part that has them.
+
+    Args:
+        profiles: The partial profiles, in text order
+        weights: Relative size of each part (equal weights if omitted)
+
+    Returns:
+        The merged profile
+    """
+    if not profiles:
+        raise ValueError("No profiles to merge")
+    if len(profiles) == 1:
+        return profiles[0]
+    weights = weights or [1.0] * len(profiles)
+    total = sum(weights)
+
+    def average(values: List[float]) -> float:
+        return sum(value * weight for value, weight in zip(values, weights)) / total
+
+    by_weight = [profile for _, profile in sorted(zip(weights, profiles), key=lambda pair: -pair[0])]
+
+    def heaviest(field: str) -> Any:
+        return next((getattr(p, field) for p in by_weight if getattr(p, field) is not None), None)
+
+    styles = [profile.writing_style for profile in profiles]
+    predictions = [p for profile in profiles for p in profile.behavioral_predictions or []]
+    cognitive_biases = [b for profile in profiles for b in profile.cognitive_biases or []]
+    merged = {
+        "personality_traits": _strongest(
+            [t for p in profiles for t in p.personality_traits], "trait", "confidence"),
+        "emotional_states": _strongest(
+            [e for p in profiles for e in p.emotional_states], "emotion", "intensity"),
+        "cognitive_patterns": _strongest(
+            [c for p in profiles for c in p.cognitive_patterns], "pattern", "significance"),
+        "writing_style": WritingStyle(
+            formality=average([style.formality for style in styles]),
+            complexity=average([style.complexity for style in styles]),
+            emotionality=average([style.emotionality for style in styles]),
+            evidence=by_weight[0].writing_style.evidence,
+        ),
+        "linguistic_markers": _strongest([m for p in profiles for m in p.linguistic_markers], "marker"),
+        "overall_assessment": "\n\n".join(
+            f"Part {index}: {profile.overall_assessment.strip()}" for index, profile in enumerate(profiles, 1)
+        ),
+        "confidence_score": average([profile.confidence_score for profile in profiles]),
+        "potential_biases": _unique([b for p in profiles for b in p.potential_biases]),
+        "limitations": _unique(
+            [l for p in profiles for l in p.limitations]
+            + [f"Profiled in {len(profiles)} parts that were analyzed separately and merged."]
+        ),
+        "behavioral_predictions": _strongest(predictions, "scenario", "confidence") or None,
+        "cognitive_biases": _unique(cognitive_biases) or None,
+    }
+    for field in PsychologicalProfile.model_fields:
+        if field not in merged:
+            merged[field] = heaviest(field)
+    return PsychologicalProfile(**merged)
+
+def _merge_chunk_profiles(
+    text: str,
+    chunks: List[str],
+    profiles: List[PsychologicalProfile],
+    llm_neurolinguistics: bool = False
+) -> PsychologicalProfile:
+    """Merge per-chunk profiles, computing neurolinguistic features over the whole text."""
+    profile = merge_profiles(profiles, [count_tokens(chunk) for chunk in chunks])
+    features = extract_neurolinguistic_features(text)
+    if llm_neurolinguistics:
+        # Keep the model's evidence, which follows each chunk's local evidence
+        for chunk, part in zip(chunks, profiles):
+            local = len(extract_neurolinguistic_features(chunk).evidence)
+            features.evidence.extend(part.neurolinguistic_features.evidence[local:])
+    profile.neurolinguistic_features = features
+    return profile
 
 # ===== REASONING =====
 
+def _reasoning_request(text: str, prompt: str) -> Dict[str, Any]:
+    """Build the chat completion request for the reasoning pass."""
+    # The prompt from generate_profile_prompt embeds the text; it is sent once, as the user message
+    return {
+        "messages": assemble_messages(prompt, text)
+    }
+
+def _chunk_reasoning_requests(text: str, prompt: str, chunks: List[str]) -> List[Dict[str, Any]]:
+    """Build one reasoning request per chunk of a long text, all sharing the same system prompt."""
+    # Take the whole text out of the prompt before pairing it with each chunk
+    system = assemble_messages(prompt, text)[0]["content"]
+    return [_reasoning_request(chunk, system) for chunk in chunks]
+
 def analyze_text_with_reasoning(text: str, prompt: str) -> str:
     """
     Analyze text using enhanced reasoning to generate insights.
     
+    A text longer than MAX_INPUT_TOKENS is analyzed in chunks in parallel, and
+    the chunk analyses are joined with part headers.
+    
     Args:
         text: The text to analyze
         prompt: The specialized prompt to use
@@ -309,165 +752,227 @@ def analyze_text_with_reasoning(text: str, prompt: str) -> str:
         Detailed analysis as a string
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": text}
-            ]
-        )
-        return response.choices[0].message.content
+        chunks = split_into_chunks(text)
+        if len(chunks) > 1:
+            requests = _chunk_reasoning_requests(text, prompt, chunks)
+            return join_chunk_analyses(_map_parallel(lambda r: _complete(r, "reasoning"), requests))
+        return _complete(_reasoning_request(text, prompt), "reasoning")
+    except Exception as e:
+        print(f"Error analyzing text with reasoning: {str(e)}")
+        return None
+
+async def aanalyze_text_with_reasoning(text: str, prompt: str) -> str:
+    """Async variant of analyze_text_with_reasoning."""
+    try:
+        chunks = split_into_chunks(text)
+        if len(chunks) > 1:
+            requests = _chunk_reasoning_requests(text, prompt, chunks)
+            return join_chunk_analyses(
+                await asyncio.gather(*(_acomplete(r, "reasoning") for r in requests))
+            )
+        return await _acomplete(_reasoning_request(text, prompt), "reasoning")
     except Exception as e:
         print(f"Error analyzing text with reasoning: {str(e)}")
         return None
 
-def generate_structured_profile(text: str, tone: str = "balanced") -> PsychologicalProfile:
+# Static system prompts are module constants, so every request for the same task starts
+# with a byte-identical prefix that the provider can serve from its prompt cache.
+STRUCTURED_PROFILE_INSTRUCTIONS = """You are an expert in psychological profiling and intelligence analysis.
+Based on the provided analysis, extract a structured psychological profile
+that follows the specified schema. Ensure all fields are properly filled
+with relevant information from the analysis."""
+
+# Appended when the LLM neurolinguistic overlay is requested, so the prefix is the
+# same with or without it
+NEUROLINGUISTIC_OVERLAY_INSTRUCTIONS = """
+
+Fill the "neurolinguistic_evidence" field with short observations on pronoun use,
+verb tense, hedging or sentence structure, each with a quote from the analysis
+supporting it."""
+
+def _structured_profile_request(analysis: str, llm_neurolinguistics: bool = False) -> Dict[str, Any]:
+    """Build the chat completion request that extracts a structured profile from an analysis."""
+    # Neurolinguistic features are computed locally; the model is only asked
+    # for supporting evidence when the LLM overlay is requested
+    instructions = STRUCTURED_PROFILE_INSTRUCTIONS
+    response_format = PROFILE_RESPONSE_FORMAT
+    if llm_neurolinguistics:
+        instructions += NEUROLINGUISTIC_OVERLAY_INSTRUCTIONS
+        response_format = PROFILE_WITH_EVIDENCE_RESPONSE_FORMAT
+    return {
+        "messages": assemble_messages(
+            instructions,
+            f"Extract a structured profile from this analysis and return it as JSON.\n\nAnalysis: {analysis}"
+        ),
+        "response_format": response_format,
+    }
+
+
+def extract_neurolinguistic_features(text: str) -> NeurolinguisticFeature:
+    """
+    Compute neurolinguistic features locally from text.
+    
+    Args:
+        text: The text to analyze
+        
+    Returns:
+        Exact, reproducible neurolinguistic features
+    """
+    return NeurolinguisticFeature(**compute_neurolinguistic_features(text))
+
+def _parse_structured_profile(content: str, text: str, llm_neurolinguistics: bool = False) -> PsychologicalProfile:
+    """Parse the JSON response into a PsychologicalProfile object with local neurolinguistic features."""
+    return _build_profile(json.loads(content), text, llm_neurolinguistics)
+
+def _build_profile(profile_data: Dict[str, Any], text: str, llm_neurolinguistics: bool = False) -> PsychologicalProfile:
+    """Build a PsychologicalProfile from its JSON data with local neurolinguistic features."""
+    llm_evidence = profile_data.pop("neurolinguistic_evidence", None) or []
+    profile_data.pop("neurolinguistic_features", None)
+    profile = PsychologicalProfile(**profile_data)
+    
+    features = extract_neurolinguistic_features(text)
+    if llm_neurolinguistics:
+        features.evidence.extend(llm_evidence)
+    profile.neurolinguistic_features = features
+    return profile
+
+def generate_structured_profile(
+    text: str,
+    tone: str = "balanced",
+    analysis: Optional[str] = None,
+    llm_neurolinguistics: bool = False
+) -> PsychologicalProfile:
     """
     Generate a structured psychological profile from text.
     
+    Neurolinguistic features are always computed locally from the text. A text
+    longer than MAX_INPUT_TOKENS is profiled per chunk in parallel and the
+    partial profiles are merged with merge_profiles.
+    
     Args:
         text: The text to analyze
         tone: The desired tone of the profile ("positive", "negative", or "balanced")
+        analysis: An existing reasoning analysis of the text. When provided, the
+            prompt generation and reasoning pass are skipped and only the
+            structured extraction call is made (one per part for an
+            analysis of a chunked text).
+        llm_neurolinguistics: Also ask the model for neurolinguistic evidence,
+            which is added to the locally computed evidence
         
     Returns:
         A structured psychological profile
     """
     try:
-        # First, generate a specialized prompt
-        prompt = generate_profile_prompt(text, tone)
-        if not prompt:
-            raise ValueError("Failed to generate profile prompt")
-        
-        # Then, analyze the text with enhanced reasoning
-        analysis = analyze_text_with_reasoning(text, prompt)
-        if not analysis:
-            raise ValueError("Failed to analyze text with reasoning")
+        if analysis is None:
+            # First, generate a specialized prompt
+            prompt = generate_profile_prompt(text, tone)
+            if not prompt:
+                raise ValueError("Failed to generate profile prompt")
+            
+            # Then, analyze the text with enhanced reasoning
+            analysis = analyze_text_with_reasoning(text, prompt)
+            if not analysis:
+                raise ValueError("Failed to analyze text with reasoning")
         
-        # Finally, extract structured data using the model's parse capability
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": """
-                    You are an expert in psychological profiling and intelligence analysis.
-                    Based on the provided analysis, extract a structured psychological profile
-                    that follows the specified schema. Ensure all fields are properly filled
-                    with relevant information from the analysis.
-                    
-                    Your response MUST be a valid JSON object with the following structure:
-                    {
-                      "personality_traits": [
-                        {
-                          "trait": "string",
-                          "evidence": "string",
-                          "confidence": number between 0 and 1
-                        }
-                      ],
-                      "emotional_states": [
-                        {
-                          "emotion": "string",
-                          "evidence": "string",
-                          "intensity": number between 0 and 1
-                        }
-                      ],
-                      "cognitive_patterns": [
-                        {
-                          "pattern": "string",
-                          "evidence": "string",
-                          "significance": number between 0 and 1
-                        }
-                      ],
-                      "writing_style": {
-                        "formality": number between 0 and 1,
-                        "complexity": number between 0 and 1,
-                        "emotionality": number between 0 and 1,
-                        "evidence": "string"
-                      },
-                      "linguistic_markers": [
-                        {
-                          "marker": "string",
-                          "evidence": "string",
-                          "interpretation": "string"
-                        }
-                      ],
-                      "overall_assessment": "string",
-                      "confidence_score": number between 0 and 1,
-                      "potential_biases": ["string"],
-                      "limitations": ["string"],
-                      "neurolinguistic_features": {
-                        "syntactic_complexity": number between 0 and 1,
-                        "pronoun_ratio": {
-                          "I": number between 0 and 1,
-                          "we": number between 0 and 1,
-                          "you": number between 0 and 1,
-                          "they": number between 0 and 1
-                        },
-                        "temporal_orientation": {
-                          "past": number between 0 and 1,
-                          "present": number between 0 and 1,
-                          "future": number between 0 and 1
-                        },
-                        "hedge_density": number between 0 and 1,
-                        "certainty_score": number between 0 and 1,
-                        "evidence": ["string"]
-                      },
-                      "dark_triad_profile": {
-                        "narcissism": number between 0 and 1,
-                        "machiavellianism": number between 0 and 1,
-                        "psychopathy": number between 0 and 1,
-                        "behavioral_manifestations": ["string"],
-                        "operational_risks": ["string"]
-                      },
-                      "behavioral_predictions": [
-                        {
-                          "scenario": "string",
-                          "predicted_behavior": "string",
-                          "confidence": number between 0 and 1,
-                          "triggering_conditions": ["string"],
-                          "mitigation_strategies": ["string"]
-                        }
-                      ],
-                      "cognitive_biases": ["string"],
-                      "cultural_context": {
-                        "cultural_lexicons": ["string"],
-                        "regional_references": ["string"],
-                        "socioeconomic_indicators": ["string"],
-                        "cultural_values": ["string"],
-                        "evidence": ["string"],
-                        "confidence_score": number between 0 and 1
-                      },
-                      "profile_metrics": {
-                        "persuasion_susceptibility": number between 0 and 1,
-                        "deception_capacity": number between 0 and 1,
-                        "information_hoarding": number between 0 and 1,
-                        "risk_tolerance": number between 0 and 1,
-                        "group_affiliation": number between 0 and 1,
-                        "cognitive_rigidity": number between 0 and 1
-                      },
-                      "security_profile": {
-                        "opsec_weaknesses": ["string"],
-                        "detectable_patterns": ["string"],
-                        "predictable_behaviors": ["string"],
-                        "suggested_countermeasures": ["string"]
-                      }
-                    }
-                    
-                    Return your response as a valid JSON object that matches this schema exactly.
-                    """
-                },
-                {"role": "user", "content": f"Analysis: {analysis}\n\nExtract a structured profile from this analysis and return it as JSON."},
-            ],
-            response_format={"type": "json_object"},
-        )
+        # Finally, extract structured data from the analysis, per part for a long text
+        chunks = split_into_chunks(text)
+        parts = split_chunk_analyses(analysis)
+        if len(chunks) > 1 and len(parts) == len(chunks):
+            def extract(pair):
+                chunk, part = pair
+                request = _structured_profile_request(part, llm_neurolinguistics)
+                return _parse_structured_profile(_complete(request, "structured_profile"), chunk, llm_neurolinguistics)
+            profiles = _map_parallel(extract, zip(chunks, parts))
+            return _merge_chunk_profiles(text, chunks, profiles, llm_neurolinguistics)
+        request = _structured_profile_request(analysis, llm_neurolinguistics)
+        return _parse_structured_profile(_complete(request, "structured_profile"), text, llm_neurolinguistics)
+    except Exception as e:
+        print(f"Error generating structured profile: {str(e)}")
+        return None
+
+async def agenerate_structured_profile(
+    text: str,
+    tone: str = "balanced",
+    analysis: Optional[str] = None,
+    llm_neurolinguistics: bool = False
+) -> PsychologicalProfile:
+    """Async variant of generate_structured_profile."""
+    try:
+        if analysis is None:
+            prompt = generate_profile_prompt(text, tone)
+            if not prompt:
+                raise ValueError("Failed to generate profile prompt")
+            
+            analysis = await aanalyze_text_with_reasoning(text, prompt)
+            if not analysis:
+                raise ValueError("Failed to analyze text with reasoning")
         
-        # Parse the JSON response into a PsychologicalProfile object
-        profile_data = json.loads(completion.choices[0].message.content)
-        return PsychologicalProfile(**profile_data)
+        chunks = split_into_chunks(text)
+        parts = split_chunk_analyses(analysis)
+        if len(chunks) > 1 and len(parts) == len(chunks):
+            async def extract(chunk, part):
+                request = _structured_profile_request(part, llm_neurolinguistics)
+                return _parse_structured_profile(
+                    await _acomplete(request, "structured_profile"), chunk, llm_neurolinguistics
+                )
+            profiles = await asyncio.gather(*(extract(chunk, part) for chunk, part in zip(chunks, parts)))
+            return _merge_chunk_profiles(text, chunks, list(profiles), llm_neurolinguistics)
+        request = _structured_profile_request(analysis, llm_neurolinguistics)
+        return _parse_structured_profile(await _acomplete(request, "structured_profile"), text, llm_neurolinguistics)
     except Exception as e:
         print(f"Error generating structured profile: {str(e)}")
         return None
 
+DETAILED_REPORT_INSTRUCTIONS = """You are an expert in psychological profiling and intelligence analysis.
+Create a detailed, professional report based on the provided psychological profile.
+The report should be written in a style similar to CIA intelligence reports,
+with clear sections, professional language, and detailed analysis.
+
+The report should include all the following sections:
+
+1. Executive Summary
+2. Core Personality Analysis
+   - Personality Traits
+   - Emotional Profile
+   - Cognitive Patterns
+3. Communication & Decision Making
+   - Communication Style
+   - Decision Making Patterns
+4. Stress & Leadership
+   - Stress Response Profile
+   - Leadership Assessment
+5. Team Dynamics
+   - Team Compatibility
+6. Writing & Communication Analysis
+   - Writing Style
+   - Linguistic Markers
+7. Security Profile
+8. Confidence Assessment
+   - Overall Confidence Score
+   - Potential Biases
+   - Analysis Limitations
+9. Evidence Base
+
+For each section, provide specific evidence from the text with direct quotes where possible.
+Include confidence levels for assessments and highlight any counterintelligence implications.
+
+Use the example report below as a reference for the level of detail, structure, and tone we want."""
+
+@functools.lru_cache(maxsize=None)
+def _with_example(instructions: str, tone: str) -> str:
+    """Append the tone's example report to static instructions, built once per tone."""
+    return f"{instructions}\n\n{get_example_profile(tone).strip()}"
+
+def _detailed_report_request(profile: PsychologicalProfile, tone: str) -> Dict[str, Any]:
+    """Build the chat completion request for a detailed report."""
+    # The tone-specific example follows the shared instructions
+    return {
+        "messages": assemble_messages(
+            _with_example(DETAILED_REPORT_INSTRUCTIONS, tone),
+            f"Generate a detailed report.\n\nProfile: {profile.model_dump_json(indent=2)}"
+        ),
+    }
+
 def generate_detailed_report(profile: PsychologicalProfile, tone: str = "balanced") -> str:
     """
     Generate a detailed report from a structured profile.
@@ -480,63 +985,137 @@ def generate_detailed_report(profile: PsychologicalProfile, tone: str = "balance
         A detailed report as a string
     """
     try:
-        # Get an example profile for reference
-        example = get_example_profile(tone)
-        
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": f"""
-                    You are an expert in psychological profiling and intelligence analysis.
-                    Create a detailed, professional report based on the provided psychological profile.
-                    The report should be written in a style similar to CIA intelligence reports,
-                    with clear sections, professional language, and detailed analysis.
-                    
-                    The report should include all the following sections:
-                    
-                    1. Executive Summary
-                    2. Core Personality Analysis
-                       - Personality Traits
-                       - Emotional Profile
-                       - Cognitive Patterns
-                    3. Communication & Decision Making
-                       - Communication Style
-                       - Decision Making Patterns
-                    4. Stress & Leadership
-                       - Stress Response Profile
-                       - Leadership Assessment
-                    5. Team Dynamics
-                       - Team Compatibility
-                    6. Writing & Communication Analysis
-                       - Writing Style
-                       - Linguistic Markers
-                    7. Security Profile
-                    8. Confidence Assessment
-                       - Overall Confidence Score
-                       - Potential Biases
-                       - Analysis Limitations
-                    9. Evidence Base
-                    
-                    For each section, provide specific evidence from the text with direct quotes where possible.
-                    Include confidence levels for assessments and highlight any counterintelligence implications.
-                    
-                    Here is an example of the kind of report we're looking for:
-                    
-                    {example}
-                    
-                    Use this example as a reference for the level of detail, structure, and tone we want.
-                    """
-                },
-                {"role": "user", "content": f"Profile: {profile.model_dump_json(indent=2)}\n\nGenerate a detailed report."},
-            ],
-        )
-        return completion.choices[0].message.content
+        return _complete(_detailed_report_request(profile, tone), "detailed_report")
+    except Exception as e:
+        print(f"Error generating detailed report: {str(e)}")
+        return None
+
+async def agenerate_detailed_report(profile: PsychologicalProfile, tone: str = "balanced") -> str:
+    """Async variant of generate_detailed_report."""
+    try:
+        return await _acomplete(_detailed_report_request(profile, tone), "detailed_report")
     except Exception as e:
         print(f"Error generating detailed report: {str(e)}")
         return None
 
+async def astream_detailed_report(profile: PsychologicalProfile, tone: str = "balanced") -> AsyncIterator[str]:
+    """
+    Stream a detailed report token by token.
+    
+    Args:
+        profile: The structured psychological profile
+        tone: The desired tone of the report ("positive", "negative", or "balanced")
+        
+    Yields:
+        Successive pieces of the report text
+        
+    Raises:
+        Any error from the API, so the caller can report a partial stream
+    """
+    async for delta in _astream(_detailed_report_request(profile, tone), "detailed_report"):
+        yield delta
+
+TEXT_TYPE_INSTRUCTIONS = """First, identify the type of text you're analyzing:
+- Direct statements: Personal thoughts, feelings, or experiences
+- Random excerpts: Fragments of text without clear context
+- ChatGPT conversations: Interactions with AI, including prompts and responses
+- Essays: Structured written content with a clear purpose
+- Text messages: Informal communication, possibly fragmented
+- Other: Identify the type if it doesn't fit the above categories
+
+Then, adapt your analysis approach based on the text type:
+- For direct statements: Focus on emotional content, personal values, and self-perception
+- For random excerpts: Look for patterns and themes that might reveal underlying psychology
+- For ChatGPT conversations: Analyze both the user's prompts and how they respond to AI
+- For essays: Examine argument structure, evidence selection, and conclusion formation
+- For text messages: Consider informal language patterns, emoji usage, and communication style"""
+
+INTELLIGENCE_DIRECTIVES = """**Neurolinguistic Focus:**
+1. Calculate pronoun ratios (I/we/they) and map to self-concept
+2. Analyze verb tense distribution for temporal orientation
+3. Quantify hedge words (might/could) vs definitive language
+4. Measure lexical density and syntactic complexity
+5. Identify semantic primes in emotional expression
+
+**Psychological Deep Dive:**
+1. Apply Dark Triad detection framework
+2. Map language to Hermann Brain Dominance model
+3. Analyze conceptual metaphors (Lakoffian frames)
+4. Detect cognitive dissonance patterns
+5. Identify narrative schema violations
+
+**Behavioral Forecasting:**
+1. Predict 3 most likely actions under stress
+2. Identify optimal persuasion strategies
+3. Determine vulnerability to recruitment
+4. Assess deception probability patterns
+5. Model information sensitivity thresholds
+
+**Communication Analysis:**
+1. Identify primary and secondary communication styles
+2. Assess communication strengths and potential manipulation tactics
+3. Evaluate adaptation capacity and social flexibility
+4. Analyze information sharing patterns and disclosure tendencies
+
+**Decision-Making Assessment:**
+1. Evaluate decision-making approach and methodology
+2. Assess risk tolerance and uncertainty handling
+3. Identify information gathering style and confirmation bias
+4. Analyze decision speed, quality, and consistency
+
+**Stress Response Profiling:**
+1. Identify primary coping mechanisms and resilience indicators
+2. Assess stress threshold and breaking point indicators
+3. Evaluate recovery patterns and adaptation strategies
+4. Analyze stress indicators and behavioral changes under pressure
+
+**Leadership Potential:**
+1. Evaluate leadership style and influence methodology
+2. Assess influence capacity and persuasion techniques
+3. Analyze vision development and strategic thinking
+4. Evaluate team building ability and group dynamics
+
+**Team Dynamics:**
+1. Identify preferred team role and social positioning
+2. Assess collaboration style and group contribution
+3. Evaluate conflict handling and resolution approach
+4. Analyze team contribution and value proposition"""
+
+INTELLIGENCE_REPORT_SECTIONS = """Create a comprehensive intelligence report that includes:
+
+1. Executive Summary
+2. Key Behavioral Patterns
+3. Communication Analysis
+4. Decision-Making Assessment
+5. Stress Response Profile
+6. Leadership Assessment
+7. Team Dynamics
+8. Security Implications
+9. Confidence Assessment
+10. Evidence Base
+
+For each section, provide specific evidence from the text with direct quotes where possible.
+Include confidence levels for assessments and highlight any counterintelligence implications.
+
+Use the example report below as a reference for the level of detail, structure, and tone we want."""
+
+@functools.lru_cache(maxsize=None)
+def _intelligence_system_prompt(tone: str) -> str:
+    """Build the intelligence report system prompt for a tone, once per tone."""
+    # Tone-independent instructions first, so all tones share the longest possible prefix
+    shared = f"{TEXT_TYPE_INSTRUCTIONS}\n\n{INTELLIGENCE_DIRECTIVES}"
+    tone_specific = get_profile_template(tone).strip()
+    return _with_example(f"{shared}\n\n{tone_specific}\n\n{INTELLIGENCE_REPORT_SECTIONS}", tone)
+
+def _intelligence_report_request(text: str, tone: str) -> Dict[str, Any]:
+    """Build the chat completion request for an intelligence report."""
+    return {
+        "messages": assemble_messages(
+            _intelligence_system_prompt(tone),
+            f"Generate a comprehensive intelligence report.\n\nText to analyze: {fit_to_budget(text, MAX_INPUT_TOKENS)}"
+        ),
+    }
+
 def generate_intelligence_report(text: str, tone: str = "balanced") -> str:
     """
     Generate a complete intelligence report from text.
@@ -549,127 +1128,55 @@ def generate_intelligence_report(text: str, tone: str = "balanced") -> str:
         A detailed intelligence report as a string
     """
     try:
-        # Get the appropriate template based on the desired tone
-        template = get_profile_template(tone)
-        
-        # Get an example profile for reference
-        example = get_example_profile(tone)
-        
-        # Identify the type of text to provide more specific instructions
-        text_type_prompt = """
-        First, identify the type of text you're analyzing:
-        - Direct statements: Personal thoughts, feelings, or experiences
-        - Random excerpts: Fragments of text without clear context
-        - ChatGPT conversations: Interactions with AI, including prompts and responses
-        - Essays: Structured written content with a clear purpose
-        - Text messages: Informal communication, possibly fragmented
-        - Other: Identify the type if it doesn't fit the above categories
-        
-        Then, adapt your analysis approach based on the text type:
-        - For direct statements: Focus on emotional content, personal values, and self-perception
-        - For random excerpts: Look for patterns and themes that might reveal underlying psychology
-        - For ChatGPT conversations: Analyze both the user's prompts and how they respond to AI
-        - For essays: Examine argument structure, evidence selection, and conclusion formation
-        - For text messages: Consider informal language patterns, emoji usage, and communication style
-        """
-        
-        # Advanced analysis directives
-        advanced_directives = """
-        **Neurolinguistic Focus:**
-        1. Calculate pronoun ratios (I/we/they) and map to self-concept
-        2. Analyze verb tense distribution for temporal orientation
-        3. Quantify hedge words (might/could) vs definitive language
-        4. Measure lexical density and syntactic complexity
-        5. Identify semantic primes in emotional expression
-
-        **Psychological Deep Dive:**
-        1. Apply Dark Triad detection framework
-        2. Map language to Hermann Brain Dominance model
-        3. Analyze conceptual metaphors (Lakoffian frames)
-        4. Detect cognitive dissonance patterns
-        5. Identify narrative schema violations
-
-        **Behavioral Forecasting:**
-        1. Predict 3 most likely actions under stress
-        2. Identify optimal persuasion strategies
-        3. Determine vulnerability to recruitment
-        4. Assess deception probability patterns
-        5. Model information sensitivity thresholds
-        
-        **Communication Analysis:**
-        1. Identify primary and secondary communication styles
-        2. Assess communication strengths and potential manipulation tactics
-        3. Evaluate adaptation capacity and social flexibility
-        4. Analyze information sharing patterns and disclosure tendencies
-        
-        **Decision-Making Assessment:**
-        1. Evaluate decision-making approach and methodology
-        2. Assess risk tolerance and uncertainty handling
-        3. Identify information gathering style and confirmation bias
-        4. Analyze decision speed, quality, and consistency
-        
-        **Stress Response Profiling:**
-        1. Identify primary coping mechanisms and resilience indicators
-        2. Assess stress threshold and breaking point indicators
-        3. Evaluate recovery patterns and adaptation strategies
-        4. Analyze stress indicators and behavioral changes under pressure
-        
-        **Leadership Potential:**
-        1. Evaluate leadership style and influence methodology
-        2. Assess influence capacity and persuasion techniques
-        3. Analyze vision development and strategic thinking
-        4. Evaluate team building ability and group dynamics
-        
-        **Team Dynamics:**
-        1. Identify preferred team role and social positioning
-        2. Assess collaboration style and group contribution
-        3. Evaluate conflict handling and resolution approach
-        4. Analyze team contribution and value proposition
-        """
-        
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": f"""
-                    {template}
-                    
-                    {text_type_prompt}
-                    
-                    {advanced_directives}
-                    
-                    Create a comprehensive intelligence report that includes:
-                    
-                    1. Executive Summary
-                    2. Key Behavioral Patterns
-                    3. Communication Analysis
-                    4. Decision-Making Assessment
-                    5. Stress Response Profile
-                    6. Leadership Assessment
-                    7. Team Dynamics
-                    8. Security Implications
-                    9. Confidence Assessment
-                    10. Evidence Base
-                    
-                    For each section, provide specific evidence from the text with direct quotes where possible.
-                    Include confidence levels for assessments and highlight any counterintelligence implications.
-                    
-                    Here is an example of the kind of report we're looking for:
-                    
-                    {example}
-                    
-                    Use this example as a reference for the level of detail, structure, and tone we want.
-                    """
-                },
-                {"role": "user", "content": f"Text to analyze: {text[:1000]}...\n\nGenerate a comprehensive intelligence report."},
-            ],
-        )
-        return completion.choices[0].message.content
+        return _complete(_intelligence_report_request(text, tone), "intelligence_report")
+    except Exception as e:
+        print(f"Error generating intelligence report: {str(e)}")
+        return None
+
+async def agenerate_intelligence_report(text: str, tone: str = "balanced") -> str:
+    """Async variant of generate_intelligence_report."""
+    try:
+        return await _acomplete(_intelligence_report_request(text, tone), "intelligence_report")
     except Exception as e:
         print(f"Error generating intelligence report: {str(e)}")
         return None
 
+async def astream_intelligence_report(text: str, tone: str = "balanced") -> AsyncIterator[str]:
+    """
+    Stream an intelligence report token by token.
+    
+    Args:
+        text: The text to analyze
+        tone: The desired tone of the report ("positive", "negative", or "balanced")
+        
+    Yields:
+        Successive pieces of the report text
+        
+    Raises:
+        Any error from the API, so the caller can report a partial stream
+    """
+    async for delta in _astream(_intelligence_report_request(text, tone), "intelligence_report"):
+        yield delta
+
+METRICS_INSTRUCTIONS = """You are an expert in psychological profiling and behavioral analysis.
+Calculate quantitative behavioral metrics from the provided text.
+
+Use linguistic features and psychological patterns to calculate these metrics."""
+
+def _metrics_request(text: str) -> Dict[str, Any]:
+    """Build the chat completion request for behavioral metrics."""
+    return {
+        "messages": assemble_messages(
+            METRICS_INSTRUCTIONS,
+            f"Calculate behavioral metrics and return as JSON.\n\nText: {fit_to_budget(text, MAX_INPUT_TOKENS)}"
+        ),
+        "response_format": METRICS_RESPONSE_FORMAT,
+    }
+
+def _parse_metrics(content: str) -> ProfileMetrics:
+    """Parse the JSON response into a ProfileMetrics object."""
+    return ProfileMetrics.model_validate_json(content)
+
 def calculate_metrics(text: str) -> ProfileMetrics:
     """
     Calculate quantitative behavioral metrics from text.
@@ -681,39 +1188,41 @@ def calculate_metrics(text: str) -> ProfileMetrics:
         Quantitative assessment metrics
     """
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": """
-                    You are an expert in psychological profiling and behavioral analysis.
-                    Calculate quantitative behavioral metrics from the provided text.
-                    Your response must be a valid JSON object with the following structure:
-                    {
-                      "persuasion_susceptibility": number between 0 and 1,
-                      "deception_capacity": number between 0 and 1,
-                      "information_hoarding": number between 0 and 1,
-                      "risk_tolerance": number between 0 and 1,
-                      "group_affiliation": number between 0 and 1,
-                      "cognitive_rigidity": number between 0 and 1
-                    }
-                    
-                    Use linguistic features and psychological patterns to calculate these metrics.
-                    """
-                },
-                {"role": "user", "content": f"Text: {text}\n\nCalculate behavioral metrics and return as JSON."},
-            ],
-            response_format={"type": "json_object"},
-        )
-        
-        # Parse the JSON response into a ProfileMetrics object
-        metrics_data = json.loads(completion.choices[0].message.content)
-        return ProfileMetrics(**metrics_data)
+        return _parse_metrics(_complete(_metrics_request(text), "metrics"))
     except Exception as e:
         print(f"Error calculating metrics: {str(e)}")
         return None
 
+async def acalculate_metrics(text: str) -> ProfileMetrics:
+    """Async variant of calculate_metrics."""
+    try:
+        return _parse_metrics(await _acomplete(_metrics_request(text), "metrics"))
+    except Exception as e:
+        print(f"Error calculating metrics: {str(e)}")
+        return None
+
+SECURITY_PROFILE_INSTRUCTIONS = """You are an expert in operational security and risk assessment.
+Analyze the provided text for operational security risks.
+
+Focus on patterns that could compromise security, such as:
+- Predictable communication patterns
+- Consistent metadata leakage
+- Behavioral tells in stress scenarios"""
+
+def _security_profile_request(text: str) -> Dict[str, Any]:
+    """Build the chat completion request for a security profile."""
+    return {
+        "messages": assemble_messages(
+            SECURITY_PROFILE_INSTRUCTIONS,
+            f"Analyze for operational security risks and return as JSON.\n\nText: {fit_to_budget(text, MAX_INPUT_TOKENS)}"
+        ),
+        "response_format": SECURITY_PROFILE_RESPONSE_FORMAT,
+    }
+
+def _parse_security_profile(content: str) -> SecurityProfile:
+    """Parse the JSON response into a SecurityProfile object."""
+    return SecurityProfile.model_validate_json(content)
+
 def generate_security_profile(text: str) -> SecurityProfile:
     """
     Analyze text for operational security risks.
@@ -725,40 +1234,235 @@ def generate_security_profile(text: str) -> SecurityProfile:
         A security-oriented risk assessment
     """
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": """
-                    You are an expert in operational security and risk assessment.
-                    Analyze the provided text for operational security risks.
-                    Your response must be a valid JSON object with the following structure:
-                    {
-                      "opsec_weaknesses": ["string"],
-                      "detectable_patterns": ["string"],
-                      "predictable_behaviors": ["string"],
-                      "suggested_countermeasures": ["string"]
-                    }
-                    
-                    Focus on patterns that could compromise security, such as:
-                    - Predictable communication patterns
-                    - Consistent metadata leakage
-                    - Behavioral tells in stress scenarios
-                    """
-                },
-                {"role": "user", "content": f"Text: {text}\n\nAnalyze for operational security risks and return as JSON."},
-            ],
-            response_format={"type": "json_object"},
-        )
-        
-        # Parse the JSON response into a SecurityProfile object
-        security_data = json.loads(completion.choices[0].message.content)
-        return SecurityProfile(**security_data)
+        return _parse_security_profile(_complete(_security_profile_request(text), "security_profile"))
+    except Exception as e:
+        print(f"Error generating security profile: {str(e)}")
+        return None
+
+async def agenerate_security_profile(text: str) -> SecurityProfile:
+    """Async variant of generate_security_profile."""
+    try:
+        return _parse_security_profile(await _acomplete(_security_profile_request(text), "security_profile"))
     except Exception as e:
         print(f"Error generating security profile: {str(e)}")
         return None
 
+# ===== COMBINED EXTRACTION =====
+
+# One call that yields the profile, metrics and security profile straight from the
+# text, in place of the reasoning, structured profile, metrics and security calls
+COMBINED_PROFILE_INSTRUCTIONS = """You are an expert in psychological profiling, behavioral analysis and operational security.
+Analyze the provided text in a single pass and extract a structured psychological
+profile of its author, including quantitative behavioral metrics ("profile_metrics")
+and operational security risks ("security_profile"). Derive the metrics from
+linguistic features and psychological patterns. For security risks, focus on
+predictable communication patterns, consistent metadata leakage and behavioral
+tells in stress scenarios.
+
+The "analysis" field holds a narrative analysis of the text, a few paragraphs long,
+that supports the structured fields."""
+
+def _combined_profile_request(text: str) -> Dict[str, Any]:
+    """Build the chat completion request for a combined extraction."""
+    return {
+        "messages": assemble_messages(
+            COMBINED_PROFILE_INSTRUCTIONS,
+            f"Profile the author of this text and return the result as JSON.\n\nText: {text}"
+        ),
+        "response_format": COMBINED_PROFILE_RESPONSE_FORMAT,
+    }
+
+def _parse_combined_profile(content: str, text: str) -> CombinedProfile:
+    """Parse the JSON response and split it into the profile, metrics and security profile."""
+    data = json.loads(content)
+    analysis = data.pop("analysis", "") or ""
+    profile = _build_profile(data, text)
+    return CombinedProfile(
+        analysis=analysis,
+        profile=profile,
+        metrics=profile.profile_metrics,
+        security_profile=profile.security_profile
+    )
+
+def _merge_security_profiles(profiles: List[SecurityProfile]) -> SecurityProfile:
+    """Combine the security profiles of parts of a text, keeping every distinct entry of each list."""
+    return SecurityProfile(**{
+        field: _unique([entry for profile in profiles for entry in getattr(profile, field)])
+        for field in SecurityProfile.model_fields
+    })
+
+def _merge_combined_profiles(text: str, chunks: List[str], parts: List[CombinedProfile]) -> CombinedProfile:
+    """Merge the combined extractions of a long text's chunks."""
+    profile = _merge_chunk_profiles(text, chunks, [part.profile for part in parts])
+    # Metrics are averaged weighted by chunk size, security findings are pooled
+    weighted = [(part.metrics, count_tokens(chunk)) for chunk, part in zip(chunks, parts) if part.metrics]
+    if weighted:
+        profile.profile_metrics = merge_metrics([metrics for metrics, _ in weighted],
+                                                [weight for _, weight in weighted])
+    security_profiles = [part.security_profile for part in parts if part.security_profile]
+    if security_profiles:
+        profile.security_profile = _merge_security_profiles(security_profiles)
+    return CombinedProfile(
+        analysis=join_chunk_analyses([part.analysis for part in parts]),
+        profile=profile,
+        metrics=profile.profile_metrics,
+        security_profile=profile.security_profile
+    )
+
+def generate_combined_profile(text: str) -> CombinedProfile:
+    """
+    Extract the profile, metrics and security profile of a text in one call.
+    
+    This is the fused alternative to running analyze_text_with_reasoning,
+    generate_structured_profile, calculate_metrics and generate_security_profile
+    separately: the text is sent once, and one response is split into the
+    three results. A text longer than MAX_INPUT_TOKENS gets one call per
+    chunk, merged as in generate_structured_profile.
+    
+    Args:
+        text: The text to analyze
+        
+    Returns:
+        The analysis, profile, metrics and security profile
+    """
+    try:
+        chunks = split_into_chunks(text)
+        if len(chunks) > 1:
+            def extract(chunk):
+                return _parse_combined_profile(_complete(_combined_profile_request(chunk), "combined_profile"), chunk)
+            return _merge_combined_profiles(text, chunks, _map_parallel(extract, chunks))
+        return _parse_combined_profile(_complete(_combined_profile_request(text), "combined_profile"), text)
+    except Exception as e:
+        print(f"Error generating combined profile: {str(e)}")
+        return None
+
+async def agenerate_combined_profile(text: str) -> CombinedProfile:
+    """Async variant of generate_combined_profile."""
+    try:
+        chunks = split_into_chunks(text)
+        if len(chunks) > 1:
+            async def extract(chunk):
+                return _parse_combined_profile(
+                    await _acomplete(_combined_profile_request(chunk), "combined_profile"), chunk
+                )
+            parts = await asyncio.gather(*(extract(chunk) for chunk in chunks))
+            return _merge_combined_profiles(text, chunks, list(parts))
+        return _parse_combined_profile(await _acomplete(_combined_profile_request(text), "combined_profile"), text)
+    except Exception as e:
+        print(f"Error generating combined profile: {str(e)}")
+        return None
+
+# ===== INCREMENTAL ANALYSIS =====
+
+# Share of the analyzed text that may be rewritten or deleted before an update
+# re-analyzes the whole text; removed content cannot be taken out of a merged profile
+INCREMENTAL_MAX_REMOVED = float(os.getenv("CIABOT_INCREMENTAL_MAX_REMOVED", "0.1"))
+
+class ContentDelta(BaseModel):
+    """What changed in a text since the version that was last analyzed."""
+    added: List[str] = Field(default_factory=list)  # New or rewritten passages, in text order
+    added_tokens: int = 0
+    removed_tokens: int = 0
+    previous_tokens: int = 0
+    
+    @property
+    def text(self) -> str:
+        """The new passages, separated by blank lines."""
+        return "\n\n".join(passage.strip() for passage in self.added if passage.strip())
+    
+    @property
+    def removed_fraction(self) -> float:
+        """Share of the previous version that was rewritten or deleted."""
+        return self.removed_tokens / self.previous_tokens if self.previous_tokens else 0.0
+
+def diff_content(previous: str, current: str) -> ContentDelta:
+    """
+    Find the passages of a text that are new since a previous version.
+    
+    Appended text is found directly. Otherwise the versions are compared
+    sentence by sentence, and each run of inserted or rewritten sentences
+    becomes a passage.
+    
+    Args:
+        previous: The version that was analyzed
+        current: The current version
+        
+    Returns:
+        The new passages and the size of the change
+    """
+    previous_tokens = count_tokens(previous)
+    if current.startswith(previous):
+        appended = current[len(previous):]
+        return ContentDelta(
+            added=[appended] if appended.strip() else [],
+            added_tokens=count_tokens(appended),
+            previous_tokens=previous_tokens
+        )
+    
+    old, new = split_sentences(previous), split_sentences(current)
+    delta = ContentDelta(previous_tokens=previous_tokens)
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if tag in ("replace", "insert"):
+            passage = "".join(new[j1:j2])
+            if passage.strip():
+                delta.added.append(passage)
+                delta.added_tokens += count_tokens(passage)
+        if tag in ("replace", "delete"):
+            delta.removed_tokens += count_tokens("".join(old[i1:i2]))
+    return delta
+
+def merge_metrics(metrics: List[ProfileMetrics], weights: Optional[List[float]] = None) -> ProfileMetrics:
+    """
+    Combine the metrics of parts of a text into metrics of the whole text.
+    
+    Args:
+        metrics: The metrics of each part
+        weights: Relative size of each part (equal weights if omitted)
+        
+    Returns:
+        The weighted average of each metric
+    """
+    if not metrics:
+        raise ValueError("No metrics to merge")
+    weights = weights or [1.0] * len(metrics)
+    total = sum(weights)
+    return ProfileMetrics(**{
+        field: sum(getattr(part, field) * weight for part, weight in zip(metrics, weights)) / total
+        for field in ProfileMetrics.model_fields
+    })
+
+def merge_profile_update(
+    profile: PsychologicalProfile,
+    update: PsychologicalProfile,
+    text: str,
+    weights: List[float],
+    update_number: int
+) -> PsychologicalProfile:
+    """
+    Merge the profile of a text's new passages into the profile of the text.
+    
+    Args:
+        profile: Profile of the previously analyzed version
+        update: Profile of the new passages
+        text: The current text, for the neurolinguistic features
+        weights: Relative size of the unchanged text and of the new passages
+        update_number: How many updates have been merged, including this one
+        
+    Returns:
+        The profile of the current text
+    """
+    merged = merge_profiles([profile, update], weights)
+    merged.overall_assessment = (
+        f"{profile.overall_assessment.strip()}\n\nUpdate {update_number}: {update.overall_assessment.strip()}"
+    )
+    note = "Updated incrementally: "
+    merged.limitations = _unique(
+        [l for l in profile.limitations + update.limitations if not l.startswith(note)]
+        + [f"{note}{update_number} later additions were profiled on their own and merged."]
+    )
+    merged.neurolinguistic_features = extract_neurolinguistic_features(text)
+    return merged
+
 class CIAProfile:
     """A class to manage CIA profiles."""
     
@@ -769,6 +1473,10 @@ class CIAProfile:
         self.name = name
         self.content = None
         self.profile = None
+        self.metrics = None
+        # The content the profile and metrics describe, and the updates merged into them
+        self.analyzed_content = None
+        self.updates = 0
     
     def update_content(self, content: str) -> None:
         """Update the profile content."""
@@ -779,7 +1487,8 @@ class CIAProfile:
         return {
             "name": self.name,
             "content": self.content,
-            "profile": self.profile.dict() if self.profile else None
+            "profile": self.profile.dict() if self.profile else None,
+            "metrics": self.metrics.model_dump() if self.metrics else None
         }
     
     def generate_profile(self, tone: str = "balanced") -> None:
@@ -787,6 +1496,63 @@ class CIAProfile:
         if not self.content:
             raise ValueError("No content to generate profile from")
         self.profile = generate_structured_profile(self.content, tone)
+        self.analyzed_content = self.content if self.profile else None
+        self.updates = 0
+    
+    async def agenerate_profile(self, tone: str = "balanced") -> None:
+        """Async variant of generate_profile."""
+        if not self.content:
+            raise ValueError("No content to generate profile from")
+        self.profile = await agenerate_structured_profile(self.content, tone)
+        self.analyzed_content = self.content if self.profile else None
+        self.updates = 0
+    
+    def update_profile(self, tone: str = "balanced", include_metrics: bool = True) -> ContentDelta:
+        """
+        Bring the profile and metrics up to date with the content.
+        
+        The content is compared with the version last analyzed, and only the
+        new or rewritten passages are analyzed; their profile and metrics are
+        merged into the stored ones, weighted by size. A document that grew by
+        2% costs about 2% of a full analysis. The whole content is analyzed
+        instead if nothing has been analyzed yet, or if more than
+        INCREMENTAL_MAX_REMOVED of the analyzed text was rewritten or deleted.
+        
+        Args:
+            tone: Tone of the profile
+            include_metrics: Also keep the metrics up to date
+            
+        Returns:
+            The change since the version last analyzed
+        """
+        if not self.content:
+            raise ValueError("No content to update profile from")
+        if self.profile is None or self.analyzed_content is None:
+            delta = ContentDelta(added=[self.content], added_tokens=count_tokens(self.content))
+        else:
+            delta = diff_content(self.analyzed_content, self.content)
+        
+        if self.profile is None or delta.removed_fraction > INCREMENTAL_MAX_REMOVED:
+            self.generate_profile(tone)
+            if include_metrics:
+                self.metrics = calculate_metrics(self.content)
+            return delta
+        
+        if delta.added:
+            update = generate_structured_profile(delta.text, tone)
+            if update is None:
+                raise ValueError("Failed to generate profile of the new content")
+            weights = [max(delta.previous_tokens - delta.removed_tokens, 1), max(delta.added_tokens, 1)]
+            self.updates += 1
+            self.profile = merge_profile_update(self.profile, update, self.content, weights, self.updates)
+            if include_metrics and self.metrics is not None:
+                metrics = calculate_metrics(delta.text)
+                # Without metrics for the new passages, recompute them for the whole content
+                self.metrics = merge_metrics([self.metrics, metrics], weights) if metrics else None
+        if include_metrics and self.metrics is None:
+            self.metrics = calculate_metrics(self.content)
+        self.analyzed_content = self.content
+        return delta
     
     def get_report(self, tone: str = "balanced") -> str:
         """Get a detailed report from the profile."""
@@ -0,0 +1,78 @@
+"""
+Request Coalescing Module
+
+This module deduplicates identical work that is in progress at the same time.
+When a computation for a key is already running, later callers with the same
+key wait for it and receive its result instead of starting their own, so a
+burst of duplicate requests (a double-clicked button, a client retrying)
+costs one set of model calls. Unlike the response cache, nothing is kept once
+the computation finishes.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight(Generic[T]):
+    task: "asyncio.Future[T]"
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time and shares its result."""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0
+        self.joined = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of computations currently running."""
+        return len(self._flights)
+
+    async def run(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a computation, or join the one already running for the key.
+
+        The computation is cancelled only once every caller waiting for it has
+        been cancelled; a single caller going away does not affect the others.
+
+        Args:
+            key: Identifies the computation, e.g. a hash of its inputs
+            func: Starts the computation; only called if none is running for the key
+
+        Returns:
+            The computation's result (its exception is raised to every caller)
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        if flight is None or flight.task.get_loop() is not loop:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+            self.started += 1
+        else:
+            self.joined += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _finish(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception as retrieved if every caller has gone away
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Report the running computations and how many callers shared one."""
+        return {"in_flight": self.in_flight, "started": self.started, "joined": self.joined}
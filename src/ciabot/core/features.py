@@ -0,0 +1,157 @@
+"""
+Neurolinguistic Feature Module
+
+This module computes the quantitative neurolinguistic features of a text locally,
+using compiled regular-expression lexicons instead of asking the model to estimate
+them. The counts are exact and reproducible, and filling the profile's
+NeurolinguisticFeature from them keeps those fields out of the structured-profile
+prompt.
+"""
+
+import re
+from typing import Any, Dict, List, Pattern
+
+
+def _lexicon(*terms: str) -> Pattern:
+    """Compile a case-insensitive, whole-word alternation of the given terms."""
+    # Longest terms first so multi-word phrases win over their prefixes
+    escaped = sorted((re.escape(term).replace(r"\ ", r"\s+") for term in terms), key=len, reverse=True)
+    alternatives = "|".join(escaped)
+    return re.compile(rf"(?<![\w'])(?:{alternatives})(?![\w'])", re.IGNORECASE)
+
+
+WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+SENTENCE_RE = re.compile(r"[^.!?]+(?:[.!?]+|$)")
+
+PRONOUN_LEXICONS: Dict[str, Pattern] = {
+    "I": _lexicon("i", "me", "my", "mine", "myself", "i'm", "i've", "i'd", "i'll"),
+    "we": _lexicon("we", "us", "our", "ours", "ourselves", "we're", "we've", "we'd", "we'll"),
+    "you": _lexicon("you", "your", "yours", "yourself", "yourselves", "you're", "you've", "you'd", "you'll"),
+    "they": _lexicon("they", "them", "their", "theirs", "themselves", "they're", "they've", "they'd", "they'll"),
+}
+
+TEMPORAL_LEXICONS: Dict[str, Pattern] = {
+    "past": _lexicon(
+        "was", "were", "had", "did", "been", "used to", "yesterday", "ago", "previously",
+        "formerly", "once", "last week", "last year", "back then", "earlier"
+    ),
+    "present": _lexicon(
+        "am", "is", "are", "do", "does", "has", "have", "now", "today", "currently",
+        "nowadays", "these days", "at the moment", "presently", "i'm", "we're", "you're",
+        "they're", "it's"
+    ),
+    "future": _lexicon(
+        "will", "shall", "going to", "gonna", "tomorrow", "soon", "next week", "next year",
+        "someday", "eventually", "in the future", "plan to", "intend to", "i'll", "we'll",
+        "you'll", "they'll", "it'll", "won't"
+    ),
+}
+
+# Regular past-tense verbs not covered by the auxiliary lexicon
+PAST_TENSE_RE = re.compile(r"\b[a-z]{3,}ed\b", re.IGNORECASE)
+
+HEDGE_LEXICON = _lexicon(
+    "might", "may", "could", "perhaps", "maybe", "possibly", "probably", "seem", "seems",
+    "seemed", "appear", "appears", "appeared", "suggest", "suggests", "somewhat", "sort of",
+    "kind of", "i think", "i guess", "i suppose", "i believe", "likely", "unlikely",
+    "apparently", "roughly", "approximately", "generally", "usually", "arguably", "tend to",
+    "not sure", "it seems"
+)
+
+BOOSTER_LEXICON = _lexicon(
+    "certainly", "definitely", "clearly", "obviously", "undoubtedly", "always", "never",
+    "absolutely", "surely", "of course", "must", "will", "know", "knew", "indeed",
+    "without doubt", "no doubt", "in fact", "completely", "totally", "proven", "sure"
+)
+
+SUBORDINATOR_LEXICON = _lexicon(
+    "because", "although", "though", "while", "whereas", "since", "unless", "if", "when",
+    "whenever", "which", "that", "who", "whom", "whose", "where", "after", "before",
+    "until", "so that", "even though", "as if", "however", "therefore"
+)
+
+# Normalization constants for syntactic complexity
+LONG_SENTENCE_WORDS = 35.0
+DENSE_CLAUSES_PER_SENTENCE = 3.0
+
+
+def _count(pattern: Pattern, text: str) -> int:
+    return len(pattern.findall(text))
+
+
+def _ratios(counts: Dict[str, int]) -> Dict[str, float]:
+    """Normalize counts to ratios summing to 1 (all zeros if nothing was counted)."""
+    total = sum(counts.values())
+    if not total:
+        return {key: 0.0 for key in counts}
+    return {key: round(value / total, 4) for key, value in counts.items()}
+
+
+def _examples(pattern: Pattern, text: str, limit: int = 5) -> List[str]:
+    """Return the first distinct matches of a lexicon, lowercased."""
+    seen: List[str] = []
+    for match in pattern.finditer(text):
+        term = " ".join(match.group(0).lower().split())
+        if term not in seen:
+            seen.append(term)
+            if len(seen) == limit:
+                break
+    return seen
+
+
+def compute_neurolinguistic_features(text: str) -> Dict[str, Any]:
+    """
+    Compute neurolinguistic features from text.
+
+    Args:
+        text: The text to analyze
+
+    Returns:
+        The NeurolinguisticFeature fields: pronoun ratios, temporal orientation,
+        hedge density (hedges per sentence, capped at 1), certainty (boosters
+        relative to boosters plus hedges, 0.5 when neither occurs) and
+        syntactic complexity (mean sentence length and clause density), with
+        the underlying counts as evidence
+    """
+    words = WORD_RE.findall(text)
+    sentences = [s for s in SENTENCE_RE.findall(text) if WORD_RE.search(s)]
+    word_count = len(words)
+    sentence_count = max(len(sentences), 1)
+
+    pronoun_counts = {key: _count(pattern, text) for key, pattern in PRONOUN_LEXICONS.items()}
+    temporal_counts = {key: _count(pattern, text) for key, pattern in TEMPORAL_LEXICONS.items()}
+    temporal_counts["past"] += _count(PAST_TENSE_RE, text)
+
+    hedges = _count(HEDGE_LEXICON, text)
+    boosters = _count(BOOSTER_LEXICON, text)
+    subordinators = _count(SUBORDINATOR_LEXICON, text)
+    clause_marks = text.count(",") + text.count(";") + text.count(":")
+
+    mean_sentence_length = word_count / sentence_count
+    clauses_per_sentence = (subordinators + clause_marks) / sentence_count
+    syntactic_complexity = (
+        min(mean_sentence_length / LONG_SENTENCE_WORDS, 1.0)
+        + min(clauses_per_sentence / DENSE_CLAUSES_PER_SENTENCE, 1.0)
+    ) / 2
+
+    hedge_density = min(hedges / sentence_count, 1.0)
+    certainty_score = boosters / (boosters + hedges) if boosters + hedges else 0.5
+
+    evidence = [
+        f"{word_count} words in {len(sentences)} sentences "
+        f"(mean sentence length {mean_sentence_length:.1f} words, "
+        f"{clauses_per_sentence:.2f} clause markers per sentence)",
+        "Pronoun counts: " + ", ".join(f"{key}={value}" for key, value in pronoun_counts.items()),
+        "Temporal marker counts: " + ", ".join(f"{key}={value}" for key, value in temporal_counts.items()),
+        f"{hedges} hedges ({', '.join(_examples(HEDGE_LEXICON, text)) or 'none'}) and "
+        f"{boosters} certainty markers ({', '.join(_examples(BOOSTER_LEXICON, text)) or 'none'})",
+    ]
+
+    return {
+        "syntactic_complexity": round(syntactic_complexity, 4),
+        "pronoun_ratio": _ratios(pronoun_counts),
+        "temporal_orientation": _ratios(temporal_counts),
+        "hedge_density": round(hedge_density, 4),
+        "certainty_score": round(certainty_score, 4),
+        "evidence": evidence,
+    }
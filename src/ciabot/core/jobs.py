@@ -0,0 +1,358 @@
+"""
+Analysis Job Queue Module
+
+This module provides a persistent job queue for long-running analyses. Jobs are
+stored in a local SQLite database and picked up by a pool of asyncio workers, so
+a burst of submissions far larger than the worker concurrency is queued rather
+than dropped, and callers poll for the result instead of holding a connection
+open for the whole analysis.
+
+Higher-priority jobs are claimed first, ties in submission order. Jobs that were
+running when the process stopped are returned to the queue on startup.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+from src.utils.paths import get_output_path
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+@dataclass
+class Job:
+    """A queued analysis and, once finished, its result."""
+    id: str
+    status: str
+    payload: Dict[str, Any]
+    priority: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job has reached a final state."""
+        return self.status in FINISHED_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the job to a dictionary, without its payload."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobStore:
+    """SQLite-backed storage for jobs and their results."""
+
+    _COLUMNS = "id, status, payload, priority, result, error, created_at, started_at, finished_at"
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Initialize the store.
+
+        Args:
+            path: Location of the SQLite database (":memory:" for a transient store)
+        """
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, created_at)"
+        )
+        self._conn.commit()
+
+    def _row_to_job(self, row: tuple) -> Job:
+        return Job(
+            id=row[0],
+            status=row[1],
+            payload=json.loads(row[2]),
+            priority=row[3],
+            result=json.loads(row[4]) if row[4] is not None else None,
+            error=row[5],
+            created_at=row[6],
+            started_at=row[7],
+            finished_at=row[8],
+        )
+
+    def add(self, payload: Dict[str, Any], priority: int = 0) -> Job:
+        """Store a new queued job."""
+        job = Job(id=uuid.uuid4().hex, status=QUEUED, payload=payload, priority=priority, created_at=time.time())
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, priority, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.status, json.dumps(payload), priority, job.created_at)
+            )
+            self._conn.commit()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with the given id, or None."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def claim_next(self) -> Optional[Job]:
+        """Mark the highest-priority queued job as running and return it."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM jobs WHERE status = ? "
+                "ORDER BY priority DESC, created_at ASC LIMIT 1",
+                (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?", (RUNNING, now, row[0]))
+            self._conn.commit()
+        job = self._row_to_job(row)
+        job.status = RUNNING
+        job.started_at = now
+        return job
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        """
+        Record the final state of a job that has not already finished.
+
+        Returns:
+            True if the job was updated
+        """
+        placeholders = ", ".join("?" for _ in FINISHED_STATES)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                f"WHERE id = ? AND status NOT IN ({placeholders})",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id,
+                 *FINISHED_STATES)
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def requeue_running(self) -> int:
+        """Return jobs left running by an interrupted process to the queue."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def requeue(self, job_id: str) -> bool:
+        """
+        Return a running job to the queue.
+
+        Returns:
+            True if the job was running and is queued again
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE id = ? AND status = ?", (QUEUED, job_id, RUNNING)
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs in each state."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """A pool of asyncio workers running jobs from a JobStore."""
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        store: JobStore,
+        concurrency: int = 4,
+        poll_interval: float = 1.0
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            handler: Coroutine function turning a job payload into its result
+            store: Where jobs are persisted
+            concurrency: Number of jobs run at the same time
+            poll_interval: Seconds an idle worker waits before re-checking the store
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.handler = handler
+        self.store = store
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancel_requested: Set[str] = set()  # Running jobs cancelled through cancel()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def started(self) -> bool:
+        """Whether the workers are running."""
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        """Requeue interrupted jobs and start the workers."""
+        if self.started:
+            return
+        self.store.requeue_running()
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """
+        Stop the workers.
+
+        Jobs that are still running are interrupted and returned to the queue,
+        to be run again the next time the queue starts.
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, payload: Dict[str, Any], priority: int = 0) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            payload: JSON-serializable input passed to the handler
+            priority: Higher values are run first
+
+        Returns:
+            The queued job
+        """
+        job = self.store.add(payload, priority)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with the given id, or None."""
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            The job in its final state, or None if there is no such job
+        """
+        if self.store.finish(job_id, CANCELLED):
+            task = self._running.get(job_id)
+            if task is not None:
+                self._cancel_requested.add(job_id)
+                task.cancel()
+        return self.store.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            # Clear before claiming so a submit made after an empty claim still wakes us
+            self._wakeup.clear()
+            job = self.store.claim_next()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Job) -> None:
+        task = asyncio.ensure_future(self.handler(job.payload))
+        self._running[job.id] = task
+        try:
+            result = await task
+            self.store.finish(job.id, SUCCEEDED, result=result)
+        except asyncio.CancelledError:
+            if job.id in self._cancel_requested:
+                # Cancelled through cancel(), which already recorded it
+                return
+            # The worker itself is being stopped
+            task.cancel()
+            self.store.requeue(job.id)
+            raise
+        except Exception as e:
+            print(f"Error running job {job.id}: {str(e)}")
+            self.store.finish(job.id, FAILED, error=str(e))
+        finally:
+            self._running.pop(job.id, None)
+            self._cancel_requested.discard(job.id)
+
+
+def create_job_queue(
+    handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+    path: Optional[Union[str, Path]] = None,
+    concurrency: Optional[int] = None
+) -> JobQueue:
+    """
+    Create a job queue configured from the environment.
+
+    Uses CIABOT_JOB_DB for the database location (default output/jobs.sqlite)
+    and CIABOT_JOB_CONCURRENCY for the number of workers (default 4).
+
+    Args:
+        handler: Coroutine function turning a job payload into its result
+        path: Database location overriding CIABOT_JOB_DB
+        concurrency: Worker count overriding CIABOT_JOB_CONCURRENCY
+
+    Returns:
+        A JobQueue whose workers are started with JobQueue.start()
+    """
+    if path is None:
+        path = os.getenv("CIABOT_JOB_DB") or get_output_path("jobs.sqlite")
+    if concurrency is None:
+        concurrency = int(os.getenv("CIABOT_JOB_CONCURRENCY", "4"))
+    return JobQueue(handler, JobStore(path), concurrency=concurrency)
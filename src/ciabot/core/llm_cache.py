@@ -0,0 +1,359 @@
+"""
+LLM Response Cache Module
+
+This module provides a content-addressed cache for chat completion responses.
+Requests are keyed on a hash of the model, messages, response format and every
+other request parameter, so re-analyzing the same text returns the stored
+responses instead of repeating the model calls.
+
+The cache is made of tiers that are consulted in order: a fast in-memory LRU tier
+and an optional on-disk SQLite tier with a time-to-live and a size bound. A hit
+in a lower tier is promoted into the tiers above it.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from src.utils.paths import get_output_path
+
+# Supported eviction orders: least recently used or first in, first out
+EVICTION_POLICIES = ("lru", "fifo")
+
+
+def make_cache_key(request: Dict[str, Any]) -> str:
+    """
+    Compute the content address of a chat completion request.
+
+    Args:
+        request: The keyword arguments passed to chat.completions.create
+
+    Returns:
+        A hex SHA-256 digest of the canonical JSON form of the request
+    """
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counters for a response cache."""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    tier_hits: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the counters to a dictionary."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": self.hit_rate,
+            "tier_hits": dict(self.tier_hits),
+        }
+
+
+class CacheTier:
+    """Base class for a cache tier storing response content by key."""
+    name = "tier"
+    # Whether get and set do blocking I/O; async callers then run them off the event loop
+    blocking = False
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the stored content for the key, or None."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: str) -> None:
+        """Store content under the key, evicting entries if needed."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryTier(CacheTier):
+    """In-memory tier bounded by entry count."""
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024, eviction: str = "lru"):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.max_entries = max_entries
+        self.eviction = eviction
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None and self.eviction == "lru":
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteTier(CacheTier):
+    """On-disk tier with a time-to-live and a bound on total stored bytes."""
+    name = "sqlite"
+    blocking = True
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        eviction: str = "lru"
+    ):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._order_column = "accessed_at" if eviction == "lru" else "created_at"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_responses_{self._order_column} "
+            f"ON responses ({self._order_column})"
+        )
+        self._conn.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[1], now):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the oldest entries until under the size bound."""
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            f"SELECT key, size FROM responses ORDER BY {self._order_column} ASC"
+        ).fetchall()
+        victims = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    """A tiered, content-addressed cache of chat completion responses."""
+
+    def __init__(self, tiers: List[CacheTier]):
+        """
+        Initialize the cache.
+
+        Args:
+            tiers: Cache tiers ordered from fastest to slowest
+        """
+        self.tiers = tiers
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def get(self, request: Dict[str, Any]) -> Optional[str]:
+        """
+        Look up the response content for a request.
+
+        Args:
+            request: The keyword arguments passed to chat.completions.create
+
+        Returns:
+            The cached content, or None on a miss
+        """
+        key = make_cache_key(request)
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for upper in self.tiers[:i]:
+                    upper.set(key, value)
+                with self._lock:
+                    self.stats.hits += 1
+                    self.stats.tier_hits[tier.name] = self.stats.tier_hits.get(tier.name, 0) + 1
+                return value
+        with self._lock:
+            self.stats.misses += 1
+        return None
+
+    def set(self, request: Dict[str, Any], content: str) -> None:
+        """Store the response content for a request in every tier."""
+        key = make_cache_key(request)
+        for tier in self.tiers:
+            tier.set(key, content)
+        with self._lock:
+            self.stats.writes += 1
+
+    @property
+    def blocking(self) -> bool:
+        """Whether a lookup or store may do blocking I/O."""
+        return any(tier.blocking for tier in self.tiers)
+
+    async def aget(self, request: Dict[str, Any]) -> Optional[str]:
+        """Async variant of get; with a blocking tier the lookup runs in the default executor."""
+        if not self.blocking:
+            return self.get(request)
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, request)
+
+    async def aset(self, request: Dict[str, Any], content: str) -> None:
+        """Async variant of set; with a blocking tier the store runs in the default executor."""
+        if not self.blocking:
+            self.set(request, content)
+            return
+        await asyncio.get_running_loop().run_in_executor(None, self.set, request, content)
+
+    def clear(self) -> None:
+        """Remove all entries from every tier and reset the counters."""
+        for tier in self.tiers:
+            tier.clear()
+        self.stats = CacheStats()
+
+
+# The process-wide cache used by ciaprofile; None means caching is disabled
+_response_cache: Optional[ResponseCache] = None
+_configured = False
+
+
+def configure_cache(
+    mode: str = "memory",
+    path: Optional[Union[str, Path]] = None,
+    memory_entries: int = 1024,
+    ttl_seconds: Optional[float] = 7 * 24 * 3600,
+    max_bytes: int = 256 * 1024 * 1024,
+    eviction: str = "lru"
+) -> Optional[ResponseCache]:
+    """
+    Configure the process-wide response cache.
+
+    Args:
+        mode: "off" to disable caching, "memory" for the LRU tier only, or
+            "disk" for the LRU tier backed by a SQLite tier
+        path: Location of the SQLite database for the "disk" mode
+        memory_entries: Maximum number of responses held in memory
+        ttl_seconds: Age after which disk entries expire (None for no expiry)
+        max_bytes: Maximum total size of the disk tier
+        eviction: Eviction order for both tiers ("lru" or "fifo")
+
+    Returns:
+        The configured cache, or None if caching is disabled
+    """
+    global _response_cache, _configured
+    _configured = True
+    if mode == "off":
+        _response_cache = None
+        return None
+    if mode not in ("memory", "disk"):
+        raise ValueError(f"Unknown cache mode: {mode}")
+
+    tiers: List[CacheTier] = [MemoryTier(max_entries=memory_entries, eviction=eviction)]
+    if mode == "disk":
+        if path is None:
+            path = get_output_path("llm_cache.sqlite")
+        tiers.append(SQLiteTier(path, ttl_seconds=ttl_seconds, max_bytes=max_bytes, eviction=eviction))
+    _response_cache = ResponseCache(tiers)
+    return _response_cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Return the process-wide response cache.
+
+    On first use the cache is configured from the environment: CIABOT_CACHE
+    ("off", "memory" or "disk"; default "off"), CIABOT_CACHE_PATH,
+    CIABOT_CACHE_TTL (seconds) and CIABOT_CACHE_MAX_MB.
+    """
+    if not _configured:
+        ttl = os.getenv("CIABOT_CACHE_TTL")
+        configure_cache(
+            mode=os.getenv("CIABOT_CACHE", "off"),
+            path=os.getenv("CIABOT_CACHE_PATH") or None,
+            ttl_seconds=float(ttl) if ttl else 7 * 24 * 3600,
+            max_bytes=int(float(os.getenv("CIABOT_CACHE_MAX_MB", "256")) * 1024 * 1024)
+        )
+    return _response_cache
@@ -0,0 +1,101 @@
+"""
+Message Assembly Module
+
+This module builds the message lists sent to the model so that each piece of
+content appears only once per request. The input text is sent in the user
+message; if the system prompt also embeds it (as generate_profile_prompt does),
+the embedded copy is replaced by a short reference rather than paying for the
+document twice.
+
+It also provides a duplication check that estimates the prompt tokens a
+request spends on repeated content, used to flag requests that slip through.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List
+from src.ciabot.core.rate_limit import CHARS_PER_TOKEN
+
+# Stands in for the text wherever a system prompt would otherwise repeat it
+TEXT_REFERENCE = "[The text to analyze is provided in the user message.]"
+
+# Content shorter than this is too small to be worth deduplicating or flagging
+MIN_DUPLICATE_CHARS = 64
+
+
+def assemble_messages(system: str, user: str) -> List[Dict[str, str]]:
+    """
+    Build a system and user message pair in which the user content appears once.
+
+    Args:
+        system: The system prompt, which may embed the user content
+        user: The user message, normally the text being analyzed
+
+    Returns:
+        The chat messages
+    """
+    content = user.strip()
+    if len(content) >= MIN_DUPLICATE_CHARS and content in system:
+        system = system.replace(content, TEXT_REFERENCE)
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
+@dataclass
+class DuplicateContent:
+    """A piece of content repeated across the messages of one request."""
+    excerpt: str
+    chars: int
+    occurrences: int
+
+    @property
+    def wasted_tokens(self) -> int:
+        """Estimated prompt tokens spent on the repeated copies."""
+        return self.chars * (self.occurrences - 1) // CHARS_PER_TOKEN
+
+
+def find_duplicated_content(messages: List[Dict[str, Any]]) -> List[DuplicateContent]:
+    """
+    Find content that appears in more than one message of a request.
+
+    A message whose whole content is embedded in another message counts as one
+    duplicate; otherwise repeated lines are counted individually.
+
+    Args:
+        messages: The chat messages of a request
+
+    Returns:
+        The repeated content, largest first
+    """
+    contents = [m.get("content") for m in messages]
+    contents = [c.strip() for c in contents if isinstance(c, str)]
+    duplicates: List[DuplicateContent] = []
+    embedded = set()
+    for i, content in enumerate(contents):
+        if len(content) < MIN_DUPLICATE_CHARS:
+            continue
+        copies = sum(1 for j, other in enumerate(contents) if j != i and content in other)
+        if copies:
+            duplicates.append(DuplicateContent(excerpt=content[:80], chars=len(content), occurrences=copies + 1))
+            embedded.add(i)
+
+    counts: Dict[str, int] = {}
+    for i, content in enumerate(contents):
+        if i in embedded:
+            continue
+        # Count each line once per message
+        for line in {line.strip() for line in content.splitlines()}:
+            if len(line) >= MIN_DUPLICATE_CHARS:
+                counts[line] = counts.get(line, 0) + 1
+    duplicates.extend(
+        DuplicateContent(excerpt=line[:80], chars=len(line), occurrences=count)
+        for line, count in counts.items()
+        if count > 1
+    )
+    return sorted(duplicates, key=lambda d: d.chars, reverse=True)
+
+
+def duplicated_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Estimate the prompt tokens a request spends on repeated content."""
+    return sum(duplicate.wasted_tokens for duplicate in find_duplicated_content(messages))
@@ -0,0 +1,219 @@
+"""
+Analysis Pipeline Module
+
+This module schedules the analysis stages of the CIA Profile Generator.
+Each stage declares the stages whose outputs it needs, and the scheduler starts it
+as soon as those inputs exist, so independent stages run concurrently and the
+wall-clock time of a full analysis follows the critical path of the stage graph.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from src.ciabot.core.retry import deadline, remaining_time
+
+
+class StageError(Exception):
+    """Raised when a stage cannot run or its dependencies failed."""
+
+
+@dataclass
+class Stage:
+    """A single unit of work in the analysis pipeline.
+
+    The stage function is called with the results of its dependencies as keyword
+    arguments. Coroutine functions are awaited; plain functions run in the
+    default executor so blocking model calls do not stall the event loop, and
+    any awaitable they return is awaited on the loop.
+
+    A stage with a timeout fails with a StageError if it takes longer. Model
+    calls made by the stage are retried individually, so only the calls that
+    failed are repeated.
+    """
+    name: str
+    func: Callable[..., Any]
+    depends_on: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None
+
+
+@dataclass
+class StageResult:
+    """Outcome of a single stage."""
+    name: str
+    value: Any = None
+    error: Optional[BaseException] = None
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the stage completed without an error."""
+        return self.error is None
+
+
+@dataclass
+class AnalysisContext:
+    """Per-request record of an analysis: its inputs and every stage output.
+
+    A scheduler given a context stores each successful stage output on it and
+    reuses outputs that are already present instead of running the stage again,
+    so a result such as the reasoning pass is computed at most once per request.
+    """
+    text: str
+    tone: str = "balanced"
+    analysis_type: str = "general"
+    fused: bool = False
+    outputs: Dict[str, Any] = field(default_factory=dict)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Return the output of a stage, or the default if it has not run."""
+        return self.outputs.get(name, default)
+
+    def has(self, name: str) -> bool:
+        """Whether the output of a stage is already available."""
+        return name in self.outputs
+
+
+class StageScheduler:
+    """Runs a set of stages, starting each one as soon as its inputs are ready."""
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        context: Optional[AnalysisContext] = None,
+        on_complete: Optional[Callable[[StageResult], Any]] = None,
+        deadline: Optional[float] = None
+    ):
+        """
+        Initialize the scheduler and validate the stage graph.
+
+        Args:
+            stages: The stages to run
+            context: Optional per-request context that receives stage outputs
+                and supplies outputs computed earlier in the request
+            on_complete: Optional callback invoked with each StageResult the
+                moment that stage finishes; it may be a coroutine function
+            deadline: Optional time in seconds by which the whole run must
+                finish; stages still running then fail with a StageError
+
+        Raises:
+            StageError: If stage names are duplicated, a dependency is unknown,
+                or the dependencies form a cycle
+        """
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise StageError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+
+        for stage in stages:
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise StageError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        self.context = context
+        self.on_complete = on_complete
+        self.deadline = deadline
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        """Return the stage names ordered so that dependencies come first."""
+        order: List[str] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise StageError(f"Dependency cycle detected at stage '{name}'")
+            state[name] = "visiting"
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    async def _run_and_report(self, stage: Stage, tasks: Dict[str, "asyncio.Task"]) -> StageResult:
+        """Run a stage and pass its result to the completion callback."""
+        result = await self._run_stage(stage, tasks)
+        if self.on_complete is not None:
+            notified = self.on_complete(result)
+            if inspect.isawaitable(notified):
+                await notified
+        return result
+
+    async def _run_stage(self, stage: Stage, tasks: Dict[str, "asyncio.Task"]) -> StageResult:
+        """Wait for the stage's dependencies, then run it."""
+        if self.context is not None and self.context.has(stage.name):
+            return StageResult(name=stage.name, value=self.context.get(stage.name))
+
+        inputs: Dict[str, Any] = {}
+        for dep in stage.depends_on:
+            dep_result = await tasks[dep]
+            if not dep_result.ok:
+                return StageResult(
+                    name=stage.name,
+                    error=StageError(f"Dependency '{dep}' failed: {dep_result.error}")
+                )
+            if dep_result.value is None:
+                # The ciaprofile functions report failures by returning None
+                return StageResult(
+                    name=stage.name,
+                    error=StageError(f"Dependency '{dep}' produced no result")
+                )
+            inputs[dep] = dep_result.value
+
+        timeout = stage.timeout
+        remaining = remaining_time()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        
+        start = time.perf_counter()
+        try:
+            if timeout is not None and timeout <= 0:
+                raise StageError(f"Stage '{stage.name}' not started: deadline exceeded")
+            try:
+                value = await asyncio.wait_for(self._call(stage, inputs, timeout), timeout)
+            except asyncio.TimeoutError:
+                raise StageError(f"Stage '{stage.name}' timed out after {timeout:.1f}s")
+            if self.context is not None and value is not None:
+                self.context.outputs[stage.name] = value
+            return StageResult(name=stage.name, value=value, duration=time.perf_counter() - start)
+        except Exception as e:
+            return StageResult(name=stage.name, error=e, duration=time.perf_counter() - start)
+
+    async def _call(self, stage: Stage, inputs: Dict[str, Any], timeout: Optional[float]) -> Any:
+        """Call the stage function, giving the model calls it makes the stage's time limit."""
+        with deadline(timeout):
+            if asyncio.iscoroutinefunction(stage.func):
+                return await stage.func(**inputs)
+            loop = asyncio.get_running_loop()
+            # Executor threads do not inherit context variables such as the deadline
+            call = functools.partial(contextvars.copy_context().run, stage.func, **inputs)
+            value = await loop.run_in_executor(None, call)
+            if inspect.isawaitable(value):
+                value = await value
+            return value
+
+    async def run(self) -> Dict[str, StageResult]:
+        """
+        Run all stages.
+
+        Returns:
+            A mapping of stage name to its result. Failures are recorded on the
+            result rather than raised, and stages whose dependencies failed or
+            returned None are skipped with a StageError.
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        # Tasks copy the current context, so each stage sees the run's deadline
+        with deadline(self.deadline):
+            for name in self.order:
+                tasks[name] = asyncio.ensure_future(self._run_and_report(self.stages[name], tasks))
+        results = await asyncio.gather(*tasks.values())
+        return {result.name: result for result in results}
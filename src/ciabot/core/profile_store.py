@@ -0,0 +1,378 @@
+"""
+Profile Store Module
+
+This module keeps the results of profiling runs in a local repository: a
+SQLite catalog of runs, indexed by subject, content hash, tone, model and
+time, and the run artifacts (profile, reports, metrics...) stored as
+compressed, content-addressed blobs in the same database. An artifact that is
+identical across runs, like the analyzed text of a re-run, is stored once.
+
+Lookups by subject, content hash or model and listings in time order are index
+scans, so they stay fast as the archive grows. Many runs can be written in one
+transaction with ProfileStore.batch().
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from src.utils.paths import get_output_path
+
+JSON = "application/json"
+TEXT = "text/plain"
+
+
+def content_hash(data: Union[str, bytes]) -> str:
+    """Return the hex SHA-256 digest that addresses a text or blob."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize Pydantic models inside artifacts."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return str(value)
+
+
+def encode_artifact(value: Any) -> Tuple[bytes, str]:
+    """Encode an artifact value as bytes and a media type: text as is, anything else as JSON."""
+    if isinstance(value, str):
+        return value.encode("utf-8"), TEXT
+    if hasattr(value, "model_dump"):
+        value = value.model_dump()
+    return json.dumps(value, sort_keys=True, default=_json_default).encode("utf-8"), JSON
+
+
+def decode_artifact(data: bytes, media_type: str) -> Any:
+    """Decode an artifact stored by encode_artifact."""
+    text = data.decode("utf-8")
+    return json.loads(text) if media_type == JSON else text
+
+
+@dataclass
+class ProfileRun:
+    """Catalog entry of one profiling run."""
+    id: str
+    subject: str
+    content_hash: str
+    tone: str
+    analysis_type: str
+    model: Optional[str]
+    created_at: float
+    artifacts: Dict[str, str] = field(default_factory=dict)  # Artifact name -> blob hash
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the entry to a dictionary."""
+        return {
+            "id": self.id,
+            "subject": self.subject,
+            "content_hash": self.content_hash,
+            "tone": self.tone,
+            "analysis_type": self.analysis_type,
+            "model": self.model,
+            "created_at": self.created_at,
+            "artifacts": sorted(self.artifacts),
+        }
+
+
+class ProfileStore:
+    """SQLite-backed catalog of profiling runs with compressed, content-addressed artifacts."""
+
+    _COLUMNS = "id, subject, content_hash, tone, analysis_type, model, created_at"
+
+    def __init__(self, path: Union[str, Path], compression_level: int = 6):
+        """
+        Initialize the store.
+
+        Args:
+            path: Location of the SQLite database (":memory:" for a transient store)
+            compression_level: zlib level used for artifacts
+        """
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.compression_level = compression_level
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS runs (
+                id TEXT PRIMARY KEY,
+                subject TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                tone TEXT NOT NULL,
+                analysis_type TEXT NOT NULL,
+                model TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_subject ON runs (subject, created_at);
+            CREATE INDEX IF NOT EXISTS idx_runs_content ON runs (content_hash, tone, created_at);
+            CREATE INDEX IF NOT EXISTS idx_runs_model ON runs (model, created_at);
+            CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at);
+            CREATE TABLE IF NOT EXISTS artifacts (
+                run_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                blob_hash TEXT NOT NULL,
+                PRIMARY KEY (run_id, name)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                media_type TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                data BLOB NOT NULL
+            );"""
+        )
+        self._conn.commit()
+
+    def _put_blob(self, value: Any) -> str:
+        """Store an artifact value unless an identical one is stored, and return its hash."""
+        data, media_type = encode_artifact(value)
+        digest = content_hash(data)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO blobs (hash, media_type, size, data) VALUES (?, ?, ?, ?)",
+            (digest, media_type, len(data), zlib.compress(data, self.compression_level))
+        )
+        return digest
+
+    def _insert_run(
+        self,
+        subject: str,
+        content: str,
+        artifacts: Dict[str, Any],
+        tone: str,
+        analysis_type: str,
+        model: Optional[str],
+        created_at: Optional[float]
+    ) -> ProfileRun:
+        run = ProfileRun(
+            id=uuid.uuid4().hex,
+            subject=subject,
+            content_hash=self._put_blob(content),
+            tone=tone,
+            analysis_type=analysis_type,
+            model=model,
+            created_at=created_at if created_at is not None else time.time(),
+        )
+        self._conn.execute(
+            f"INSERT INTO runs ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (run.id, run.subject, run.content_hash, run.tone, run.analysis_type, run.model, run.created_at)
+        )
+        for name, value in artifacts.items():
+            if value is None:
+                continue
+            run.artifacts[name] = self._put_blob(value)
+        self._conn.executemany(
+            "INSERT INTO artifacts (run_id, name, blob_hash) VALUES (?, ?, ?)",
+            [(run.id, name, digest) for name, digest in run.artifacts.items()]
+        )
+        return run
+
+    def save_run(
+        self,
+        subject: str,
+        content: str,
+        artifacts: Dict[str, Any],
+        tone: str = "balanced",
+        analysis_type: str = "general",
+        model: Optional[str] = None,
+        created_at: Optional[float] = None
+    ) -> ProfileRun:
+        """
+        Store a profiling run and its artifacts in one transaction.
+
+        Args:
+            subject: Who or what the analyzed text is from
+            content: The analyzed text, stored as the "content" artifact
+            artifacts: Artifact name -> value; strings are stored as text,
+                anything else (including Pydantic models) as JSON; None values are skipped
+            tone: Tone of the analysis
+            analysis_type: Type of analysis
+            model: Model that produced the run
+            created_at: Time of the run (defaults to now)
+
+        Returns:
+            The catalog entry of the run
+        """
+        with self.batch() as batch:
+            return batch.save_run(subject, content, artifacts, tone, analysis_type, model, created_at)
+
+    @contextmanager
+    def batch(self) -> Iterator["_BatchWriter"]:
+        """
+        Write several runs in one transaction, committed when the block exits.
+
+        Yields:
+            A writer; call save_run on it for each run
+        """
+        with self._lock:
+            if self._conn.in_transaction:
+                # Already inside a batch: the outer one commits
+                yield _BatchWriter(self)
+                return
+            try:
+                yield _BatchWriter(self)
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def _row_to_run(self, row: tuple) -> ProfileRun:
+        run = ProfileRun(*row)
+        run.artifacts = dict(self._conn.execute(
+            "SELECT name, blob_hash FROM artifacts WHERE run_id = ?", (run.id,)
+        ).fetchall())
+        return run
+
+    def get(self, run_id: str) -> Optional[ProfileRun]:
+        """Return the run with the given id, or None."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {self._COLUMNS} FROM runs WHERE id = ?", (run_id,)).fetchone()
+            return self._row_to_run(row) if row is not None else None
+
+    def list_runs(
+        self,
+        subject: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        tone: Optional[str] = None,
+        model: Optional[str] = None,
+        before: Optional[float] = None,
+        artifact: Optional[str] = None,
+        limit: int = 100
+    ) -> List[ProfileRun]:
+        """
+        List runs, newest first.
+
+        Filters are combined; page through a long listing by passing the
+        created_at of the last run of a page as `before`.
+
+        Args:
+            subject: Only runs of this subject
+            content_hash: Only runs of this text (see content_hash())
+            tone: Only runs with this tone
+            model: Only runs by this model
+            before: Only runs created before this time
+            artifact: Only runs that stored an artifact of this name
+            limit: Maximum number of runs returned
+
+        Returns:
+            The matching runs
+        """
+        conditions, params = [], []
+        for column, value in (("subject", subject), ("content_hash", content_hash), ("tone", tone), ("model", model)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if before is not None:
+            conditions.append("created_at < ?")
+            params.append(before)
+        if artifact is not None:
+            conditions.append("EXISTS (SELECT 1 FROM artifacts WHERE artifacts.run_id = runs.id AND artifacts.name = ?)")
+            params.append(artifact)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM runs {where} ORDER BY created_at DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+            return [self._row_to_run(row) for row in rows]
+
+    def latest(self, subject: str, tone: Optional[str] = None, artifact: Optional[str] = None) -> Optional[ProfileRun]:
+        """Return the most recent run of a subject, optionally one that stored the named artifact, or None."""
+        runs = self.list_runs(subject=subject, tone=tone, artifact=artifact, limit=1)
+        return runs[0] if runs else None
+
+    def find(self, content: str, tone: Optional[str] = None) -> List[ProfileRun]:
+        """Return the runs that analyzed exactly this text, newest first."""
+        return self.list_runs(content_hash=content_hash(content), tone=tone)
+
+    def load_blob(self, digest: str) -> Any:
+        """Return the decoded artifact stored under a hash."""
+        with self._lock:
+            row = self._conn.execute("SELECT media_type, data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(f"No artifact stored under {digest}")
+        return decode_artifact(zlib.decompress(row[1]), row[0])
+
+    def load_artifact(self, run: Union[str, ProfileRun], name: str) -> Any:
+        """
+        Return one artifact of a run.
+
+        Raises:
+            KeyError: If the run or the artifact does not exist
+        """
+        if isinstance(run, str):
+            run_id = run
+            run = self.get(run_id)
+            if run is None:
+                raise KeyError(f"Run not found: {run_id}")
+        if name == "content":
+            return self.load_blob(run.content_hash)
+        if name not in run.artifacts:
+            raise KeyError(f"Run {run.id} has no artifact '{name}'")
+        return self.load_blob(run.artifacts[name])
+
+    def load_artifacts(self, run: Union[str, ProfileRun]) -> Dict[str, Any]:
+        """Return every artifact of a run, by name (without the analyzed text)."""
+        if isinstance(run, str):
+            run = self.get(run)
+            if run is None:
+                return {}
+        return {name: self.load_blob(digest) for name, digest in run.artifacts.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Report the number of runs and subjects and the stored artifact sizes."""
+        with self._lock:
+            runs, subjects = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT subject) FROM runs").fetchone()
+            blobs, size, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+            ).fetchone()
+        return {"runs": runs, "subjects": subjects, "blobs": blobs, "bytes": size, "stored_bytes": stored}
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class _BatchWriter:
+    """Writes runs inside an open ProfileStore.batch() transaction."""
+
+    def __init__(self, store: ProfileStore):
+        self._store = store
+
+    def save_run(
+        self,
+        subject: str,
+        content: str,
+        artifacts: Dict[str, Any],
+        tone: str = "balanced",
+        analysis_type: str = "general",
+        model: Optional[str] = None,
+        created_at: Optional[float] = None
+    ) -> ProfileRun:
+        """Store a run as part of the batch; see ProfileStore.save_run."""
+        return self._store._insert_run(subject, content, artifacts, tone, analysis_type, model, created_at)
+
+
+def open_profile_store(path: Optional[Union[str, Path]] = None) -> ProfileStore:
+    """
+    Open the profile store.
+
+    Uses CIABOT_PROFILE_STORE for the database location (default output/profiles.sqlite).
+
+    Args:
+        path: Database location overriding CIABOT_PROFILE_STORE
+    """
+    if path is None:
+        path = os.getenv("CIABOT_PROFILE_STORE") or get_output_path("profiles.sqlite")
+    return ProfileStore(path)
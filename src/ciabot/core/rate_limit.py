@@ -0,0 +1,411 @@
+"""
+Model Call Limits Module
+
+This module bounds how many model calls are in flight at once across the whole
+process. Every analysis, whether from a single API request, a batch request or
+the batch CLI, goes through the same limiter, so running many documents at a
+time queues their calls instead of overwhelming the API.
+
+It also budgets calls against the account's rate limits with token buckets for
+requests per minute and tokens per minute. Each call reserves its estimated
+token cost before it is sent and waits if the budget is short, the reservation
+is corrected with the actual usage afterwards (or given back if the call fails),
+and the buckets are kept in line
+with the x-ratelimit-* headers returned by the API. Sustained load then queues
+just under the limit instead of turning into 429 errors.
+"""
+
+import asyncio
+import math
+import os
+import re
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Mapping, Optional, Tuple
+
+
+class ConcurrencyLimiter:
+    """A bound on concurrent model calls shared by sync and async callers."""
+
+    def __init__(self, max_concurrent: int):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_concurrent: Maximum calls in flight per event loop, and
+                separately across synchronous threads
+        """
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self._thread_semaphore = threading.BoundedSemaphore(max_concurrent)
+        # asyncio semaphores belong to one event loop, so keep one per loop
+        self._loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def _loop_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._loop_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_concurrent)
+                self._loop_semaphores[loop] = semaphore
+            return semaphore
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self.in_flight += delta
+
+    @contextmanager
+    def limit(self) -> Iterator[None]:
+        """Hold a call slot for the duration of a synchronous call."""
+        with self._thread_semaphore:
+            self._track(1)
+            try:
+                yield
+            finally:
+                self._track(-1)
+
+    @asynccontextmanager
+    async def alimit(self) -> AsyncIterator[None]:
+        """Hold a call slot for the duration of an async call."""
+        async with self._loop_semaphore():
+            self._track(1)
+            try:
+                yield
+            finally:
+                self._track(-1)
+
+
+_call_limiter: Optional[ConcurrencyLimiter] = None
+
+
+def configure_call_limiter(max_concurrent: int) -> ConcurrencyLimiter:
+    """
+    Replace the process-wide model call limiter.
+
+    Args:
+        max_concurrent: Maximum model calls in flight at once
+
+    Returns:
+        The new limiter
+    """
+    global _call_limiter
+    _call_limiter = ConcurrencyLimiter(max_concurrent)
+    return _call_limiter
+
+
+def get_call_limiter() -> ConcurrencyLimiter:
+    """
+    Return the process-wide model call limiter.
+
+    On first use the bound is read from OPENAI_MAX_CONCURRENCY (default 16).
+    """
+    if _call_limiter is None:
+        configure_call_limiter(int(os.getenv("OPENAI_MAX_CONCURRENCY", "16")))
+    return _call_limiter
+
+
+# Completion tokens assumed for a request that does not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1024
+
+# Rough characters per token for English text
+CHARS_PER_TOKEN = 4
+
+# Per-message overhead of the chat format, in tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """
+    Estimate the tokens a chat completion request will count against the TPM limit.
+
+    Args:
+        request: The keyword arguments passed to chat.completions.create
+
+    Returns:
+        The estimated prompt tokens plus the completion allowance
+    """
+    prompt_tokens = 0
+    for message in request.get("messages", []):
+        content = message.get("content") or ""
+        prompt_tokens += len(str(content)) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+    completion_tokens = request.get("max_tokens") or request.get("max_completion_tokens") or DEFAULT_COMPLETION_TOKENS
+    return prompt_tokens + completion_tokens
+
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: str) -> Optional[float]:
+    """Parse a rate-limit reset duration such as "1s", "6m0s" or "20ms" into seconds, or None."""
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        return seconds if math.isfinite(seconds) and seconds >= 0 else None
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously to its capacity once per period.
+
+    Reservations are taken immediately and may drive the level negative; the
+    caller then waits until the debt has been refilled. Callers are therefore
+    served in the order they reserved, and a large request cannot be starved by
+    a stream of small ones.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = float(capacity)
+        self.period = period
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        """Refill rate in units per second."""
+        return self.capacity / self.period
+
+    def refill(self, now: float) -> None:
+        """Add what has been refilled since the last update."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Take an amount from the bucket.
+
+        Returns:
+            Seconds until the reservation is covered (0 if it already is)
+        """
+        self.refill(now)
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float, now: float) -> None:
+        """Return (or, if negative, further take) an amount after the fact."""
+        self.refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+    def clamp(self, remaining: float, now: float) -> None:
+        """Lower the level to a remaining budget reported by the server."""
+        self.refill(now)
+        self.level = min(self.level, remaining)
+
+    def drain(self, seconds: float, now: float) -> None:
+        """Empty the bucket so nothing is available for the given time."""
+        self.refill(now)
+        self.level = min(self.level, -seconds * self.rate)
+
+    def resize(self, capacity: float, now: float) -> None:
+        """Change the capacity, keeping the current level within it."""
+        self.refill(now)
+        self.capacity = float(capacity)
+        self.level = min(self.level, self.capacity)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets shared by all model calls."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        learn_from_headers: bool = True
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: RPM budget, or None to leave requests unlimited
+                until a limit is learned from response headers
+            tokens_per_minute: TPM budget, or None likewise
+            learn_from_headers: Whether to adopt the limits reported in
+                x-ratelimit-limit-* headers for budgets that were not configured
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.learn_from_headers = learn_from_headers
+        self._configured = {"requests": bool(requests_per_minute), "tokens": bool(tokens_per_minute)}
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserve one request and an estimated number of tokens.
+
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        return self._reserve(tokens)[0]
+
+    def _reserve(self, tokens: int) -> Tuple[float, float]:
+        """Reserve budget for a call; return the wait and the tokens taken from the budget."""
+        now = time.monotonic()
+        wait = 0.0
+        taken = 0.0
+        with self._lock:
+            if self.requests is not None:
+                wait = max(wait, self.requests.reserve(1, now))
+            if self.tokens is not None:
+                # A call larger than the whole budget only waits for a full bucket
+                taken = min(tokens, self.tokens.capacity)
+                wait = max(wait, self.tokens.reserve(taken, now))
+            if wait > 0:
+                self.waits += 1
+                self.wait_seconds += wait
+        return wait, taken
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Reserve budget for a call, blocking the thread until it is available.
+
+        Returns:
+            The tokens reserved, to pass to record_usage or release
+        """
+        wait, taken = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return taken
+
+    async def aacquire(self, tokens: int) -> float:
+        """Async variant of acquire, waiting without blocking the event loop."""
+        wait, taken = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return taken
+
+    def record_usage(self, estimated: float, actual: Optional[int]) -> None:
+        """Correct a reservation (the tokens acquire returned) with the tokens the call actually used."""
+        if actual is None or self.tokens is None:
+            return
+        with self._lock:
+            self.tokens.refund(estimated - actual, time.monotonic())
+
+    def release(self, reserved: float) -> None:
+        """Give back the tokens reserved for a call that failed, so its retry is not charged twice."""
+        if self.tokens is None or not reserved:
+            return
+        with self._lock:
+            self.tokens.refund(reserved, time.monotonic())
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all calls for the given time, e.g. after a 429 response."""
+        now = time.monotonic()
+        with self._lock:
+            for bucket in (self.requests, self.tokens):
+                if bucket is not None:
+                    bucket.drain(seconds, now)
+
+    def observe_headers(self, headers: Mapping[str, str], status_code: int = 200) -> None:
+        """
+        Bring the budgets in line with the rate-limit headers of a response.
+
+        Headers that cannot be parsed are ignored, so a malformed header
+        never fails the response it came with.
+
+        Args:
+            headers: Response headers
+            status_code: Response status; a 429 pauses calls for its Retry-After
+        """
+        now = time.monotonic()
+        with self._lock:
+            for kind in ("requests", "tokens"):
+                limit = _header_number(headers, f"x-ratelimit-limit-{kind}")
+                remaining = _header_number(headers, f"x-ratelimit-remaining-{kind}")
+                bucket = getattr(self, kind)
+                if limit and not self._configured[kind] and self.learn_from_headers:
+                    if bucket is None:
+                        bucket = TokenBucket(limit)
+                        setattr(self, kind, bucket)
+                    elif bucket.capacity != limit:
+                        bucket.resize(limit, now)
+                if bucket is not None and remaining is not None:
+                    bucket.clamp(remaining, now)
+        if status_code == 429:
+            seconds = _header_number(headers, "retry-after-ms")
+            if seconds is not None:
+                seconds /= 1000
+            else:
+                seconds = parse_reset_duration(headers.get("retry-after", "") or "")
+            if seconds is None:
+                seconds = parse_reset_duration(headers.get("x-ratelimit-reset-requests", "") or "")
+            self.pause(seconds if seconds is not None else 1.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Report the budgets and how often calls had to wait."""
+        with self._lock:
+            now = time.monotonic()
+            budgets = {}
+            for kind in ("requests", "tokens"):
+                bucket = getattr(self, kind)
+                if bucket is not None:
+                    bucket.refill(now)
+                    budgets[kind] = {"per_minute": bucket.capacity, "available": round(bucket.level, 1)}
+            return {"budgets": budgets, "waits": self.waits, "wait_seconds": round(self.wait_seconds, 3)}
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    """Return a header as a finite, non-negative number, or None if it is missing or malformed."""
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) and number >= 0 else None
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def configure_rate_limiter(
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+    learn_from_headers: bool = True
+) -> RateLimiter:
+    """
+    Replace the process-wide rate limiter.
+
+    Args:
+        requests_per_minute: RPM budget (None to learn it from response headers)
+        tokens_per_minute: TPM budget (None to learn it from response headers)
+        learn_from_headers: Whether unset budgets are learned from response headers
+
+    Returns:
+        The new limiter
+    """
+    global _rate_limiter
+    _rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute, learn_from_headers)
+    return _rate_limiter
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Return the process-wide rate limiter.
+
+    On first use the budgets are read from OPENAI_RPM and OPENAI_TPM; budgets
+    that are not set are learned from the API's rate-limit headers.
+    """
+    if _rate_limiter is None:
+        rpm = os.getenv("OPENAI_RPM")
+        tpm = os.getenv("OPENAI_TPM")
+        configure_rate_limiter(int(rpm) if rpm else None, int(tpm) if tpm else None)
+    return _rate_limiter
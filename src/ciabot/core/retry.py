@@ -0,0 +1,217 @@
+"""
+Model Call Retry Module
+
+This module retries transient model call failures (connection errors, timeouts,
+rate limiting and server errors) with capped, fully jittered exponential
+backoff, honoring the Retry-After the API asks for. Retries happen around each
+individual call, so a transient error costs one repeated call rather than a
+re-run of the whole analysis.
+
+A deadline can be set for everything done in the current context (an analysis
+request, say). Retries stop, and calls are given a timeout, so the work
+finishes or fails by then.
+"""
+
+import asyncio
+import contextvars
+import os
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterator, Optional, TypeVar
+
+import openai
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: request timeout, conflict, rate limited, server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the current deadline leaves no time for another attempt."""
+
+
+@dataclass
+class RetryPolicy:
+    """How many times, and how patiently, to retry a failed model call."""
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Return a fully jittered delay before the given retry.
+
+        Args:
+            attempt: Number of attempts made so far (1 after the first failure)
+
+        Returns:
+            A random delay between 0 and the capped exponential backoff
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error from a model call is transient."""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Return the delay the API asked for in an error response, in seconds."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+# Monotonic time by which the current request must finish, if any
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Set a deadline for the calls made in this context.
+
+    An existing, earlier deadline is kept. Tasks and executor jobs started
+    from the context inherit it when they copy the context.
+
+    Args:
+        seconds: Time from now by which the calls must finish (None for no deadline)
+    """
+    if seconds is None:
+        yield
+        return
+    expires = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none."""
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    return expires - time.monotonic()
+
+
+def _next_delay(policy: RetryPolicy, attempt: int, error: BaseException) -> Optional[float]:
+    """Return the delay before the next attempt, or None if the error should be raised."""
+    if attempt >= policy.max_attempts or not is_retryable(error):
+        return None
+    delay = max(policy.backoff(attempt), retry_after(error) or 0.0)
+    remaining = remaining_time()
+    if remaining is not None and delay >= remaining:
+        return None
+    return delay
+
+
+def _check_deadline() -> None:
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Deadline exceeded before the model call could be made")
+
+
+def call_with_retry(func: Callable[[], T], policy: Optional[RetryPolicy] = None) -> T:
+    """
+    Call a function, retrying transient model call errors.
+
+    Args:
+        func: The call to make
+        policy: Retry policy (defaults to the process-wide policy)
+
+    Returns:
+        The result of the first successful attempt
+
+    Raises:
+        The last error if it is not transient, attempts run out, or the
+        deadline would pass before the next attempt
+    """
+    policy = policy or get_retry_policy()
+    attempt = 0
+    while True:
+        _check_deadline()
+        attempt += 1
+        try:
+            return func()
+        except Exception as e:
+            delay = _next_delay(policy, attempt, e)
+            if delay is None:
+                raise
+            print(f"Retrying model call after error (attempt {attempt}): {str(e)}")
+            time.sleep(delay)
+
+
+async def acall_with_retry(func: Callable[[], Awaitable[T]], policy: Optional[RetryPolicy] = None) -> T:
+    """Async counterpart of call_with_retry; func returns a fresh awaitable per attempt."""
+    policy = policy or get_retry_policy()
+    attempt = 0
+    while True:
+        _check_deadline()
+        attempt += 1
+        try:
+            return await func()
+        except Exception as e:
+            delay = _next_delay(policy, attempt, e)
+            if delay is None:
+                raise
+            print(f"Retrying model call after error (attempt {attempt}): {str(e)}")
+            await asyncio.sleep(delay)
+
+
+_retry_policy: Optional[RetryPolicy] = None
+
+
+def configure_retry_policy(
+    max_attempts: int = 4,
+    base_delay: float = 0.5,
+    max_delay: float = 30.0
+) -> RetryPolicy:
+    """
+    Replace the process-wide retry policy.
+
+    Args:
+        max_attempts: Attempts per call, including the first (1 disables retries)
+        base_delay: Backoff cap before the first retry, doubled for each retry after
+        max_delay: Upper bound on the backoff
+
+    Returns:
+        The new policy
+    """
+    global _retry_policy
+    _retry_policy = RetryPolicy(max_attempts=max_attempts, base_delay=base_delay, max_delay=max_delay)
+    return _retry_policy
+
+
+def get_retry_policy() -> RetryPolicy:
+    """
+    Return the process-wide retry policy.
+
+    On first use it is read from OPENAI_MAX_ATTEMPTS (default 4),
+    OPENAI_RETRY_BASE_DELAY (default 0.5s) and OPENAI_RETRY_MAX_DELAY (default 30s).
+    """
+    if _retry_policy is None:
+        configure_retry_policy(
+            max_attempts=int(os.getenv("OPENAI_MAX_ATTEMPTS", "4")),
+            base_delay=float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("OPENAI_RETRY_MAX_DELAY", "30"))
+        )
+    return _retry_policy
@@ -0,0 +1,142 @@
+"""
+Structured Output Schemas Module
+
+This module turns the Pydantic output models into strict JSON schemas for the
+API's structured outputs, so the model's reply is constrained to the model's
+fields and types instead of a schema spelled out in the prompt.
+
+Strict mode requires every property to be listed as required (optional fields
+become nullable), forbids additional properties and does not accept keywords
+such as defaults or numeric bounds; bounds are moved into the field
+description so the model still sees them. Schemas are built once per model
+and reused by every request.
+"""
+
+import copy
+import functools
+from typing import Any, Dict, Optional, Tuple, Type
+from pydantic import BaseModel
+
+# Keywords strict mode rejects; numeric bounds are described in words instead
+_UNSUPPORTED_KEYWORDS = ("default", "title", "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")
+
+# Keywords whose value maps names to schemas; the names are kept whatever they are
+_SCHEMA_MAPPINGS = ("properties", "$defs")
+
+
+def _bounds_description(node: Dict[str, Any]) -> Optional[str]:
+    """Describe the numeric bounds of a schema node, if it has any."""
+    low = node.get("minimum", node.get("exclusiveMinimum"))
+    high = node.get("maximum", node.get("exclusiveMaximum"))
+    if low is not None and high is not None:
+        return f"Number between {low:g} and {high:g}."
+    if low is not None:
+        return f"Number of at least {low:g}."
+    if high is not None:
+        return f"Number of at most {high:g}."
+    return None
+
+
+def _make_strict(node: Any) -> Any:
+    """Rewrite a JSON schema node, and everything below it, for strict mode."""
+    if isinstance(node, list):
+        return [_make_strict(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+    bounds = _bounds_description(node)
+    node = {
+        key: {name: _make_strict(schema) for name, schema in value.items()}
+        if key in _SCHEMA_MAPPINGS and isinstance(value, dict) else _make_strict(value)
+        for key, value in node.items()
+        if key not in _UNSUPPORTED_KEYWORDS
+    }
+    if bounds:
+        node["description"] = f"{node['description']} {bounds}" if node.get("description") else bounds
+    if node.get("type") == "object" and "properties" in node:
+        node["required"] = list(node["properties"])
+        node["additionalProperties"] = False
+    return node
+
+
+def strict_json_schema(
+    model: Type[BaseModel],
+    exclude: Tuple[str, ...] = (),
+    extra: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Build a strict JSON schema for a Pydantic model.
+
+    Args:
+        model: The model the response must match
+        exclude: Top-level fields left out of the schema, e.g. ones computed locally
+        extra: Additional top-level properties, as name -> JSON schema
+
+    Returns:
+        The schema, with shared sub-models under $defs
+    """
+    schema = copy.deepcopy(model.model_json_schema())
+    for name in exclude:
+        schema["properties"].pop(name, None)
+    schema["properties"].update(extra or {})
+    schema = _make_strict(schema)
+    # Drop definitions only the excluded fields used
+    defs = schema.get("$defs")
+    if defs:
+        used = _referenced_defs(schema, defs)
+        schema["$defs"] = {name: definition for name, definition in defs.items() if name in used}
+        if not schema["$defs"]:
+            del schema["$defs"]
+    return schema
+
+
+def _referenced_defs(schema: Dict[str, Any], defs: Dict[str, Any]) -> set:
+    """Return the names of the definitions reachable from the schema's properties."""
+    used: set = set()
+    pending = [schema["properties"]]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/$defs/"):
+                name = ref[len("#/$defs/"):]
+                if name not in used:
+                    used.add(name)
+                    pending.append(defs[name])
+            pending.extend(value for key, value in node.items() if key != "$ref")
+        elif isinstance(node, list):
+            pending.extend(node)
+    return used
+
+
+@functools.lru_cache(maxsize=None)
+def json_schema_format(
+    model: Type[BaseModel],
+    name: str,
+    exclude: Tuple[str, ...] = (),
+    extra: Tuple[Tuple[str, str], ...] = ()
+) -> Dict[str, Any]:
+    """
+    Return the structured-output response_format for a model, built once.
+
+    Args:
+        model: The model the response must match
+        name: Name of the schema sent to the API
+        exclude: Top-level fields left out of the schema
+        extra: Additional top-level properties as (name, JSON schema type) pairs,
+            where the type is "string" or "string[]"
+
+    Returns:
+        The response_format value for a chat completion request
+    """
+    properties = {
+        field: {"type": "array", "items": {"type": "string"}} if kind == "string[]" else {"type": kind}
+        for field, kind in extra
+    }
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": strict_json_schema(model, exclude, properties),
+        },
+    }
@@ -6,13 +6,20 @@ It provides a clean interface for processing text from various sources (files, A
 and preparing it for analysis.
 """
 
-from typing import Optional, Union, Dict, Any
+from typing import Optional, Union, Dict, Any, Iterator
 from pydantic import BaseModel, Field
 import json
 import os
 import datetime
 from pathlib import Path
 from src.utils.paths import get_project_root, get_output_path
+from src.ciabot.core.tokens import iter_chunks, split_sentences
+
+# Characters decoded per read when a file is streamed
+STREAM_CHUNK_SIZE = int(os.getenv("CIABOT_STREAM_CHUNK_SIZE", str(1 << 20)))
+
+# Longest sentence a stream holds back waiting for its end; longer runs are cut at whitespace
+MAX_SENTENCE_LENGTH = int(os.getenv("CIABOT_MAX_SENTENCE_LENGTH", "65536"))
 
 class TextInput(BaseModel):
     """Model for text input with metadata."""
@@ -21,6 +28,96 @@ class TextInput(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata about the text")
     format: str = Field(default="plain", description="Format of the text (e.g., 'plain', 'markdown', 'html')")
 
+class TextStream:
+    """
+    The text of a file, read and decoded in segments.
+    
+    Iterating yields the text with leading and trailing whitespace stripped,
+    as process_text would, but without holding the whole file in memory:
+    each segment is at most one read plus any whitespace held back from the
+    previous read. The metadata's "length" counts the characters yielded
+    so far and is final once the stream is exhausted.
+    """
+    
+    def __init__(
+        self,
+        file_path: Union[str, Path],
+        source: str = "file",
+        format: str = "plain",
+        metadata: Optional[Dict[str, Any]] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        max_sentence_length: int = MAX_SENTENCE_LENGTH
+    ):
+        self.path = Path(file_path)
+        self.source = source
+        self.format = format
+        self.chunk_size = chunk_size
+        self.max_sentence_length = max_sentence_length
+        self.metadata = dict(metadata or {})
+        self.metadata["length"] = 0
+    
+    def __iter__(self) -> Iterator[str]:
+        self.metadata["length"] = 0
+        started = False
+        held = ""  # Trailing whitespace, yielded only if more text follows
+        with open(self.path, 'r', encoding='utf-8') as f:
+            while True:
+                segment = f.read(self.chunk_size)
+                if not segment:
+                    break
+                if not started:
+                    segment = segment.lstrip()
+                    if not segment:
+                        continue
+                    started = True
+                body = segment.rstrip()
+                if not body:
+                    held += segment
+                    continue
+                text = held + body if held else body
+                held = segment[len(body):]
+                self.metadata["length"] += len(text)
+                yield text
+        self.metadata["processed_timestamp"] = datetime.datetime.now().isoformat()
+    
+    def sentences(self) -> Iterator[str]:
+        """
+        Yield the text sentence by sentence, as split_sentences would split the whole text.
+        
+        A run of text with no sentence boundary is not held back past
+        max_sentence_length characters: it is yielded in pieces cut after
+        the last whitespace within the limit, or at the limit if there is none.
+        Joining the sentences still gives back the text.
+        """
+        carry = ""
+        for segment in self:
+            sentences = split_sentences(carry + segment)
+            # The last sentence may continue in the next segment
+            carry = sentences.pop()
+            yield from sentences
+            while len(carry) > self.max_sentence_length:
+                cut = _whitespace_cut(carry, self.max_sentence_length)
+                yield carry[:cut]
+                carry = carry[cut:]
+        if carry:
+            yield carry
+    
+    def chunks(self, max_tokens: int, model: str = "gpt-4o") -> Iterator[str]:
+        """Yield the text in chunks of at most max_tokens that end on sentence boundaries."""
+        return iter_chunks(self.sentences(), max_tokens, model)
+    
+    def read(self) -> TextInput:
+        """Read the whole stream into a TextInput."""
+        content = "".join(self)
+        return TextInput(content=content, source=self.source, metadata=self.metadata, format=self.format)
+
+def _whitespace_cut(text: str, limit: int) -> int:
+    """Index to cut text at: after the last whitespace within limit characters, or at limit."""
+    for index in range(limit - 1, 0, -1):
+        if text[index].isspace():
+            return index + 1
+    return limit
+
 class TextProcessor:
     """Handles text input processing and validation."""
     
@@ -76,10 +173,29 @@ class TextProcessor:
     
     @classmethod
     def from_file(cls, file_path: str, source: str = "file", format: str = "plain") -> TextInput:
-        """Create a TextInput from a file."""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        return cls.process_text(content=content, source=source, format=format)
+        """Create a TextInput from a file, read in segments and stripped as it is read."""
+        return cls.stream_file(file_path, source=source, format=format).read()
+    
+    @staticmethod
+    def stream_file(
+        file_path: str,
+        source: str = "file",
+        format: str = "plain",
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> TextStream:
+        """
+        Open a file as a TextStream, to consume its text without loading it whole.
+        
+        Args:
+            file_path: Path of the file
+            source: Source of the text
+            format: Format of the text
+            chunk_size: Characters decoded per read
+            
+        Returns:
+            The stream; iterate it, or its sentences() or chunks()
+        """
+        return TextStream(file_path, source=source, format=format, chunk_size=chunk_size)
     
     @staticmethod
     def from_json(json_data: Union[str, Dict]) -> TextInput:
@@ -104,14 +220,31 @@ class TextProcessor:
             format=data.get("format", "plain")
         )
 
-def read_text_file(file_path: str) -> str:
-    """Read text from a file with proper path resolution."""
+def resolve_text_path(file_path: str) -> Path:
+    """Resolve a text file path, taking relative paths as relative to the project root."""
     # Convert string path to Path object
     path = Path(file_path)
     
     # If path is not absolute, assume it's relative to project root
     if not path.is_absolute():
         path = get_project_root() / path
+    return path
+
+def iter_text_file(file_path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Read text from a file in segments of at most chunk_size characters.
     
-    with open(path, 'r', encoding='utf-8') as f:
-        return f.read() 
\ No newline at end of file
+    The streaming counterpart of read_text_file: the path is resolved the
+    same way and the text is yielded as read, without stripping.
+    """
+    with open(resolve_text_path(file_path), 'r', encoding='utf-8') as f:
+        while True:
+            segment = f.read(chunk_size)
+            if not segment:
+                return
+            yield segment
+
+def read_text_file(file_path: str) -> str:
+    """Read text from a file with proper path resolution."""
+    return "".join(iter_text_file(file_path))
+ 
\ No newline at end of file
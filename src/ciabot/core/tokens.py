@@ -0,0 +1,169 @@
+"""
+Token Budgeting Module
+
+This module measures text in model tokens and splits long texts into chunks
+that fit a token budget. Chunks end on sentence boundaries wherever possible,
+so each chunk can be analyzed on its own without cutting a sentence in half.
+
+Tokens are counted with tiktoken when it is installed; otherwise they are
+estimated from the character count, which is close enough for budgeting.
+"""
+
+import functools
+import re
+from typing import Iterable, Iterator, List, Optional
+from src.ciabot.core.rate_limit import CHARS_PER_TOKEN
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to estimating from characters
+    tiktoken = None
+
+# Encoding used when tiktoken does not know the model
+DEFAULT_ENCODING = "o200k_base"
+
+# Sentence ends: terminal punctuation (and any closing quotes or brackets) followed by
+# whitespace, or a blank line
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n\s*\n")
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model: str) -> Optional[object]:
+    """Return the tiktoken encoding for a model, or None without tiktoken."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """
+    Count the tokens a text takes up for a model.
+
+    Args:
+        text: The text to measure
+        model: The model whose tokenizer to use
+
+    Returns:
+        The exact token count with tiktoken, otherwise an estimate
+    """
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences, keeping the whitespace that follows each one.
+
+    Joining the result gives back the original text.
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    return sentences
+
+
+def _split_words(sentence: str, max_tokens: int, model: str) -> List[str]:
+    """Split a sentence that is over budget on its own at word boundaries."""
+    pieces: List[str] = []
+    current = ""
+    current_tokens = 0
+    for word in re.findall(r"\S+\s*", sentence):
+        tokens = count_tokens(word, model)
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append(current)
+            current, current_tokens = "", 0
+        current += word
+        current_tokens += tokens
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int, model: str = "gpt-4o") -> List[str]:
+    """
+    Split text into chunks of at most max_tokens, ending on sentence boundaries.
+
+    A single sentence longer than the budget is split between words. The
+    chunks joined together give back the original text.
+
+    Args:
+        text: The text to split
+        max_tokens: Token budget per chunk
+        model: The model whose tokenizer to use
+
+    Returns:
+        The chunks, in order (a single chunk if the text already fits)
+
+    Raises:
+        ValueError: If max_tokens is not positive
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    if count_tokens(text, model) <= max_tokens:
+        return [text]
+    return list(iter_chunks(split_sentences(text), max_tokens, model))
+
+
+def iter_chunks(sentences: Iterable[str], max_tokens: int, model: str = "gpt-4o") -> Iterator[str]:
+    """
+    Pack a stream of sentences into chunks of at most max_tokens, as chunk_text does.
+
+    Each chunk is yielded as soon as it is full, so a long document can be
+    chunked while it is being read.
+
+    Raises:
+        ValueError: If max_tokens is not positive
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    current: List[str] = []
+    current_tokens = 0
+    for sentence in sentences:
+        tokens = count_tokens(sentence, model)
+        if tokens > max_tokens:
+            pieces = _split_words(sentence, max_tokens, model)
+        else:
+            pieces = [sentence]
+        for piece in pieces:
+            piece_tokens = tokens if len(pieces) == 1 else count_tokens(piece, model)
+            if current and current_tokens + piece_tokens > max_tokens:
+                yield "".join(current)
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        yield "".join(current)
+
+
+def fit_to_budget(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """
+    Return the text if it fits the budget, otherwise its leading whole sentences that do.
+
+    A truncated text ends with a note saying how much of it was left out, so
+    the model knows it is reading an excerpt.
+
+    Args:
+        text: The text to fit
+        max_tokens: Token budget for the returned text, including the note
+        model: The model whose tokenizer to use
+
+    Returns:
+        The text or an excerpt of it
+    """
+    total = count_tokens(text, model)
+    if total <= max_tokens:
+        return text
+    note = "\n\n[Excerpt: the remaining {omitted} of {total} tokens are omitted.]"
+    budget = max(1, max_tokens - count_tokens(note.format(omitted=total, total=total), model))
+    excerpt = chunk_text(text, budget, model)[0]
+    omitted = total - count_tokens(excerpt, model)
+    return excerpt.rstrip() + note.format(omitted=omitted, total=total)
@@ -0,0 +1,150 @@
+"""
+Token Usage Module
+
+This module records the token usage reported for each model call, split into
+prompt tokens served from the provider's prompt cache and those that were not.
+Prompts are laid out with their static instructions, schemas and examples first
+and the variable text last, so repeated calls share a cacheable prefix; the
+cached share reported here shows how well that is working.
+"""
+
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, List, Optional
+
+
+@dataclass
+class CallUsage:
+    """Token usage of a single model call."""
+    purpose: str
+    model: str
+    prompt_tokens: int
+    cached_tokens: int
+    completion_tokens: int
+
+    @property
+    def uncached_tokens(self) -> int:
+        """Prompt tokens that were not served from the prompt cache."""
+        return self.prompt_tokens - self.cached_tokens
+
+
+@dataclass
+class UsageTotals:
+    """Accumulated token usage over many calls."""
+    calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    duplicate_tokens: int = 0
+
+    @property
+    def uncached_tokens(self) -> int:
+        """Prompt tokens that were not served from the prompt cache."""
+        return self.prompt_tokens - self.cached_tokens
+
+    @property
+    def cached_ratio(self) -> float:
+        """Fraction of prompt tokens served from the prompt cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def add(self, call: CallUsage) -> None:
+        """Add a call's usage to the totals."""
+        self.calls += 1
+        self.prompt_tokens += call.prompt_tokens
+        self.cached_tokens += call.cached_tokens
+        self.completion_tokens += call.completion_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the totals to a dictionary."""
+        return {
+            **asdict(self),
+            "uncached_tokens": self.uncached_tokens,
+            "cached_ratio": round(self.cached_ratio, 4),
+        }
+
+
+def _int_attr(obj: Any, name: str) -> Optional[int]:
+    value = getattr(obj, name, None)
+    return value if isinstance(value, int) else None
+
+
+class UsageTracker:
+    """Collects the usage of model calls, per call purpose and overall."""
+
+    def __init__(self, history: int = 1000):
+        """
+        Initialize the tracker.
+
+        Args:
+            history: Number of most recent calls kept individually
+        """
+        self.recent: Deque[CallUsage] = deque(maxlen=history)
+        self.totals: Dict[str, UsageTotals] = {}
+        self._lock = threading.Lock()
+
+    def record(self, purpose: str, model: str, usage: Any) -> Optional[CallUsage]:
+        """
+        Record the usage object returned with a completion.
+
+        Args:
+            purpose: What the call was for, e.g. "reasoning"
+            model: The model the call was made to
+            usage: The completion's usage (ignored if it has no token counts)
+
+        Returns:
+            The recorded CallUsage, or None if there was nothing to record
+        """
+        prompt_tokens = _int_attr(usage, "prompt_tokens")
+        if prompt_tokens is None:
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        call = CallUsage(
+            purpose=purpose,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            cached_tokens=_int_attr(details, "cached_tokens") or 0,
+            completion_tokens=_int_attr(usage, "completion_tokens") or 0,
+        )
+        with self._lock:
+            self.recent.append(call)
+            self.totals.setdefault(purpose, UsageTotals()).add(call)
+        return call
+
+    def record_duplication(self, purpose: str, tokens: int) -> None:
+        """Record prompt tokens a request spent on content repeated across its messages."""
+        with self._lock:
+            self.totals.setdefault(purpose, UsageTotals()).duplicate_tokens += tokens
+
+    def report(self) -> Dict[str, Any]:
+        """Return the totals per purpose and overall."""
+        with self._lock:
+            overall = UsageTotals()
+            per_purpose = {purpose: totals.to_dict() for purpose, totals in self.totals.items()}
+            for totals in self.totals.values():
+                overall.calls += totals.calls
+                overall.prompt_tokens += totals.prompt_tokens
+                overall.cached_tokens += totals.cached_tokens
+                overall.completion_tokens += totals.completion_tokens
+                overall.duplicate_tokens += totals.duplicate_tokens
+        return {"overall": overall.to_dict(), "by_purpose": per_purpose}
+
+    def recent_calls(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return the most recent calls, newest last."""
+        with self._lock:
+            calls = list(self.recent)[-limit:]
+        return [{**asdict(call), "uncached_tokens": call.uncached_tokens} for call in calls]
+
+    def reset(self) -> None:
+        """Forget all recorded usage."""
+        with self._lock:
+            self.recent.clear()
+            self.totals.clear()
+
+
+_usage_tracker = UsageTracker()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Return the process-wide usage tracker."""
+    return _usage_tracker
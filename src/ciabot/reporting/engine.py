@@ -0,0 +1,387 @@
+"""
+Report Rendering Engine
+
+This module renders reports from declarative templates. A template is a tree
+of sections, text and lists whose placeholders name fields of the profile
+("{core_profile.writing_style.formality}", "{risk_tolerance:.2f}"). It is
+compiled once per output format into a flat render plan of literal strings
+and field lookups, with the placeholders parsed, field paths resolved to
+getters and HTML escaping applied to the literals ahead of time. Rendering a
+profile then only walks the plan, appending to a string builder that is
+reused across the profiles of a batch.
+
+The same template renders Markdown, HTML and JSON. Placeholders follow
+str.format syntax; "{}" is the current list item and the "!j" conversion
+joins a list with commas. Fields that are missing or None render as empty.
+"""
+
+import html
+import re
+from string import Formatter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+FORMATS = ("markdown", "html", "json")
+
+_BOLD = re.compile(r"\*\*(.+?)\*\*", re.DOTALL)
+_BOLD_OPEN, _BOLD_CLOSE = "\x01", "\x02"
+
+
+def compile_path(path: str) -> Callable[[Any], Any]:
+    """
+    Compile a dotted field path into a getter.
+
+    Each step reads a dictionary key, a list index or an attribute; the getter
+    returns None as soon as a step is missing. An empty path returns the value itself.
+    """
+    keys = [key for key in path.split(".") if key]
+
+    def get(value: Any) -> Any:
+        for key in keys:
+            if value is None:
+                return None
+            if isinstance(value, dict):
+                value = value.get(key)
+            elif isinstance(value, (list, tuple)):
+                index = int(key)
+                value = value[index] if -len(value) <= index < len(value) else None
+            else:
+                value = getattr(value, key, None)
+        return value
+
+    return get
+
+
+class Field:
+    """A placeholder in a render plan."""
+
+    __slots__ = ("get", "spec", "conversion", "escape")
+
+    def __init__(self, path: str, spec: str = "", conversion: Optional[str] = None, escape: bool = False):
+        self.get = compile_path(path)
+        self.spec = spec
+        self.conversion = conversion
+        self.escape = escape
+
+    def run(self, data: Any, out: List[str]) -> None:
+        value = self.get(data)
+        if value is None:
+            return
+        if self.conversion == "j":
+            value = ", ".join(str(item) for item in value)
+        elif self.conversion == "r":
+            value = repr(value)
+        text = format(value, self.spec) if self.spec else str(value)
+        out.append(html.escape(text) if self.escape else text)
+
+
+class Loop:
+    """Renders a sub-plan for each item of a list field, or a fallback plan for an empty list."""
+
+    __slots__ = ("get", "plan", "separator", "empty", "opening", "closing")
+
+    def __init__(self, get: Callable[[Any], Any], plan: List[Any], separator: str, empty: List[Any],
+                 opening: str = "", closing: str = ""):
+        self.get = get
+        self.plan = plan
+        self.separator = separator
+        self.empty = empty
+        self.opening = opening
+        self.closing = closing
+
+    def run(self, data: Any, out: List[str]) -> None:
+        items = self.get(data)
+        if not items:
+            run_plan(self.empty, data, out)
+            return
+        out.append(self.opening)
+        for i, item in enumerate(items):
+            if i:
+                out.append(self.separator)
+            run_plan(self.plan, item, out)
+        out.append(self.closing)
+
+
+def run_plan(plan: List[Any], data: Any, out: List[str]) -> None:
+    """Append the rendering of a plan for one value to a string builder."""
+    for step in plan:
+        if step.__class__ is str:
+            out.append(step)
+        else:
+            step.run(data, out)
+
+
+def _merge(plan: List[Any]) -> List[Any]:
+    """Join adjacent literals of a plan."""
+    merged: List[Any] = []
+    for step in plan:
+        if isinstance(step, str):
+            if not step:
+                continue
+            if merged and isinstance(merged[-1], str):
+                merged[-1] += step
+                continue
+        merged.append(step)
+    return merged
+
+
+def compile_inline(template: str, fmt: str) -> List[Any]:
+    """
+    Compile a line template into a plan for an output format.
+
+    In HTML, literals are escaped, **bold** becomes <strong> and line breaks
+    become <br>; in JSON the bold markers are dropped.
+    """
+    if fmt == "html":
+        template = _BOLD.sub(lambda match: _BOLD_OPEN + match.group(1) + _BOLD_CLOSE, template)
+    elif fmt == "json":
+        template = _BOLD.sub(r"\1", template)
+    plan: List[Any] = []
+    for literal, path, spec, conversion in Formatter().parse(template):
+        if fmt == "html":
+            literal = (html.escape(literal).replace(_BOLD_OPEN, "<strong>")
+                       .replace(_BOLD_CLOSE, "</strong>").replace("\n", "<br>"))
+        plan.append(literal)
+        if path is not None:
+            plan.append(Field(path, spec or "", conversion, escape=fmt == "html"))
+    return _merge(plan)
+
+
+def render_inline(plan: List[Any], data: Any) -> str:
+    """Render a compiled line template to a string."""
+    out: List[str] = []
+    run_plan(plan, data, out)
+    return "".join(out)
+
+
+class Node:
+    """Part of a report template."""
+
+    def plan(self, fmt: str, level: int) -> List[Any]:
+        """Compile the node into a Markdown or HTML plan."""
+        raise NotImplementedError
+
+    def value(self, data: Any) -> Any:
+        """Render the node as a JSON value."""
+        raise NotImplementedError
+
+
+class Text(Node):
+    """
+    A block of text.
+
+    Lines starting with "- " form a bulleted list in HTML; other lines are paragraphs.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self._json = compile_inline(template, "json")
+
+    def plan(self, fmt: str, level: int) -> List[Any]:
+        if fmt == "markdown":
+            return compile_inline(self.template, fmt)
+        plan: List[Any] = []
+        in_list = False
+        for line in self.template.split("\n"):
+            is_item = line.startswith("- ")
+            if is_item != in_list:
+                plan.append("<ul>\n" if is_item else "</ul>\n")
+                in_list = is_item
+            if is_item:
+                plan += ["<li>", *compile_inline(line[2:], fmt), "</li>\n"]
+            elif line.strip():
+                plan += ["<p>", *compile_inline(line, fmt), "</p>\n"]
+        if in_list:
+            plan.append("</ul>\n")
+        return plan
+
+    def value(self, data: Any) -> Any:
+        return render_inline(self._json, data)
+
+
+class Each(Node):
+    """One entry per item of a list field, rendered with an item template."""
+
+    def __init__(self, path: Union[str, Sequence[str]], item: str, empty: str = ""):
+        """
+        Args:
+            path: Field path of the list, or several paths whose lists are concatenated
+            item: Template of one entry, with fields relative to the item;
+                a leading "- " marks a bulleted entry
+            empty: Text rendered when the list is missing or empty
+        """
+        self.path = path
+        self.item = item
+        self.empty = empty
+        if isinstance(path, str):
+            self._get = compile_path(path)
+        else:
+            getters = [compile_path(each) for each in path]
+            self._get = lambda data: [item for get in getters for item in get(data) or []]
+        self._json = compile_inline(item[2:] if item.startswith("- ") else item, "json")
+        self._json_empty = compile_inline(empty, "json")
+
+    def plan(self, fmt: str, level: int) -> List[Any]:
+        if fmt == "markdown":
+            return [Loop(self._get, compile_inline(self.item, fmt), "\n", compile_inline(self.empty, fmt))]
+        item = self.item[2:] if self.item.startswith("- ") else self.item
+        empty = ["<p>", *compile_inline(self.empty, fmt), "</p>\n"] if self.empty else []
+        return [Loop(self._get, ["<li>", *compile_inline(item, fmt), "</li>"], "\n", empty,
+                     opening="<ul>\n", closing="\n</ul>\n")]
+
+    def value(self, data: Any) -> Any:
+        items = self._get(data)
+        if not items:
+            return render_inline(self._json_empty, data) if self.empty else []
+        return [render_inline(self._json, item) for item in items]
+
+
+class Code(Node):
+    """A preformatted block."""
+
+    def __init__(self, template: str):
+        self.template = template
+        self._json = compile_inline(template, "json")
+
+    def plan(self, fmt: str, level: int) -> List[Any]:
+        if fmt == "markdown":
+            return ["```\n", *compile_inline(self.template, fmt), "\n```"]
+        # Literals are escaped but kept verbatim: no markup inside a code block
+        plan: List[Any] = []
+        for literal, path, spec, conversion in Formatter().parse(self.template):
+            plan.append(html.escape(literal))
+            if path is not None:
+                plan.append(Field(path, spec or "", conversion, escape=True))
+        return ["<pre>", *plan, "</pre>\n"]
+
+    def value(self, data: Any) -> Any:
+        return render_inline(self._json, data)
+
+
+class Section(Node):
+    """A titled section; nested sections are one heading level deeper."""
+
+    def __init__(self, title: str, *children: Node):
+        self.title = title
+        self.children = children
+
+    def plan(self, fmt: str, level: int) -> List[Any]:
+        if fmt == "markdown":
+            plan: List[Any] = ["#" * level, " ", self.title, "\n\n" if level <= 2 else "\n"]
+            for i, child in enumerate(self.children):
+                if i:
+                    plan.append("\n\n")
+                plan += child.plan(fmt, level + 1)
+            return plan
+        plan = [f"<section>\n<h{level}>{html.escape(self.title)}</h{level}>\n"]
+        for child in self.children:
+            plan += child.plan(fmt, level + 1)
+        plan.append("</section>\n")
+        return plan
+
+    def value(self, data: Any) -> Any:
+        sections = [child for child in self.children if isinstance(child, Section)]
+        content = [child.value(data) for child in self.children if not isinstance(child, Section)]
+        if not sections and len(content) == 1:
+            return content[0]
+        value: Dict[str, Any] = {section.title: section.value(data) for section in sections}
+        if content:
+            value["content"] = content
+        return value
+
+
+class ReportTemplate:
+    """A report template, compiled once per output format."""
+
+    def __init__(
+        self,
+        title: str,
+        *sections: Node,
+        subtitle: Optional[str] = None,
+        footer: Optional[str] = None,
+        separator: Optional[str] = "---"
+    ):
+        """
+        Args:
+            title: Report title
+            sections: Top-level sections, in order
+            subtitle: Line template shown under the title
+            footer: Text template closing the report
+            separator: Markdown line between top-level sections (None for a blank line only)
+        """
+        self.title = title
+        self.sections = sections
+        self.subtitle = Text(subtitle) if subtitle else None
+        self.footer = Text(footer) if footer else None
+        self.separator = separator
+        self._plans: Dict[str, List[Any]] = {}
+
+    def _compile(self, fmt: str) -> List[Any]:
+        if fmt == "markdown":
+            gap = f"\n\n{self.separator}\n\n" if self.separator else "\n\n"
+            plan: List[Any] = ["# ", self.title, "\n"]
+            if self.subtitle:
+                plan += ["## ", *self.subtitle.plan(fmt, 2), gap]
+            else:
+                plan.append("\n")
+            for i, section in enumerate(self.sections):
+                if i:
+                    plan.append(gap)
+                plan += section.plan(fmt, 2)
+            if self.footer:
+                plan += ["\n\n---\n", *self.footer.plan(fmt, 2)]
+            plan.append("\n")
+        else:
+            plan = [f"<article>\n<h1>{html.escape(self.title)}</h1>\n"]
+            if self.subtitle:
+                plan += ["<h2>", *compile_inline(self.subtitle.template, fmt), "</h2>\n"]
+            for section in self.sections:
+                plan += section.plan(fmt, 2)
+            if self.footer:
+                plan += ["<footer>\n", *self.footer.plan(fmt, 2), "</footer>\n"]
+            plan.append("</article>\n")
+        return _merge(plan)
+
+    def plan(self, fmt: str = "markdown") -> List[Any]:
+        """Return the compiled render plan for a Markdown or HTML output, compiling it on first use."""
+        if fmt not in FORMATS or fmt == "json":
+            raise ValueError(f"No render plan for format: {fmt}")
+        plan = self._plans.get(fmt)
+        if plan is None:
+            plan = self._plans[fmt] = self._compile(fmt)
+        return plan
+
+    def _value(self, data: Any) -> Dict[str, Any]:
+        value: Dict[str, Any] = {"title": self.title}
+        if self.subtitle:
+            value["subtitle"] = self.subtitle.value(data)
+        for section in self.sections:
+            value[section.title] = section.value(data)
+        if self.footer:
+            value["footer"] = self.footer.value(data)
+        return value
+
+    def render(self, data: Any, fmt: str = "markdown") -> Union[str, Dict[str, Any]]:
+        """
+        Render one profile.
+
+        Args:
+            data: The profile (or any mapping or object the template's fields name)
+            fmt: "markdown", "html" or "json"
+
+        Returns:
+            The report text, or a dictionary of sections for "json"
+        """
+        return next(self.render_many([data], fmt))
+
+    def render_many(self, items: Iterable[Any], fmt: str = "markdown") -> Iterator[Union[str, Dict[str, Any]]]:
+        """Render many profiles lazily with one compiled plan and one reused string builder."""
+        if fmt == "json":
+            for data in items:
+                yield self._value(data)
+            return
+        plan = self.plan(fmt)
+        out: List[str] = []
+        for data in items:
+            out.clear()
+            run_plan(plan, data, out)
+            yield "".join(out)
@@ -1,105 +1,117 @@
-def generate_comprehensive_report(profile: PsychologicalProfile) -> str:
-    """Generate a comprehensive report including all analysis dimensions."""
-    report = f"""# Comprehensive Psychological Profile Report
-
-## Executive Summary
-{profile.overall_assessment}
-
-## Core Personality Analysis
-### Personality Traits
-{format_traits(profile.personality_traits)}
-
-### Emotional Profile
-{format_emotional_states(profile.emotional_states)}
-
-### Cognitive Patterns
-{format_cognitive_patterns(profile.cognitive_patterns)}
-
-## Communication & Decision Making
-### Communication Style
-- Primary Style: {profile.communication_style.primary_style}
-- Secondary Style: {profile.communication_style.secondary_style}
-- Strengths: {', '.join(profile.communication_style.communication_strengths)}
-- Challenges: {', '.join(profile.communication_style.communication_challenges)}
-- Adaptation Capacity: {profile.communication_style.adaptation_capacity:.2f}
-
-### Decision Making Patterns
-- Primary Approach: {profile.decision_making.primary_approach}
-- Decision Speed: {profile.decision_making.decision_speed:.2f}
-- Risk Tolerance: {profile.decision_making.risk_tolerance:.2f}
-- Information Gathering: {profile.decision_making.information_gathering_style}
-- Common Biases: {', '.join(profile.decision_making.common_biases)}
-
-## Stress & Leadership
-### Stress Response Profile
-- Primary Coping Mechanism: {profile.stress_response.primary_coping_mechanism}
-- Stress Threshold: {profile.stress_response.stress_threshold:.2f}
-- Recovery Speed: {profile.stress_response.recovery_speed:.2f}
-- Stress Indicators: {', '.join(profile.stress_response.stress_indicators)}
-- Coping Strategies: {', '.join(profile.stress_response.coping_strategies)}
-
-### Leadership Assessment
-- Leadership Style: {profile.leadership_potential.leadership_style}
-- Influence Capacity: {profile.leadership_potential.influence_capacity:.2f}
-- Vision Development: {profile.leadership_potential.vision_development:.2f}
-- Team Building: {profile.leadership_potential.team_building_ability:.2f}
-- Strategic Thinking: {profile.leadership_potential.strategic_thinking:.2f}
-- Key Strengths: {', '.join(profile.leadership_potential.key_strengths)}
-- Development Areas: {', '.join(profile.leadership_potential.development_areas)}
-
-## Team Dynamics
-### Team Compatibility
-- Preferred Role: {profile.team_dynamics.preferred_role}
-- Collaboration Style: {profile.team_dynamics.collaboration_style}
-- Conflict Handling: {profile.team_dynamics.conflict_handling}
-- Team Contributions: {', '.join(profile.team_dynamics.team_contribution)}
-- Ideal Team Composition: {', '.join(profile.team_dynamics.ideal_team_composition)}
-
-## Writing & Communication Analysis
-### Writing Style
-{format_writing_style(profile.writing_style)}
-
-### Linguistic Markers
-{format_linguistic_markers(profile.linguistic_markers)}
-
-## Security Profile
-{format_security_profile(profile.security_profile) if profile.security_profile else "No security profile available"}
-
-## Confidence Assessment
-Overall Confidence Score: {profile.confidence_score:.2f}
-
-### Potential Biases
-{format_list(profile.potential_biases)}
-
-### Analysis Limitations
-{format_list(profile.limitations)}
-
-## Evidence Base
-All assessments are based on the following evidence:
-{format_evidence(profile)}
+"""
+Report Templates
 
----
-Report generated by CIABot
-Confidence Score: {profile.confidence_score:.2f}
+Report templates for PsychologicalProfile objects, rendered with the report
+rendering engine (see ciabot.reporting.engine).
 """
 
-    return report
+from typing import Any, Dict, Iterable, Iterator, Union
+from src.ciabot.core.ciaprofile import PsychologicalProfile
+from src.ciabot.reporting.engine import Each, ReportTemplate, Section, Text
+
+# Profile components whose evidence is listed in the evidence base
+EVIDENCE_COMPONENTS = ("communication_style", "decision_making", "stress_response", "leadership_potential",
+                       "team_dynamics")
+
+COMPREHENSIVE_REPORT = ReportTemplate(
+    "Comprehensive Psychological Profile Report",
+    Section("Executive Summary", Text("{overall_assessment}")),
+    Section(
+        "Core Personality Analysis",
+        Section("Personality Traits", Each("personality_traits",
+                                           "- **{trait}** (Confidence: {confidence:.2f})\n  {evidence}")),
+        Section("Emotional Profile", Each("emotional_states",
+                                          "- **{emotion}** (Intensity: {intensity:.2f})\n  {evidence}")),
+        Section("Cognitive Patterns", Each("cognitive_patterns",
+                                           "- **{pattern}** (Significance: {significance:.2f})\n  {evidence}")),
+    ),
+    Section(
+        "Communication & Decision Making",
+        Section("Communication Style", Text(
+            "- Primary Style: {communication_style.primary_style}\n"
+            "- Secondary Style: {communication_style.secondary_style}\n"
+            "- Strengths: {communication_style.communication_strengths!j}\n"
+            "- Challenges: {communication_style.communication_challenges!j}\n"
+            "- Adaptation Capacity: {communication_style.adaptation_capacity:.2f}"
+        )),
+        Section("Decision Making Patterns", Text(
+            "- Primary Approach: {decision_making.primary_approach}\n"
+            "- Decision Speed: {decision_making.decision_speed:.2f}\n"
+            "- Risk Tolerance: {decision_making.risk_tolerance:.2f}\n"
+            "- Information Gathering: {decision_making.information_gathering_style}\n"
+            "- Common Biases: {decision_making.common_biases!j}"
+        )),
+    ),
+    Section(
+        "Stress & Leadership",
+        Section("Stress Response Profile", Text(
+            "- Primary Coping Mechanism: {stress_response.primary_coping_mechanism}\n"
+            "- Stress Threshold: {stress_response.stress_threshold:.2f}\n"
+            "- Recovery Speed: {stress_response.recovery_speed:.2f}\n"
+            "- Stress Indicators: {stress_response.stress_indicators!j}\n"
+            "- Coping Strategies: {stress_response.coping_strategies!j}"
+        )),
+        Section("Leadership Assessment", Text(
+            "- Leadership Style: {leadership_potential.leadership_style}\n"
+            "- Influence Capacity: {leadership_potential.influence_capacity:.2f}\n"
+            "- Vision Development: {leadership_potential.vision_development:.2f}\n"
+            "- Team Building: {leadership_potential.team_building_ability:.2f}\n"
+            "- Strategic Thinking: {leadership_potential.strategic_thinking:.2f}\n"
+            "- Key Strengths: {leadership_potential.key_strengths!j}\n"
+            "- Development Areas: {leadership_potential.development_areas!j}"
+        )),
+    ),
+    Section(
+        "Team Dynamics",
+        Section("Team Compatibility", Text(
+            "- Preferred Role: {team_dynamics.preferred_role}\n"
+            "- Collaboration Style: {team_dynamics.collaboration_style}\n"
+            "- Conflict Handling: {team_dynamics.conflict_handling}\n"
+            "- Team Contributions: {team_dynamics.team_contribution!j}\n"
+            "- Ideal Team Composition: {team_dynamics.ideal_team_composition!j}"
+        )),
+    ),
+    Section(
+        "Writing & Communication Analysis",
+        Section("Writing Style", Text(
+            "- Formality: {writing_style.formality:.2f}\n"
+            "- Complexity: {writing_style.complexity:.2f}\n"
+            "- Emotionality: {writing_style.emotionality:.2f}\n"
+            "- Evidence: {writing_style.evidence}"
+        )),
+        Section("Linguistic Markers", Each("linguistic_markers",
+                                           "- **{marker}**: {interpretation}\n  Evidence: {evidence}")),
+    ),
+    Section(
+        "Security Profile",
+        Section("OPSEC Weaknesses", Each("security_profile.opsec_weaknesses", "- {}",
+                                         empty="No security profile available")),
+        Section("Detectable Patterns", Each("security_profile.detectable_patterns", "- {}")),
+        Section("Predictable Behaviors", Each("security_profile.predictable_behaviors", "- {}")),
+        Section("Suggested Countermeasures", Each("security_profile.suggested_countermeasures", "- {}")),
+    ),
+    Section(
+        "Confidence Assessment",
+        Text("Overall Confidence Score: {confidence_score:.2f}"),
+        Section("Potential Biases", Each("potential_biases", "- {}")),
+        Section("Analysis Limitations", Each("limitations", "- {}")),
+    ),
+    Section(
+        "Evidence Base",
+        Text("All assessments are based on the following evidence:"),
+        Each([f"{component}.evidence" for component in EVIDENCE_COMPONENTS], "- {}"),
+    ),
+    footer="Report generated by CIABot\nConfidence Score: {confidence_score:.2f}",
+    separator=None,
+)
+
+
+def generate_comprehensive_report(profile: PsychologicalProfile, fmt: str = "markdown") -> Union[str, Dict[str, Any]]:
+    """Generate a comprehensive report including all analysis dimensions."""
+    return COMPREHENSIVE_REPORT.render(profile, fmt)
+
 
-def format_evidence(profile: PsychologicalProfile) -> str:
-    """Format all evidence from the profile into a structured list."""
-    evidence = []
-    
-    # Add evidence from each component
-    if profile.communication_style:
-        evidence.extend(profile.communication_style.evidence)
-    if profile.decision_making:
-        evidence.extend(profile.decision_making.evidence)
-    if profile.stress_response:
-        evidence.extend(profile.stress_response.evidence)
-    if profile.leadership_potential:
-        evidence.extend(profile.leadership_potential.evidence)
-    if profile.team_dynamics:
-        evidence.extend(profile.team_dynamics.evidence)
-    
-    # Format evidence with bullet points
-    return "\n".join(f"- {item}" for item in evidence) 
\ No newline at end of file
+def generate_comprehensive_reports(profiles: Iterable[PsychologicalProfile],
+                                   fmt: str = "markdown") -> Iterator[Union[str, Dict[str, Any]]]:
+    """Generate the comprehensive reports of many profiles with one compiled template."""
+    return COMPREHENSIVE_REPORT.render_many(profiles, fmt)
@@ -8,22 +8,128 @@ import os
 import json
 import datetime
 import argparse
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
-from ciabot.core.ciaprofile import (
+from src.ciabot.core.ciaprofile import (
     generate_profile_prompt,
     analyze_text_with_reasoning,
     generate_structured_profile,
     generate_detailed_report,
     generate_intelligence_report,
     calculate_metrics,
-    generate_security_profile
+    generate_security_profile,
+    MAX_INPUT_TOKENS
 )
-from ciabot.core.text_processor import TextProcessor
+from src.ciabot.core.text_processor import TextProcessor
+from src.ciabot.core.llm_cache import configure_cache, get_response_cache
+from src.ciabot.core.analysis import ThroughputReport, analyze, analyze_batch
+from src.ciabot.core.usage import get_usage_tracker
+from src.ciabot.core.batch import enable_batch_mode
+from src.ciabot.core.backends import get_backend, get_router
+from src.ciabot.core.profile_store import open_profile_store
 
 # Load environment variables
 load_dotenv()
 
+def stage_results_to_dict(results):
+    """Convert stage results into a JSON-serializable dictionary of outputs."""
+    outputs = {}
+    for name, result in results.items():
+        if not result.ok:
+            outputs[name] = {"error": str(result.error)}
+        elif hasattr(result.value, "model_dump"):
+            outputs[name] = result.value.model_dump()
+        else:
+            outputs[name] = result.value
+    return outputs
+
+def current_model():
+    """Return the default model of the backend the calls are routed to."""
+    return get_backend(get_router().default.backend).default_model
+
+async def analyze_directory(input_dir, pattern, output_dir, unique_id, analysis_type, concurrency, fused=False,
+                            batch=None, store=None, store_batch_size=50):
+    """
+    Analyze every matching file in a directory, writing each result as it completes.
+    
+    Args:
+        input_dir: Directory containing the text files
+        pattern: Glob pattern selecting the files to analyze
+        output_dir: Directory to save output files
+        unique_id: Prefix for the output files
+        analysis_type: Type of analysis to perform
+        concurrency: Maximum documents analyzed at the same time, or None for
+            every file at once. Batch runs admit the whole corpus, so each stage
+            round of every document goes into the same batch job.
+        fused: Extract the profile, metrics and security profile in one call per document
+        batch: Optional BatchBackend the model calls are routed to; the stage
+            timeouts are turned off, since calls wait for batch jobs
+        store: Optional ProfileStore the results are saved to instead of
+            output files, one run per document with the file name as subject
+        store_batch_size: Results saved to the store per transaction
+        
+    Returns:
+        The ThroughputReport for the run
+    """
+    files = sorted(path for path in Path(input_dir).glob(pattern) if path.is_file())
+    print(f"Found {len(files)} files matching '{pattern}' in {input_dir}")
+    if concurrency is None:
+        concurrency = max(len(files), 1)
+    
+    # Files are read lazily by the workers, one at a time
+    documents = ((path.stem, path) for path in files)
+    report = ThroughputReport()
+    
+    pending = []
+    model = current_model()
+    
+    def flush():
+        with store.batch() as writer:
+            for subject, content, outputs in pending:
+                writer.save_run(subject, content, outputs, analysis_type=analysis_type, model=model)
+        pending.clear()
+    
+    async def handler(path):
+        # Chunk the file while it is read; the chunks joined together are its text
+        chunks = list(TextProcessor.stream_file(str(path)).chunks(MAX_INPUT_TOKENS))
+        content = "".join(chunks)
+        outputs = stage_results_to_dict(await analyze(
+            content, analysis_type=analysis_type, fused=fused, timeouts=batch is None, chunks=chunks
+        ))
+        return (content, outputs) if store else outputs
+    
+    results = analyze_batch(documents, handler, concurrency=concurrency, report=report,
+                            measure=lambda path: path.stat().st_size)
+    async for item in results:
+        if not item.ok:
+            print(f"[{report.documents}/{len(files)}] {item.id}: Error: {item.error}")
+        elif store:
+            pending.append((item.id, *item.result))
+            if len(pending) >= store_batch_size:
+                flush()
+            print(f"[{report.documents}/{len(files)}] {item.id}: analyzed ({item.duration:.1f}s)")
+        else:
+            output_file = f"{output_dir}/{unique_id}_{item.id}.json"
+            with open(output_file, "w") as f:
+                json.dump(item.result, f, indent=2)
+            print(f"[{report.documents}/{len(files)}] {item.id}: saved to {output_file} ({item.duration:.1f}s)")
+    if pending:
+        flush()
+    return report
+
+def print_call_stats():
+    """Print response cache and prompt cache statistics for the run."""
+    cache = get_response_cache()
+    if cache is not None:
+        stats = cache.stats
+        print(f"\nResponse cache: {stats.hits} hits, {stats.misses} misses ({stats.hit_rate:.0%} hit rate)")
+    
+    usage = get_usage_tracker().report()["overall"]
+    if usage["calls"]:
+        print(f"Prompt tokens: {usage['prompt_tokens']} ({usage['cached_tokens']} served from the "
+              f"provider's prompt cache, {usage['uncached_tokens']} uncached)")
+
 def main():
     """Run the analysis on the provided text file."""
     # Set up argument parser
@@ -35,7 +141,31 @@ def main():
     parser.add_argument('--analysis-type', '-t', default='general',
                         choices=['general', 'technical', 'social'],
                         help='Type of analysis to perform (default: general)')
+    parser.add_argument('--input-dir', '-i', default=None,
+                        help='Analyze every matching file in this directory instead of a single file')
+    parser.add_argument('--pattern', default='*.txt',
+                        help='Glob pattern selecting files in --input-dir (default: *.txt)')
+    parser.add_argument('--concurrency', '-c', type=int, default=None,
+                        help='Documents analyzed at the same time in --input-dir mode '
+                             '(default: 4, or the whole corpus with --batch)')
+    parser.add_argument('--fused', action='store_true',
+                        help='In --input-dir mode, extract the profile, metrics and security profile '
+                             'with one model call per document')
+    parser.add_argument('--batch', action='store_true',
+                        help='In --input-dir mode, send the model calls through the OpenAI Batch API: '
+                             'slower, but cheaper and outside the online rate limits')
+    parser.add_argument('--cache', choices=['off', 'memory', 'disk'], default=None,
+                        help='Cache model responses so re-runs on the same text are served locally '
+                             '(default: the CIABOT_CACHE environment variable, or off)')
+    parser.add_argument('--store', nargs='?', const='', default=None, metavar='PATH',
+                        help='Save the results as runs in the profile store instead of separate output files '
+                             '(default location: the CIABOT_PROFILE_STORE environment variable, '
+                             'or output/profiles.sqlite)')
     args = parser.parse_args()
+    store = open_profile_store(args.store or None) if args.store is not None else None
+    
+    if args.cache:
+        configure_cache(args.cache)
     
     print("=== CIA Profile Generator: Text Analysis ===")
     
@@ -48,6 +178,32 @@ def main():
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     unique_id = f"profile_{timestamp}"
 
+    if args.input_dir:
+        if not Path(args.input_dir).is_dir():
+            print(f"Error: Directory not found: {args.input_dir}")
+            return
+        batch = enable_batch_mode() if args.batch else None
+        concurrency = args.concurrency or (None if batch else 4)
+        report = asyncio.run(analyze_directory(
+            args.input_dir, args.pattern, output_dir, unique_id, args.analysis_type, concurrency, args.fused,
+            batch, store
+        ))
+        summary = report.to_dict()
+        with open(f"{output_dir}/{unique_id}_batch_summary.json", "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n=== Batch Complete: {summary['succeeded']} succeeded, {summary['failed']} failed ===")
+        print(f"Throughput: {summary['documents_per_minute']} documents/minute, "
+              f"{summary['characters_per_second']} characters/second over {summary['elapsed']}s")
+        print(f"Summary saved to: {output_dir}/{unique_id}_batch_summary.json")
+        if batch:
+            stats = batch.stats
+            print(f"Batch API: {stats.requests} requests in {stats.batches} batch jobs, "
+                  f"{stats.failed_requests} failed")
+        if store:
+            print(f"Results saved to the profile store: {store.path}")
+        print_call_stats()
+        return
+
     # Get the path to the input file
     if args.file_path:
         # Use the provided file path
@@ -70,69 +226,71 @@ def main():
     print(f"Analysis type: {args.analysis_type}")
 
     print(f"\nAnalyzing text with unique ID: {unique_id}")
+    artifacts = {}
+    
+    def save_output(name, filename, value, label):
+        """Keep an output for the profile store, or save it to its own output file."""
+        artifacts[name] = value
+        if store:
+            return
+        path = f"{output_dir}/{unique_id}_{filename}"
+        with open(path, "w") as f:
+            if isinstance(value, str):
+                f.write(value)
+            else:
+                # Convert models to dictionaries for JSON serialization
+                json.dump(value.model_dump(), f, indent=2)
+        print(f"{label} saved to: {path}")
     
     # Generate profile prompt
     print("\n1. Generating Profile Prompt...")
     prompt = generate_profile_prompt(text_input.content, analysis_type=args.analysis_type)
-    with open(f"{output_dir}/{unique_id}_prompt.txt", "w") as f:
-        f.write(prompt)
-    print(f"Prompt saved to: {output_dir}/{unique_id}_prompt.txt")
+    save_output("prompt", "prompt.txt", prompt, "Prompt")
     
     # Analyze text with reasoning
     print("\n2. Analyzing Text with Reasoning...")
     reasoning = analyze_text_with_reasoning(text_input.content, prompt)
-    with open(f"{output_dir}/{unique_id}_reasoning.txt", "w") as f:
-        f.write(reasoning)
-    print(f"Reasoning analysis saved to: {output_dir}/{unique_id}_reasoning.txt")
+    save_output("reasoning", "reasoning.txt", reasoning, "Reasoning analysis")
     
-    # Generate structured profile
+    # Generate structured profile from the reasoning analysis above
     print("\n3. Generating Structured Profile...")
-    profile = generate_structured_profile(text_input.content)
+    profile = generate_structured_profile(text_input.content, analysis=reasoning)
     if profile:
-        # Convert profile to dictionary for JSON serialization
-        profile_dict = profile.model_dump()
-        with open(f"{output_dir}/{unique_id}_profile.json", "w") as f:
-            json.dump(profile_dict, f, indent=2)
-        print(f"Structured profile saved to: {output_dir}/{unique_id}_profile.json")
+        save_output("structured_profile", "profile.json", profile, "Structured profile")
         
         # Generate detailed report
         print("\n4. Generating Detailed Report...")
         report = generate_detailed_report(profile)
-        with open(f"{output_dir}/{unique_id}_detailed_report.md", "w") as f:
-            f.write(report)
-        print(f"Detailed report saved to: {output_dir}/{unique_id}_detailed_report.md")
+        save_output("detailed_report", "detailed_report.md", report, "Detailed report")
         
         # Generate intelligence report
         print("\n5. Generating Intelligence Report...")
         intel_report = generate_intelligence_report(text_input.content)
-        with open(f"{output_dir}/{unique_id}_intelligence_report.md", "w") as f:
-            f.write(intel_report)
-        print(f"Intelligence report saved to: {output_dir}/{unique_id}_intelligence_report.md")
+        save_output("intelligence_report", "intelligence_report.md", intel_report, "Intelligence report")
         
         # Calculate metrics
         print("\n6. Calculating Metrics...")
         metrics = calculate_metrics(text_input.content)
         if metrics:
-            # Convert metrics to dictionary for JSON serialization
-            metrics_dict = metrics.model_dump()
-            with open(f"{output_dir}/{unique_id}_metrics.json", "w") as f:
-                json.dump(metrics_dict, f, indent=2)
-            print(f"Metrics saved to: {output_dir}/{unique_id}_metrics.json")
+            save_output("metrics", "metrics.json", metrics, "Metrics")
         
         # Generate security profile
         print("\n7. Generating Security Profile...")
         security_profile = generate_security_profile(text_input.content)
         if security_profile:
-            # Convert security profile to dictionary for JSON serialization
-            security_dict = security_profile.model_dump()
-            with open(f"{output_dir}/{unique_id}_security_profile.json", "w") as f:
-                json.dump(security_dict, f, indent=2)
-            print(f"Security profile saved to: {output_dir}/{unique_id}_security_profile.json")
+            save_output("security_profile", "security_profile.json", security_profile, "Security profile")
     else:
         print("\nFailed to generate profile.")
     
+    print_call_stats()
+    
     print(f"\n=== Analysis Complete: {unique_id} ===")
-    print(f"All output files saved to the '{output_dir}' directory with prefix: {unique_id}")
+    if store:
+        run = store.save_run(input_file.stem, text_input.content, artifacts,
+                             analysis_type=args.analysis_type, model=current_model())
+        print(f"All outputs saved to the profile store {store.path} as run {run.id} of '{run.subject}'")
+    else:
+        print(f"All output files saved to the '{output_dir}' directory with prefix: {unique_id}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -6,22 +6,32 @@ that integrates all analyses into a single output.
 """
 
 import json
-from ciabot.core.ciaprofile import (
+from concurrent.futures import ThreadPoolExecutor
+from src.ciabot.core.ciaprofile import (
     generate_structured_profile,
     generate_detailed_report,
     generate_intelligence_report,
     calculate_metrics,
     generate_security_profile
 )
+from src.ciabot.core.aggregate import ProfileAggregator
+from src.ciabot.core.tokens import count_tokens
+from src.ciabot.core.profile_store import open_profile_store
 from ..utils.paths import get_output_path
 
-def generate_comprehensive_profile(text_samples, tone="balanced"):
+def generate_comprehensive_profile(text_samples, tone="balanced", max_workers=8):
     """
     Generate a comprehensive profile that integrates analysis from multiple text samples.
     
+    The samples are profiled concurrently. Their traits, emotional states and
+    cognitive patterns are merged by name, with each score averaged over the
+    samples weighted by sample length, and the evidence each sample gave is
+    kept under "evidence_provenance".
+    
     Args:
         text_samples (list): List of text samples to analyze
         tone (str): Analysis tone ("positive", "negative", or "balanced")
+        max_workers (int): Maximum samples profiled at the same time
     
     Returns:
         dict: Comprehensive profile containing integrated analysis
@@ -36,32 +46,30 @@ def generate_comprehensive_profile(text_samples, tone="balanced"):
         "behavioral_analysis": [],
         "security_analysis": None,
         "metrics": None,
-        "integrated_report": ""
+        "integrated_report": "",
+        "evidence_provenance": {}
     }
     
-    # Process each text sample
-    for i, text in enumerate(text_samples, 1):
-        print(f"\nProcessing text sample {i}/{len(text_samples)}...")
+    # The security profile, metrics and integrated report use the most complex text sample
+    complex_text = max(text_samples, key=len)
+    aggregator = ProfileAggregator()
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        security_future = executor.submit(generate_security_profile, complex_text)
+        metrics_future = executor.submit(calculate_metrics, complex_text)
+        report_future = executor.submit(generate_intelligence_report, complex_text, tone)
+        profiles = executor.map(lambda text: generate_structured_profile(text, tone), text_samples)
         
-        # Generate structured profile
-        profile = generate_structured_profile(text, tone)
-        if profile:
+        # Results arrive in sample order while later samples are still being profiled
+        for i, (text, profile) in enumerate(zip(text_samples, profiles), 1):
+            print(f"\nProcessed text sample {i}/{len(text_samples)}")
+            if not profile:
+                continue
+            
+            # The first profile becomes the core profile; the merged findings replace its own
             if not comprehensive_profile["core_profile"]:
                 comprehensive_profile["core_profile"] = profile
-            else:
-                # Merge new findings with existing profile
-                comprehensive_profile["core_profile"].personality_traits.extend(
-                    [trait for trait in profile.personality_traits 
-                     if trait not in comprehensive_profile["core_profile"].personality_traits]
-                )
-                comprehensive_profile["core_profile"].emotional_states.extend(
-                    [state for state in profile.emotional_states 
-                     if state not in comprehensive_profile["core_profile"].emotional_states]
-                )
-                comprehensive_profile["core_profile"].cognitive_patterns.extend(
-                    [pattern for pattern in profile.cognitive_patterns 
-                     if pattern not in comprehensive_profile["core_profile"].cognitive_patterns]
-                )
+            aggregator.add(profile, sample=i, weight=count_tokens(text))
             
             # Collect neurolinguistic features
             if profile.neurolinguistic_features:
@@ -83,27 +91,43 @@ def generate_comprehensive_profile(text_samples, tone="balanced"):
                     "text_sample": i,
                     "predictions": profile.behavioral_predictions
                 })
+        
+        security_profile = security_future.result()
+        metrics = metrics_future.result()
+        report = report_future.result()
+    
+    if comprehensive_profile["core_profile"]:
+        aggregator.apply(comprehensive_profile["core_profile"])
+        comprehensive_profile["evidence_provenance"] = aggregator.provenance()
     
-    # Generate security profile from the most complex text sample
-    complex_text = max(text_samples, key=len)
-    security_profile = generate_security_profile(complex_text)
     if security_profile:
         comprehensive_profile["security_analysis"] = security_profile
     
-    # Calculate metrics from the most complex text sample
-    metrics = calculate_metrics(complex_text)
     if metrics:
         comprehensive_profile["metrics"] = metrics
     
-    # Generate integrated report
-    report = generate_intelligence_report(complex_text, tone)
     if report:
         comprehensive_profile["integrated_report"] = report
     
     return comprehensive_profile
 
-def save_comprehensive_profile(profile, filename="comprehensive_profile.json"):
-    """Save the comprehensive profile to a JSON file."""
+def save_comprehensive_profile(profile, filename="comprehensive_profile.json", subject=None, text_samples=None,
+                               tone="balanced"):
+    """
+    Save the comprehensive profile to a JSON file.
+    
+    With a subject, it is saved as a run of that subject in the profile store
+    instead, with the text samples as the analyzed content.
+    """
+    if subject is not None:
+        store = open_profile_store()
+        try:
+            run = store.save_run(subject, "\n\n".join(text_samples or []),
+                                 {"comprehensive_profile": profile}, tone=tone)
+        finally:
+            store.close()
+        print(f"\nComprehensive profile saved to {store.path} as run {run.id} of '{subject}'")
+        return
     output_path = get_output_path(filename)
     with open(output_path, 'w') as f:
         json.dump(profile, f, indent=2)
@@ -241,6 +241,30 @@ If these measures fail to address the identified risks, we recommend reassessing
 
 # ===== FUNCTIONS =====
 
+# Templates and examples are rendered once at import, so every prompt built from
+# them starts with byte-identical text that the provider can cache
+PROFILE_TEMPLATES = {
+    tone: template.format(ADVANCED_ANALYSIS_DIRECTIVES=ADVANCED_ANALYSIS_DIRECTIVES)
+    for tone, template in (
+        ("positive", POSITIVE_PROFILE_TEMPLATE),
+        ("negative", NEGATIVE_PROFILE_TEMPLATE),
+        ("balanced", BALANCED_PROFILE_TEMPLATE),
+    )
+}
+
+EXAMPLE_PROFILES = {
+    "positive": EXAMPLE_POSITIVE_PROFILE,
+    "negative": EXAMPLE_NEGATIVE_PROFILE,
+    # For balanced tone, include both examples
+    "balanced": f"""
+# POSITIVE EXAMPLE:
+{EXAMPLE_POSITIVE_PROFILE}
+
+# NEGATIVE EXAMPLE:
+{EXAMPLE_NEGATIVE_PROFILE}
+""",
+}
+
 def get_profile_template(tone="balanced"):
     """
     Get the appropriate profile template based on the desired tone.
@@ -251,12 +275,7 @@ def get_profile_template(tone="balanced"):
     Returns:
         The appropriate profile template
     """
-    if tone == "positive":
-        return POSITIVE_PROFILE_TEMPLATE.format(ADVANCED_ANALYSIS_DIRECTIVES=ADVANCED_ANALYSIS_DIRECTIVES)
-    elif tone == "negative":
-        return NEGATIVE_PROFILE_TEMPLATE.format(ADVANCED_ANALYSIS_DIRECTIVES=ADVANCED_ANALYSIS_DIRECTIVES)
-    else:
-        return BALANCED_PROFILE_TEMPLATE.format(ADVANCED_ANALYSIS_DIRECTIVES=ADVANCED_ANALYSIS_DIRECTIVES)
+    return PROFILE_TEMPLATES.get(tone, PROFILE_TEMPLATES["balanced"])
 
 def get_example_profile(tone="balanced"):
     """
@@ -268,16 +287,4 @@ def get_example_profile(tone="balanced"):
     Returns:
         An example profile
     """
-    if tone == "positive":
-        return EXAMPLE_POSITIVE_PROFILE
-    elif tone == "negative":
-        return EXAMPLE_NEGATIVE_PROFILE
-    else:
-        # For balanced tone, return both examples
-        return f"""
-# POSITIVE EXAMPLE:
-{EXAMPLE_POSITIVE_PROFILE}
-
-# NEGATIVE EXAMPLE:
-{EXAMPLE_NEGATIVE_PROFILE}
-""" 
\ No newline at end of file
+    return EXAMPLE_PROFILES.get(tone, EXAMPLE_PROFILES["balanced"])
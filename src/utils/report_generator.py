@@ -7,39 +7,113 @@ structured profile report that presents the analysis in a professional, readable
 """
 
 import json
+import re
 from datetime import datetime
 from pathlib import Path
 from .paths import get_output_path
+from src.ciabot.core.profile_store import open_profile_store
+from src.ciabot.reporting.engine import Code, Each, ReportTemplate, Section, Text, compile_inline, render_inline
 
-def load_comprehensive_profile(filename="comprehensive_profile.json"):
-    """Load the comprehensive profile from a JSON file."""
+def load_comprehensive_profile(filename="comprehensive_profile.json", subject=None):
+    """
+    Load the comprehensive profile from a JSON file.
+    
+    With a subject, the latest comprehensive profile of that subject is loaded
+    from the profile store instead (see ciabot.core.profile_store).
+    """
+    if subject is not None:
+        store = open_profile_store()
+        try:
+            run = store.latest(subject, artifact="comprehensive_profile")
+            if run is None:
+                raise FileNotFoundError(f"No comprehensive profile of '{subject}' in {store.path}")
+            return store.load_artifact(run, "comprehensive_profile")
+        finally:
+            store.close()
     profile_path = get_output_path(filename)
     with open(profile_path, 'r') as f:
         return json.load(f)
 
+SECTION_HEADING = re.compile(r"^##[ \t]+(.+?)[ \t]*$", re.MULTILINE)
+MISSING_SECTION = "Not available in the integrated report."
+
+class ReportSections:
+    """
+    Index of the `## ` sections of a Markdown report.
+    
+    The headings are found in one pass over the report and only their offsets
+    are kept, so looking up a section is a dictionary lookup and rendering
+    every section reads the report once. A section's text runs from the end
+    of its heading line to the next section heading.
+    
+    Given the known headings, only those start sections; any other `## `
+    heading is part of the section it appears in. Otherwise every `## `
+    heading starts a section.
+    """
+    
+    def __init__(self, text, headings=None):
+        self.text = text or ""
+        self.spans = {}  # Heading -> (heading start, text start, text end)
+        known = None if headings is None else {heading.lower() for heading in headings}
+        matches = [
+            match for match in SECTION_HEADING.finditer(self.text)
+            if known is None or match.group(1).strip().lower() in known
+        ]
+        for match, following in zip(matches, matches[1:] + [None]):
+            end = following.start() if following else len(self.text)
+            self.spans.setdefault(match.group(1).strip().lower(), (match.start(), match.end(), end))
+    
+    def __contains__(self, heading):
+        return heading.lower() in self.spans
+    
+    def section(self, heading, default=MISSING_SECTION):
+        """Return the text of a section, or the default if the report has no such heading."""
+        span = self.spans.get(heading.lower())
+        return self.text[span[1]:span[2]] if span else default
+    
+    def before(self, heading):
+        """Return the report up to a heading, or the whole report if it has no such heading."""
+        span = self.spans.get(heading.lower())
+        return self.text[:span[0]] if span else self.text
+
+# List item templates, shared by PROFILE_REPORT and the format_* helpers
+TRAIT_ITEM = "- **{trait}** (Confidence: {confidence})\n  {evidence}"
+EMOTION_ITEM = "- **{emotion}** (Intensity: {intensity})\n  {evidence}"
+PATTERN_ITEM = "- **{pattern}** (Significance: {significance})\n  {evidence}"
+MARKER_ITEM = "- **{marker}**\n  Evidence: {evidence}\n  Interpretation: {interpretation}"
+PREDICTION_ITEM = (
+    "- **Scenario**: {scenario}\n  **Predicted Behavior**: {predicted_behavior}\n  **Confidence**: {confidence}\n"
+    "  **Triggering Conditions**: {triggering_conditions!j}\n  **Mitigation Strategies**: {mitigation_strategies!j}"
+)
+LIST_ITEM = "- {}"
+
+def _format_item(template, item):
+    """Render one list item as it appears in the Markdown profile report."""
+    return render_inline(compile_inline(template, "markdown"), item)
+
 def format_trait(trait):
     """Format a personality trait for display."""
-    return f"- **{trait['trait']}** (Confidence: {trait['confidence']})\n  {trait['evidence']}"
+    return _format_item(TRAIT_ITEM, trait)
 
 def format_emotion(emotion):
     """Format an emotional state for display."""
-    return f"- **{emotion['emotion']}** (Intensity: {emotion['intensity']})\n  {emotion['evidence']}"
+    return _format_item(EMOTION_ITEM, emotion)
 
 def format_pattern(pattern):
     """Format a cognitive pattern for display."""
-    return f"- **{pattern['pattern']}** (Significance: {pattern['significance']})\n  {pattern['evidence']}"
+    return _format_item(PATTERN_ITEM, pattern)
 
 def format_marker(marker):
     """Format a linguistic marker for display."""
-    return f"- **{marker['marker']}**\n  Evidence: {marker['evidence']}\n  Interpretation: {marker['interpretation']}"
+    return _format_item(MARKER_ITEM, marker)
 
 def format_prediction(prediction):
     """Format a behavioral prediction for display."""
-    return f"- **Scenario**: {prediction['scenario']}\n  **Predicted Behavior**: {prediction['predicted_behavior']}\n  **Confidence**: {prediction['confidence']}\n  **Triggering Conditions**: {', '.join(prediction['triggering_conditions'])}\n  **Mitigation Strategies**: {', '.join(prediction['mitigation_strategies'])}"
+    return _format_item(PREDICTION_ITEM, prediction)
 
 def format_countermeasure(countermeasure):
     """Format a countermeasure for display."""
-    return f"- {countermeasure}"
+    return _format_item(LIST_ITEM, countermeasure)
 
 def format_cultural_context(context):
     """Format cultural context information for the report."""
@@ -72,198 +146,135 @@ def format_cultural_context(context):
     
     return sections
 
-def generate_profile_report(profile, output_filename="profile_report.md"):
-    """Generate a well-formatted profile report from the comprehensive profile."""
-    # Create the report content
-    report = f"""# PSYCHOLOGICAL PROFILE REPORT
-## Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
----
-
-## EXECUTIVE SUMMARY
-
-{profile['integrated_report'].split('## Core Assessment')[0]}
-
----
-
-## CORE ASSESSMENT
-
-{profile['integrated_report'].split('## Core Assessment')[1].split('## Motivation Layer')[0]}
-
----
-
-## PERSONALITY PROFILE
-
-### Personality Traits
-{chr(10).join(format_trait(trait) for trait in profile['core_profile']['personality_traits'])}
-
-### Emotional States
-{chr(10).join(format_emotion(emotion) for emotion in profile['core_profile']['emotional_states'])}
-
-### Cognitive Patterns
-{chr(10).join(format_pattern(pattern) for pattern in profile['core_profile']['cognitive_patterns'])}
-
-### Linguistic Markers
-{chr(10).join(format_marker(marker) for marker in profile['core_profile']['linguistic_markers'])}
-
-### Writing Style
-- **Formality**: {profile['core_profile']['writing_style']['formality']}
-- **Complexity**: {profile['core_profile']['writing_style']['complexity']}
-- **Emotionality**: {profile['core_profile']['writing_style']['emotionality']}
-- **Evidence**: {profile['core_profile']['writing_style']['evidence']}
-
----
-
-## NEUROLINGUISTIC ANALYSIS
-
-### Syntactic Complexity
-- **Overall**: {profile['core_profile']['neurolinguistic_features']['syntactic_complexity']}
-
-### Pronoun Usage
-- **I/Me/My**: {profile['core_profile']['neurolinguistic_features']['pronoun_ratio']['I']}
-- **We/Us/Our**: {profile['core_profile']['neurolinguistic_features']['pronoun_ratio']['we']}
-- **You/Your**: {profile['core_profile']['neurolinguistic_features']['pronoun_ratio']['you']}
-- **They/Them/Their**: {profile['core_profile']['neurolinguistic_features']['pronoun_ratio']['they']}
-
-### Temporal Orientation
-- **Past**: {profile['core_profile']['neurolinguistic_features']['temporal_orientation']['past']}
-- **Present**: {profile['core_profile']['neurolinguistic_features']['temporal_orientation']['present']}
-- **Future**: {profile['core_profile']['neurolinguistic_features']['temporal_orientation']['future']}
-
-### Language Characteristics
-- **Hedge Density**: {profile['core_profile']['neurolinguistic_features']['hedge_density']}
-- **Certainty Score**: {profile['core_profile']['neurolinguistic_features']['certainty_score']}
-
-### Evidence
-{chr(10).join(f"- {evidence}" for evidence in profile['core_profile']['neurolinguistic_features']['evidence'])}
-
----
-
-## PSYCHOLOGICAL ANALYSIS
-
-### Dark Triad Assessment
-- **Narcissism**: {profile['core_profile']['dark_triad_profile']['narcissism']}
-- **Machiavellianism**: {profile['core_profile']['dark_triad_profile']['machiavellianism']}
-- **Psychopathy**: {profile['core_profile']['dark_triad_profile']['psychopathy']}
-
-### Behavioral Manifestations
-{chr(10).join(f"- {manifestation}" for manifestation in profile['core_profile']['dark_triad_profile']['behavioral_manifestations'])}
-
-### Operational Risks
-{chr(10).join(f"- {risk}" for risk in profile['core_profile']['dark_triad_profile']['operational_risks'])}
-
----
-
-## BEHAVIORAL PREDICTIONS
-
-{chr(10).join(format_prediction(prediction) for prediction in profile['core_profile']['behavioral_predictions'])}
-
----
-
-## COGNITIVE BIASES
-
-{chr(10).join(f"- {bias}" for bias in profile['core_profile']['cognitive_biases'])}
-
----
-
-## CULTURAL CONTEXT
-
-{chr(10).join(format_cultural_context(profile['core_profile']['cultural_context']) if profile['core_profile'].get('cultural_context') else ["No cultural context evidence found."])}
-
----
-
-## BEHAVIORAL METRICS
-
-- **Persuasion Susceptibility**: {profile['metrics']['persuasion_susceptibility']}
-- **Deception Capacity**: {profile['metrics']['deception_capacity']}
-- **Information Hoarding**: {profile['metrics']['information_hoarding']}
-- **Risk Tolerance**: {profile['metrics']['risk_tolerance']}
-- **Group Affiliation**: {profile['metrics']['group_affiliation']}
-- **Cognitive Rigidity**: {profile['metrics']['cognitive_rigidity']}
-
----
-
-## SECURITY PROFILE
-
-### OPSEC Weaknesses
-{chr(10).join(format_countermeasure(weakness) for weakness in profile['security_analysis']['opsec_weaknesses'])}
-
-### Detectable Patterns
-{chr(10).join(format_countermeasure(pattern) for pattern in profile['security_analysis']['detectable_patterns'])}
-
-### Predictable Behaviors
-{chr(10).join(format_countermeasure(behavior) for behavior in profile['security_analysis']['predictable_behaviors'])}
-
-### Suggested Countermeasures
-{chr(10).join(format_countermeasure(countermeasure) for countermeasure in profile['security_analysis']['suggested_countermeasures'])}
-
----
-
-## MOTIVATION LAYER
-
-{profile['integrated_report'].split('## Motivation Layer')[1].split('## Psychological & Behavioral Risk Profile')[0]}
-
----
-
-## PSYCHOLOGICAL & BEHAVIORAL RISK PROFILE
-
-{profile['integrated_report'].split('## Psychological & Behavioral Risk Profile')[1].split('## Strategic Liabilities')[0]}
-
----
-
-## STRATEGIC LIABILITIES
-
-{profile['integrated_report'].split('## Strategic Liabilities')[1].split('## Unique Operational Hazards')[0]}
-
----
-
-## UNIQUE OPERATIONAL HAZARDS
-
-{profile['integrated_report'].split('## Unique Operational Hazards')[1].split('## Strengths Worth Leveraging')[0]}
-
----
-
-## STRENGTHS WORTH LEVERAGING
-
-{profile['integrated_report'].split('## Strengths Worth Leveraging')[1].split('## Structural Recommendations')[0]}
-
----
-
-## STRUCTURAL RECOMMENDATIONS
-
-{profile['integrated_report'].split('## Structural Recommendations')[1].split('## Intelligence Summary')[0]}
-
----
-
-## INTELLIGENCE SUMMARY
-
-{profile['integrated_report'].split('## Intelligence Summary')[1].split('## Final Verdict')[0]}
-
----
-
-## FINAL VERDICT
-
-{profile['integrated_report'].split('## Final Verdict')[1]}
-
----
-
-## APPENDIX: SAMPLE ANALYSIS
-
-### Sample 1: Emotional Text
-```
-{profile['integrated_report'].split('## Core Assessment')[0].split('##')[0]}
-```
-
-### Sample 2: Analytical Text
-```
-{profile['integrated_report'].split('## Core Assessment')[0].split('##')[1] if len(profile['integrated_report'].split('## Core Assessment')[0].split('##')) > 1 else "No analytical text sample available."}
-```
+# Sections of the integrated report shown in the profile report: context key -> heading
+INTEGRATED_SECTIONS = {
+    "core_assessment": "Core Assessment",
+    "motivation_layer": "Motivation Layer",
+    "risk_profile": "Psychological & Behavioral Risk Profile",
+    "strategic_liabilities": "Strategic Liabilities",
+    "operational_hazards": "Unique Operational Hazards",
+    "strengths": "Strengths Worth Leveraging",
+    "recommendations": "Structural Recommendations",
+    "intelligence_summary": "Intelligence Summary",
+    "final_verdict": "Final Verdict",
+}
+
+PROFILE_REPORT = ReportTemplate(
+    "PSYCHOLOGICAL PROFILE REPORT",
+    Section("EXECUTIVE SUMMARY", Text("{summary}")),
+    Section("CORE ASSESSMENT", Text("{integrated.core_assessment}")),
+    Section(
+        "PERSONALITY PROFILE",
+        Section("Personality Traits", Each("core_profile.personality_traits", TRAIT_ITEM)),
+        Section("Emotional States", Each("core_profile.emotional_states", EMOTION_ITEM)),
+        Section("Cognitive Patterns", Each("core_profile.cognitive_patterns", PATTERN_ITEM)),
+        Section("Linguistic Markers", Each("core_profile.linguistic_markers", MARKER_ITEM)),
+        Section("Writing Style", Text(
+            "- **Formality**: {core_profile.writing_style.formality}\n"
+            "- **Complexity**: {core_profile.writing_style.complexity}\n"
+            "- **Emotionality**: {core_profile.writing_style.emotionality}\n"
+            "- **Evidence**: {core_profile.writing_style.evidence}"
+        )),
+    ),
+    Section(
+        "NEUROLINGUISTIC ANALYSIS",
+        Section("Syntactic Complexity", Text("- **Overall**: {core_profile.neurolinguistic_features.syntactic_complexity}")),
+        Section("Pronoun Usage", Text(
+            "- **I/Me/My**: {core_profile.neurolinguistic_features.pronoun_ratio.I}\n"
+            "- **We/Us/Our**: {core_profile.neurolinguistic_features.pronoun_ratio.we}\n"
+            "- **You/Your**: {core_profile.neurolinguistic_features.pronoun_ratio.you}\n"
+            "- **They/Them/Their**: {core_profile.neurolinguistic_features.pronoun_ratio.they}"
+        )),
+        Section("Temporal Orientation", Text(
+            "- **Past**: {core_profile.neurolinguistic_features.temporal_orientation.past}\n"
+            "- **Present**: {core_profile.neurolinguistic_features.temporal_orientation.present}\n"
+            "- **Future**: {core_profile.neurolinguistic_features.temporal_orientation.future}"
+        )),
+        Section("Language Characteristics", Text(
+            "- **Hedge Density**: {core_profile.neurolinguistic_features.hedge_density}\n"
+            "- **Certainty Score**: {core_profile.neurolinguistic_features.certainty_score}"
+        )),
+        Section("Evidence", Each("core_profile.neurolinguistic_features.evidence", LIST_ITEM)),
+    ),
+    Section(
+        "PSYCHOLOGICAL ANALYSIS",
+        Section("Dark Triad Assessment", Text(
+            "- **Narcissism**: {core_profile.dark_triad_profile.narcissism}\n"
+            "- **Machiavellianism**: {core_profile.dark_triad_profile.machiavellianism}\n"
+            "- **Psychopathy**: {core_profile.dark_triad_profile.psychopathy}"
+        )),
+        Section("Behavioral Manifestations", Each("core_profile.dark_triad_profile.behavioral_manifestations", LIST_ITEM)),
+        Section("Operational Risks", Each("core_profile.dark_triad_profile.operational_risks", LIST_ITEM)),
+    ),
+    Section("BEHAVIORAL PREDICTIONS", Each("core_profile.behavioral_predictions", PREDICTION_ITEM)),
+    Section("COGNITIVE BIASES", Each("core_profile.cognitive_biases", LIST_ITEM)),
+    Section("CULTURAL CONTEXT", Text("{cultural_context}")),
+    Section("BEHAVIORAL METRICS", Text(
+        "- **Persuasion Susceptibility**: {metrics.persuasion_susceptibility}\n"
+        "- **Deception Capacity**: {metrics.deception_capacity}\n"
+        "- **Information Hoarding**: {metrics.information_hoarding}\n"
+        "- **Risk Tolerance**: {metrics.risk_tolerance}\n"
+        "- **Group Affiliation**: {metrics.group_affiliation}\n"
+        "- **Cognitive Rigidity**: {metrics.cognitive_rigidity}"
+    )),
+    Section(
+        "SECURITY PROFILE",
+        Section("OPSEC Weaknesses", Each("security_analysis.opsec_weaknesses", LIST_ITEM)),
+        Section("Detectable Patterns", Each("security_analysis.detectable_patterns", LIST_ITEM)),
+        Section("Predictable Behaviors", Each("security_analysis.predictable_behaviors", LIST_ITEM)),
+        Section("Suggested Countermeasures", Each("security_analysis.suggested_countermeasures", LIST_ITEM)),
+    ),
+    *(Section(heading.upper(), Text("{integrated.%s}" % key))
+      for key, heading in INTEGRATED_SECTIONS.items() if key != "core_assessment"),
+    Section(
+        "APPENDIX: SAMPLE ANALYSIS",
+        Section("Sample 1: Emotional Text", Code("{samples.0}")),
+        Section("Sample 2: Analytical Text", Code("{samples.1}")),
+        Section("Sample 3: Complex Text", Code("{samples.2}")),
+    ),
+    subtitle="Generated: {generated}",
+)
+
+def profile_report_context(profile):
+    """Return the values PROFILE_REPORT renders for a comprehensive profile."""
+    # Index the integrated report's sections once; missing sections render as MISSING_SECTION
+    sections = ReportSections(profile.get('integrated_report'), headings=INTEGRATED_SECTIONS.values())
+    summary = sections.before('Core Assessment')
+    samples = summary.split('##')
+    samples += ["No analytical text sample available.", "No complex text sample available."][len(samples) - 1:]
+    cultural_context = profile['core_profile'].get('cultural_context')
+    return {
+        **profile,
+        "generated": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "summary": summary,
+        "samples": samples,
+        "integrated": {key: sections.section(heading) for key, heading in INTEGRATED_SECTIONS.items()},
+        "cultural_context": chr(10).join(
+            format_cultural_context(cultural_context) if cultural_context else ["No cultural context evidence found."]
+        ),
+    }
+
+def render_profile_reports(profiles, fmt="markdown"):
+    """
+    Render the profile reports of many comprehensive profiles.
+    
+    The report template is compiled once and the reports are rendered lazily,
+    so re-rendering a large archive is bound by reading the profiles.
+    
+    Args:
+        profiles: Iterable of comprehensive profiles
+        fmt: "markdown", "html" or "json"
+    
+    Returns:
+        Iterator of reports (dictionaries for "json")
+    """
+    return PROFILE_REPORT.render_many((profile_report_context(profile) for profile in profiles), fmt)
 
-### Sample 3: Complex Text
-```
-{profile['integrated_report'].split('## Core Assessment')[0].split('##')[2] if len(profile['integrated_report'].split('## Core Assessment')[0].split('##')) > 2 else "No complex text sample available."}
-```
-"""
+def generate_profile_report(profile, output_filename="profile_report.md", fmt="markdown"):
+    """Generate a well-formatted profile report from the comprehensive profile."""
+    report = next(render_profile_reports([profile], fmt))
+    if fmt == "json":
+        report = json.dumps(report, indent=2)
     
     # Write the report to a file
     with open(output_filename, 'w') as f:
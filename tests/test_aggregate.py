@@ -0,0 +1,46 @@
+import pytest
+from src.ciabot.core.aggregate import ProfileAggregator, normalize_key
+from src.ciabot.core.ciaprofile import (
+    CognitivePattern, EmotionalState, LinguisticMarker, PersonalityTrait, PsychologicalProfile, WritingStyle
+)
+
+def _profile(traits, emotion="calm", intensity=0.5):
+    return PsychologicalProfile(
+        personality_traits=[
+            PersonalityTrait(trait=trait, evidence=f"Evidence for {trait}", confidence=confidence)
+            for trait, confidence in traits
+        ],
+        emotional_states=[EmotionalState(emotion=emotion, evidence="Test", intensity=intensity)],
+        cognitive_patterns=[CognitivePattern(pattern="logical", evidence="Test", significance=0.7)],
+        writing_style=WritingStyle(formality=0.5, complexity=0.5, emotionality=0.3, evidence="Test"),
+        linguistic_markers=[LinguisticMarker(marker="formal", evidence="Test", interpretation="Test")],
+        overall_assessment="Test",
+        confidence_score=0.5,
+        potential_biases=[],
+        limitations=[]
+    )
+
+def test_normalize_key():
+    """Test that spelling variants of a name share a key."""
+    assert normalize_key(" Risk-averse ") == normalize_key("risk averse") == "risk averse"
+
+def test_aggregator_merges_by_key_with_weighted_statistics():
+    """Test that findings merge by name, with weighted score statistics and per-sample evidence."""
+    aggregator = ProfileAggregator()
+    aggregator.add(_profile([("Analytical", 0.9), ("cautious", 0.4)]), sample=1, weight=3)
+    aggregator.add(_profile([("analytical", 0.5)], intensity=0.9), sample=2, weight=1)
+
+    traits = aggregator.merged("personality_traits")
+    assert [trait.trait for trait in traits] == ["Analytical", "cautious"]
+    assert traits[0].confidence == pytest.approx(0.8)
+    assert traits[0].evidence == "Evidence for Analytical"
+
+    stats = aggregator.provenance("personality_traits")["personality_traits"]["analytical"]
+    assert stats["samples"] == 2
+    assert stats["min"] == 0.5 and stats["max"] == 0.9
+    assert stats["std"] == pytest.approx(0.1732, abs=1e-3)
+    assert [entry["sample"] for entry in stats["evidence"]] == [1, 2]
+
+    profile = aggregator.apply(_profile([("other", 0.1)]))
+    assert len(profile.personality_traits) == 2
+    assert profile.emotional_states[0].intensity == pytest.approx(0.6)
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+from src.ciabot.core.analysis import ThroughputReport, analyze, analyze_batch
+
+async def test_analyze_batch_bounds_concurrency_and_streams_results():
+    """Test that documents are analyzed at most `concurrency` at a time and yielded as they finish."""
+    active = 0
+    peak = 0
+
+    async def handler(text):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        # Longer texts take longer, so completion order differs from input order
+        await asyncio.sleep(0.001 * len(text))
+        active -= 1
+        if text == "bad":
+            raise ValueError("cannot analyze")
+        return text.upper()
+
+    documents = [("slow", "x" * 40), ("fast", "y"), ("bad", "bad"), ("mid", "z" * 10)]
+    report = ThroughputReport()
+    items = [item async for item in analyze_batch(documents, handler, concurrency=2, report=report)]
+
+    assert peak == 2
+    assert [item.id for item in items][0] == "fast"
+    assert {item.id: item.result for item in items if item.ok} == {
+        "slow": "X" * 40, "fast": "Y", "mid": "Z" * 10
+    }
+    assert [item.error for item in items if not item.ok] == ["cannot analyze"]
+
+    summary = report.to_dict()
+    assert (summary["documents"], summary["succeeded"], summary["failed"]) == (4, 3, 1)
+    assert summary["characters"] == 54
+    assert summary["documents_per_minute"] > 0
+
+async def test_analyze_batch_reads_documents_lazily():
+    """Test that documents are pulled from the iterable only as workers free up."""
+    pulled = []
+
+    def documents():
+        for n in range(5):
+            pulled.append(n)
+            yield str(n), str(n)
+
+    async def handler(text):
+        return text
+
+    results = analyze_batch(documents(), handler, concurrency=1)
+    first = await results.__anext__()
+    assert first.id == "0"
+    assert len(pulled) < 5
+    await results.aclose()
+
+def test_invalid_concurrency():
+    """Test that a batch needs at least one worker."""
+    async def handler(text):
+        return text
+
+    with pytest.raises(ValueError):
+        asyncio.run(analyze_batch([], handler, concurrency=0).__anext__())
+
+COMBINED_JSON = json.dumps({
+    "analysis": "Narrative analysis",
+    "personality_traits": [{"trait": "analytical", "evidence": "Test", "confidence": 0.8}],
+    "emotional_states": [{"emotion": "calm", "evidence": "Test", "intensity": 0.6}],
+    "cognitive_patterns": [{"pattern": "logical", "evidence": "Test", "significance": 0.7}],
+    "writing_style": {"formality": 0.7, "complexity": 0.5, "emotionality": 0.3, "evidence": "Test"},
+    "linguistic_markers": [{"marker": "formal", "evidence": "Test", "interpretation": "Test"}],
+    "overall_assessment": "Test assessment",
+    "confidence_score": 0.8,
+    "potential_biases": ["Test bias"],
+    "limitations": ["Test limitation"],
+    "profile_metrics": {
+        "persuasion_susceptibility": 0.4, "deception_capacity": 0.3, "information_hoarding": 0.5,
+        "risk_tolerance": 0.6, "group_affiliation": 0.7, "cognitive_rigidity": 0.2
+    },
+    "security_profile": {
+        "opsec_weaknesses": ["Reuses phrases"], "detectable_patterns": [],
+        "predictable_behaviors": [], "suggested_countermeasures": []
+    }
+})
+
+async def test_fused_analysis_makes_one_extraction_call():
+    """Test that fused mode derives profile, metrics and security profile from one call."""
+    def create(**request):
+        content = COMBINED_JSON if request.get("response_format") else "Report"
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(side_effect=create)
+    with patch('src.ciabot.core.ciaprofile.async_client', mock_client):
+        results = await analyze("I plan everything carefully before I act.", fused=True)
+
+    assert all(result.ok for result in results.values())
+    assert results["reasoning"].value == "Narrative analysis"
+    assert results["metrics"].value.risk_tolerance == 0.6
+    assert results["security_profile"].value.opsec_weaknesses == ["Reuses phrases"]
+    assert results["structured_profile"].value.neurolinguistic_features is not None
+    # One combined call plus the two reports, instead of six model calls
+    assert mock_client.chat.completions.create.await_count == 3
+
+async def test_fused_analysis_uses_presplit_chunks():
+    """Test that chunks passed to analyze are used instead of splitting the text again."""
+    def create(**request):
+        content = COMBINED_JSON if request.get("response_format") else "Report"
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(side_effect=create)
+    chunks = ["I plan everything carefully. ", "Then I act."]
+    with patch('src.ciabot.core.ciaprofile.async_client', mock_client), \
+            patch('src.ciabot.core.ciaprofile.chunk_text') as mock_chunk_text:
+        results = await analyze("".join(chunks), fused=True, chunks=chunks)
+
+    assert all(result.ok for result in results.values())
+    mock_chunk_text.assert_not_called()
+    # One combined call per chunk plus the two reports
+    assert mock_client.chat.completions.create.await_count == 4
@@ -1,6 +1,7 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from openai import OpenAI
 from src.api.text_api import app
 
@@ -15,7 +16,13 @@ def mock_openai():
             choices=[MagicMock(message=MagicMock(content="Test response"))]
         )
         mock.return_value = mock_instance
-        yield mock
+        mock_async = MagicMock()
+        mock_async.chat.completions.create = AsyncMock(
+            return_value=mock_instance.chat.completions.create.return_value
+        )
+        with patch("src.ciabot.core.ciaprofile.client", mock_instance), \
+                patch("src.ciabot.core.ciaprofile.async_client", mock_async):
+            yield mock
 
 def test_api_health_check():
     """Test the health check endpoint."""
@@ -31,6 +38,74 @@ async def test_process_text_endpoint(mock_openai):
     assert response.status_code == 200
     assert "structured_profile" in response.json()
 
+def test_process_text_endpoint_single_reasoning_pass():
+    """Test that a full analysis makes each model call exactly once."""
+    mock_async = MagicMock()
+    mock_async.chat.completions.create = AsyncMock(
+        return_value=MagicMock(choices=[MagicMock(message=MagicMock(content="Test response"))])
+    )
+    with patch("src.ciabot.core.ciaprofile.async_client", mock_async):
+        response = client.post("/api/analyze", json={"content": "This is a test text"})
+    assert response.status_code == 200
+    # reasoning, structured extraction, intelligence report, metrics, security profile;
+    # the detailed report is skipped because the mocked extraction is not valid JSON
+    assert mock_async.chat.completions.create.await_count == 5
+    system_prompts = [
+        call.kwargs["messages"][0]["content"]
+        for call in mock_async.chat.completions.create.await_args_list
+    ]
+    assert len(set(system_prompts)) == len(system_prompts)
+
+class _FakeStream:
+    """Async iterator over streamed completion chunks."""
+    def __init__(self, deltas):
+        self._chunks = iter(
+            MagicMock(choices=[MagicMock(delta=MagicMock(content=delta))]) for delta in deltas
+        )
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+def _parse_sse(body):
+    """Split an SSE body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_analyze_stream_endpoint():
+    """Test that stage results and report tokens arrive as SSE events."""
+    async def create(**kwargs):
+        if kwargs.get("stream"):
+            return _FakeStream(["Intel ", "report"])
+        return MagicMock(choices=[MagicMock(message=MagicMock(content="Test response"))])
+
+    mock_async = MagicMock()
+    mock_async.chat.completions.create = AsyncMock(side_effect=create)
+    with patch("src.ciabot.core.ciaprofile.async_client", mock_async):
+        response = client.post("/api/analyze/stream", json={"content": "This is a test text"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(response.text)
+    tokens = [data["delta"] for event, data in events if event == "token"]
+    stages = {data["stage"]: data["result"] for event, data in events if event == "stage"}
+    assert tokens == ["Intel ", "report"]
+    assert stages["intelligence_report"] == "Intel report"
+    assert stages["reasoning"] == "Test response"
+    assert set(stages) == {
+        "structured_profile", "reasoning", "detailed_report",
+        "intelligence_report", "metrics", "security_profile"
+    }
+    assert events[-1][0] == "done"
+
 @pytest.mark.asyncio
 async def test_process_text_endpoint_empty(mock_openai):
     """Test the text processing endpoint with empty text."""
@@ -44,6 +119,21 @@ async def test_process_text_endpoint_invalid():
     response = client.post("/api/analyze", json={"invalid": "data"})
     assert response.status_code == 422  # Validation error
 
+
+def test_batch_endpoint_streams_ndjson_results(mock_openai):
+    """Test that a batch request yields one line per document and a summary."""
+    documents = [{"id": "a", "content": "First test text"}, {"content": "Second test text"}]
+    response = client.post("/api/analyze/batch", json={"documents": documents, "concurrency": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["id"] for line in lines[:-1]) == ["1", "a"]
+    assert all(line["result"]["reasoning"] == "Test response" for line in lines[:-1])
+    assert lines[-1]["summary"]["documents"] == 2
+    assert lines[-1]["summary"]["characters"] == len("First test text") + len("Second test text")
+
+
 def test_openai_integration(mock_openai):
     """Test OpenAI integration using the mocked client."""
     # Use the mocked client from the fixture
@@ -57,4 +147,4 @@ def test_openai_integration(mock_openai):
             }
         ]
     )
-    assert completion.choices[0].message.content is not None 
\ No newline at end of file
+    assert completion.choices[0].message.content is not None 
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from src.ciabot.core.backends import (
+    FakeBackend,
+    LatencyTracker,
+    Route,
+    Tier,
+    available_backends,
+    configure_routes,
+    get_backend,
+    parse_routes
+)
+from src.ciabot.core.retry import deadline
+from src.ciabot.core.ciaprofile import (
+    METRICS_RESPONSE_FORMAT,
+    OPENAI_FAST_MODEL,
+    OPENAI_MODEL,
+    ProfileMetrics,
+    PsychologicalProfile,
+    agenerate_structured_profile,
+    astream_detailed_report,
+    calculate_metrics,
+    generate_intelligence_report
+)
+
+SAMPLE_TEXT = "I plan everything carefully before I act, and I rarely change course."
+
+@pytest.fixture
+def routes():
+    """Restore the default routing after each test."""
+    yield configure_routes
+    configure_routes()
+
+def test_parse_routes():
+    """Test the purpose=backend[:model] route specification."""
+    assert parse_routes(" metrics=fake, reasoning=deepseek:deepseek-reasoner ,") == {
+        "metrics": Route("fake"),
+        "reasoning": Route("deepseek", "deepseek-reasoner"),
+    }
+    with pytest.raises(ValueError):
+        parse_routes("metrics")
+
+def test_registry_lists_builtin_backends():
+    """Test that the built-in backends are registered and unknown names are rejected."""
+    assert {"openai", "deepseek", "local", "fake"} <= set(available_backends())
+    with pytest.raises(ValueError):
+        get_backend("missing")
+
+def test_json_schema_falls_back_to_json_mode():
+    """Test that a backend without structured outputs gets the schema in the prompt instead."""
+    request = {
+        "messages": [{"role": "system", "content": "Instructions"}, {"role": "user", "content": "Text"}],
+        "response_format": METRICS_RESPONSE_FORMAT,
+    }
+    prepared = get_backend("deepseek").prepare(request)
+    assert prepared["model"] == "deepseek-chat"
+    assert prepared["response_format"] == {"type": "json_object"}
+    assert "persuasion_susceptibility" in prepared["messages"][0]["content"]
+    assert request["messages"][0]["content"] == "Instructions"
+    assert get_backend("fake").prepare(request, "fake-large")["response_format"] is METRICS_RESPONSE_FORMAT
+
+@patch('src.ciabot.core.ciaprofile.client')
+def test_purposes_are_routed_per_stage(mock_client, routes):
+    """Test that a routed purpose goes to its backend while the rest stay on OpenAI."""
+    routes({"metrics": "fake"})
+    metrics = calculate_metrics(SAMPLE_TEXT)
+    assert isinstance(metrics, ProfileMetrics)
+    mock_client.chat.completions.create.assert_not_called()
+
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content=json.dumps(metrics.model_dump())))]
+    )
+    routes({"metrics": "openai:gpt-4o-mini"})
+    assert calculate_metrics(SAMPLE_TEXT) == metrics
+    assert mock_client.chat.completions.create.call_args.kwargs["model"] == "gpt-4o-mini"
+
+async def test_fake_backend_is_deterministic(routes):
+    """Test that the fake backend answers schema-valid, repeatable responses with usage."""
+    routes(default_backend="fake")
+    first = await agenerate_structured_profile(SAMPLE_TEXT)
+    second = await agenerate_structured_profile(SAMPLE_TEXT)
+    assert isinstance(first, PsychologicalProfile)
+    assert first == second
+
+    deltas = [delta async for delta in astream_detailed_report(first)]
+    assert len("".join(deltas).split()) == get_backend("fake").completion_tokens
+
+async def test_fake_backend_latency():
+    """Test that each fake call takes the configured latency."""
+    backend = FakeBackend(latency=0.05, completion_tokens=5)
+    request = {"model": "fake", "messages": [{"role": "user", "content": "Hello"}]}
+    loop_time = asyncio.get_running_loop().time
+    start = loop_time()
+    completion = await backend.async_client().chat.completions.create(**request)
+    assert loop_time() - start >= 0.05
+    assert len(completion.choices[0].message.content.split()) == 5
+    assert completion.usage.completion_tokens > 0
+
+@patch('src.ciabot.core.ciaprofile.client')
+def test_stages_are_routed_by_tier(mock_client, routes):
+    """Test that short JSON stages run on the fast model and reports on the default model."""
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content=json.dumps({
+            "persuasion_susceptibility": 0.4, "deception_capacity": 0.3, "information_hoarding": 0.5,
+            "risk_tolerance": 0.6, "group_affiliation": 0.7, "cognitive_rigidity": 0.2
+        })))]
+    )
+    router = routes()
+    calculate_metrics(SAMPLE_TEXT)
+    assert mock_client.chat.completions.create.call_args.kwargs["model"] == OPENAI_FAST_MODEL
+    generate_intelligence_report(SAMPLE_TEXT)
+    assert mock_client.chat.completions.create.call_args.kwargs["model"] == OPENAI_MODEL
+    assert router.route("structured_profile") == Route("openai")
+    assert set(router.latency.to_dict()) == {f"openai:{OPENAI_FAST_MODEL}", f"openai:{OPENAI_MODEL}"}
+
+    # Backends without a fast model keep their default model, and explicit routes win
+    assert routes(default_backend="deepseek").route("metrics") == Route("deepseek")
+    assert routes({"metrics": "openai"}).route("metrics") == Route("openai")
+
+def test_latency_slo_falls_back_to_fast_tier(routes):
+    """Test that a standard call moves to the fast model when its SLO is at risk."""
+    router = routes(tiers={
+        "fast": Tier("fast", 10.0),
+        "standard": Tier("standard", 30.0, fallback="fast"),
+        "report": Tier("report"),
+    })
+    fast = Route("openai", OPENAI_FAST_MODEL)
+    assert router.route("reasoning") == Route("openai")
+
+    # Too little time left before the deadline for the expected latency
+    with deadline(5.0):
+        assert router.route("reasoning") == fast
+        assert router.route("detailed_report") == Route("openai")
+    router.record_latency("openai", OPENAI_MODEL, 2.0)
+    with deadline(5.0):
+        assert router.route("reasoning") == Route("openai")
+
+    # Recent calls on the standard model are slower than the SLO
+    for _ in range(20):
+        router.record_latency("openai", OPENAI_MODEL, 60.0)
+    assert router.route("reasoning") == fast
+    assert router.fallbacks == {"reasoning": 2}
+
+def test_latency_slo_returns_to_recovered_model(routes):
+    """Test that slow observations expire, so calls probe the standard model again."""
+    now = [0.0]
+    router = routes(tiers={"fast": Tier("fast"), "standard": Tier("standard", 30.0, fallback="fast")})
+    router.latency = LatencyTracker(max_age=60.0, clock=lambda: now[0])
+    router.record_latency("openai", OPENAI_MODEL, 60.0)
+    assert router.route("reasoning") == Route("openai", OPENAI_FAST_MODEL)
+
+    now[0] = 61.0
+    assert router.route("reasoning") == Route("openai")
+    router.record_latency("openai", OPENAI_MODEL, 5.0)
+    assert router.latency.expected("openai", OPENAI_MODEL) == 5.0
+    assert router.route("reasoning") == Route("openai")
@@ -0,0 +1,91 @@
+import json
+import pytest
+from unittest.mock import patch
+from src.ciabot.core.backends import FakeBackend, configure_routes, get_router
+from src.ciabot.core.batch import BatchBackend, BatchRequestError, FakeBatchClient, enable_batch_mode
+from src.ciabot.core.analysis import analyze, analyze_batch
+from src.ciabot.core.ciaprofile import PsychologicalProfile
+
+DOCUMENTS = [
+    ("first", "I plan everything carefully before I act, and I rarely change course."),
+    ("second", "We celebrated the launch with the whole team; everyone had worked so hard."),
+    ("third", "Rules exist for a reason. I follow them, and I expect others to do the same."),
+]
+
+@pytest.fixture
+def batch_api():
+    """Route calls through a fake Batch API, restoring the default routing afterwards."""
+    api = FakeBatchClient(polls=2)
+    yield api
+    configure_routes()
+
+@patch('src.ciabot.core.ciaprofile.async_client')
+async def test_corpus_runs_in_batch_rounds(mock_client, batch_api):
+    """Test that a corpus is analyzed through batch jobs, one round per stage dependency."""
+    batch = enable_batch_mode(batch_client=batch_api, idle_seconds=0.01, poll_interval=0)
+    assert get_router().route("metrics").backend == "batch"
+
+    async def handler(text):
+        return await analyze(text, timeouts=False)
+
+    results = {item.id: item.result async for item in analyze_batch(DOCUMENTS, handler, concurrency=len(DOCUMENTS))}
+    assert set(results) == {"first", "second", "third"}
+    for stages in results.values():
+        assert all(result.ok for result in stages.values())
+        assert isinstance(stages["structured_profile"].value, PsychologicalProfile)
+        assert stages["detailed_report"].value
+
+    mock_client.chat.completions.create.assert_not_called()
+    # Reasoning, metrics and reports first; then the profiles; then the detailed reports
+    assert batch.stats.batches == len(batch_api.jobs) == 3
+    assert batch.stats.requests == batch_api.backend.calls == 6 * len(DOCUMENTS)
+    first_job = next(iter(batch_api.jobs.values()))
+    lines = batch_api.files_data[first_job.input_file_id].decode().splitlines()
+    assert len(lines) == 4 * len(DOCUMENTS)
+    request = json.loads(lines[0])
+    assert request["method"] == "POST" and request["url"] == "/v1/chat/completions"
+    assert "timeout" not in request["body"] and request["body"]["model"]
+
+@patch('src.ciabot.core.ciaprofile.async_client')
+async def test_batch_corpus_larger_than_concurrency_runs_one_job_per_round(mock_client, batch_api, tmp_path):
+    """Test that a batch run admits the whole corpus, so each stage round is a single batch job."""
+    from src.examples.analyze_text import analyze_directory
+    input_dir = tmp_path / "corpus"
+    input_dir.mkdir()
+    # Distinct texts, so no two documents share one analysis
+    for i, (doc_id, text) in enumerate(DOCUMENTS * 2):
+        (input_dir / f"{doc_id}_{i}.txt").write_text(f"{text} Entry {i}.")
+    batch = enable_batch_mode(batch_client=batch_api, idle_seconds=0.05, poll_interval=0)
+
+    report = await analyze_directory(input_dir, "*.txt", str(tmp_path), "run", "general", None, batch=batch)
+    assert report.succeeded == 6
+    assert batch.stats.batches == 3
+    first_job = next(iter(batch_api.jobs.values()))
+    assert len(batch_api.files_data[first_job.input_file_id].decode().splitlines()) == 4 * 6
+
+    # Capping the documents in flight spreads the corpus over more jobs
+    report = await analyze_directory(input_dir, "*.txt", str(tmp_path), "capped", "general", 2, batch=batch)
+    assert report.succeeded == 6
+    assert batch.stats.batches > 6
+
+async def test_failed_batch_requests_raise():
+    """Test that a request the batch could not answer fails with a BatchRequestError."""
+    api = FakeBatchClient()
+    batch = BatchBackend(FakeBackend(), batch_client=api, idle_seconds=0.01, poll_interval=0)
+
+    def answer_with_error(batch_job):
+        output = api._store(json.dumps({
+            "id": "response-1", "custom_id": "request-1",
+            "response": {"status_code": 400, "body": {"error": {"message": "Invalid schema"}}},
+            "error": None,
+        }).encode(), "errors.jsonl", "batch_output")
+        return output
+
+    api._answer = answer_with_error
+    with pytest.raises(BatchRequestError, match="Invalid schema"):
+        await batch.async_client().chat.completions.create(
+            model="fake", messages=[{"role": "user", "content": "Hello"}]
+        )
+    assert batch.stats.failed_requests == 1
+    with pytest.raises(NotImplementedError):
+        batch.client()
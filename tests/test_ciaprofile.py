@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from pydantic import ValidationError
 from src.ciabot.core.ciaprofile import (
     PersonalityTrait, EmotionalState, CognitivePattern, WritingStyle,
@@ -8,7 +8,9 @@ from src.ciabot.core.ciaprofile import (
     generate_profile_prompt, analyze_text_with_reasoning,
     generate_structured_profile, generate_detailed_report,
     generate_intelligence_report, calculate_metrics,
-    generate_security_profile, CIAProfile
+    generate_security_profile, CIAProfile,
+    aanalyze_text_with_reasoning, acalculate_metrics, agenerate_security_profile,
+    generate_combined_profile, diff_content
 )
 
 # Test data
@@ -165,6 +167,142 @@ def test_generate_structured_profile(mock_analyze, mock_prompt):
     assert profile.confidence_score == 0.8
     assert len(profile.personality_traits) == 1
 
+PROFILE_JSON = """
+{
+    "personality_traits": [{"trait": "analytical", "evidence": "Test", "confidence": 0.8}],
+    "emotional_states": [{"emotion": "calm", "evidence": "Test", "intensity": 0.6}],
+    "cognitive_patterns": [{"pattern": "logical", "evidence": "Test", "significance": 0.7}],
+    "writing_style": {"formality": 0.7, "complexity": 0.5, "emotionality": 0.3, "evidence": "Test"},
+    "linguistic_markers": [{"marker": "formal", "evidence": "Test", "interpretation": "Test"}],
+    "overall_assessment": "Test assessment",
+    "confidence_score": 0.8,
+    "potential_biases": ["Test bias"],
+    "limitations": ["Test limitation"]
+}
+"""
+
+@patch('src.ciabot.core.ciaprofile.analyze_text_with_reasoning')
+@patch('src.ciabot.core.ciaprofile.client')
+def test_generate_structured_profile_reuses_analysis(mock_client, mock_analyze):
+    """Test that an existing reasoning analysis skips the reasoning pass."""
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content=PROFILE_JSON))]
+    )
+    
+    profile = generate_structured_profile(SAMPLE_TEXT, analysis="Existing analysis")
+    assert isinstance(profile, PsychologicalProfile)
+    mock_analyze.assert_not_called()
+    mock_client.chat.completions.create.assert_called_once()
+    request = mock_client.chat.completions.create.call_args.kwargs
+    assert "Existing analysis" in request["messages"][-1]["content"]
+
+@patch('src.ciabot.core.ciaprofile.client')
+def test_generate_combined_profile_splits_result(mock_client):
+    """Test that one combined call is split into profile, metrics and security profile."""
+    combined = PROFILE_JSON.rstrip().rstrip("}") + """,
+    "analysis": "Narrative analysis",
+    "profile_metrics": {"persuasion_susceptibility": 0.4, "deception_capacity": 0.3,
+        "information_hoarding": 0.5, "risk_tolerance": 0.6, "group_affiliation": 0.7,
+        "cognitive_rigidity": 0.2},
+    "security_profile": {"opsec_weaknesses": ["Test"], "detectable_patterns": [],
+        "predictable_behaviors": [], "suggested_countermeasures": []}
+}"""
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content=combined))]
+    )
+    
+    result = generate_combined_profile(SAMPLE_TEXT)
+    mock_client.chat.completions.create.assert_called_once()
+    request = mock_client.chat.completions.create.call_args.kwargs
+    assert request["messages"][-1]["content"].count(SAMPLE_TEXT) == 1
+    assert result.analysis == "Narrative analysis"
+    assert isinstance(result.profile, PsychologicalProfile)
+    assert result.metrics == result.profile.profile_metrics
+    assert isinstance(result.metrics, ProfileMetrics)
+    assert result.security_profile.opsec_weaknesses == ["Test"]
+    schema = request["response_format"]["json_schema"]["schema"]
+    assert "analysis" in schema["required"]
+    assert schema["properties"]["profile_metrics"] == {"$ref": "#/$defs/ProfileMetrics"}
+    assert schema["properties"]["security_profile"] == {"$ref": "#/$defs/SecurityProfile"}
+
+@patch('src.ciabot.core.ciaprofile.client')
+def test_combined_profile_merges_chunk_metrics_and_security(mock_client):
+    """Test that a chunked combined extraction averages metrics and pools security findings."""
+    def response(risk, weakness):
+        return PROFILE_JSON.rstrip().rstrip("}") + """,
+    "analysis": "Part analysis",
+    "profile_metrics": {"persuasion_susceptibility": 0.4, "deception_capacity": 0.3,
+        "information_hoarding": 0.5, "risk_tolerance": %s, "group_affiliation": 0.7,
+        "cognitive_rigidity": 0.2},
+    "security_profile": {"opsec_weaknesses": ["%s", "Shared"], "detectable_patterns": [],
+        "predictable_behaviors": [], "suggested_countermeasures": []}
+}""" % (risk, weakness)
+    mock_client.chat.completions.create.side_effect = [
+        MagicMock(choices=[MagicMock(message=MagicMock(content=response(0.2, "First")))]),
+        MagicMock(choices=[MagicMock(message=MagicMock(content=response(0.8, "Second")))]),
+    ]
+    sentence = "Sentence number one describes how I planned the project with the team. "
+    with patch("src.ciabot.core.ciaprofile.split_into_chunks", return_value=[sentence, sentence]):
+        result = generate_combined_profile(sentence * 2)
+
+    assert result.metrics.risk_tolerance == pytest.approx(0.5)
+    # The chunks are extracted in parallel, so either response may come first
+    assert sorted(result.security_profile.opsec_weaknesses) == ["First", "Second", "Shared"]
+    assert result.profile.profile_metrics == result.metrics
+
+METRICS_JSON = """
+{
+    "persuasion_susceptibility": 0.4,
+    "deception_capacity": 0.3,
+    "information_hoarding": 0.5,
+    "risk_tolerance": 0.6,
+    "group_affiliation": 0.7,
+    "cognitive_rigidity": 0.2
+}
+"""
+
+def _async_completion(content):
+    """Build a mocked async client whose create call returns the given content."""
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(
+        return_value=MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+    )
+    return mock_client
+
+@pytest.mark.asyncio
+async def test_aanalyze_text_with_reasoning():
+    """Test the async reasoning variant uses the async client."""
+    mock_client = _async_completion("Async analysis")
+    with patch('src.ciabot.core.ciaprofile.async_client', mock_client):
+        result = await aanalyze_text_with_reasoning(SAMPLE_TEXT, SAMPLE_PROMPT)
+    assert result == "Async analysis"
+    request = mock_client.chat.completions.create.call_args.kwargs
+    assert request["messages"][1] == {"role": "user", "content": SAMPLE_TEXT}
+
+@pytest.mark.asyncio
+async def test_acalculate_metrics_matches_sync():
+    """Test the async and sync metrics variants send the same request and parse alike."""
+    mock_async = _async_completion(METRICS_JSON)
+    mock_sync = MagicMock()
+    mock_sync.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content=METRICS_JSON))]
+    )
+    with patch('src.ciabot.core.ciaprofile.async_client', mock_async), \
+            patch('src.ciabot.core.ciaprofile.client', mock_sync):
+        async_metrics = await acalculate_metrics(SAMPLE_TEXT)
+        sync_metrics = calculate_metrics(SAMPLE_TEXT)
+    assert isinstance(async_metrics, ProfileMetrics)
+    assert async_metrics == sync_metrics
+    assert mock_async.chat.completions.create.call_args == mock_sync.chat.completions.create.call_args
+
+@pytest.mark.asyncio
+async def test_agenerate_security_profile_error_returns_none():
+    """Test the async variant keeps the sync error contract."""
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(side_effect=RuntimeError("API down"))
+    with patch('src.ciabot.core.ciaprofile.async_client', mock_client):
+        assert await agenerate_security_profile(SAMPLE_TEXT) is None
+
 # CIAProfile class tests
 def test_ciaprofile_initialization():
     """Test CIAProfile initialization."""
@@ -316,4 +454,70 @@ def test_openai_integration(mock_openai_client):
             }
         ]
     )
-    assert completion.choices[0].message.content is not None 
\ No newline at end of file
+    assert completion.choices[0].message.content is not None 
+
+LOG_TEXT = " ".join(f"Day {i}: I checked every plan twice before the meeting." for i in range(50))
+
+def _simple_profile(trait, confidence, assessment):
+    return PsychologicalProfile(
+        personality_traits=[PersonalityTrait(trait=trait, evidence="Test", confidence=confidence)],
+        emotional_states=[EmotionalState(emotion="calm", evidence="Test", intensity=0.5)],
+        cognitive_patterns=[CognitivePattern(pattern="logical", evidence="Test", significance=0.7)],
+        writing_style=WritingStyle(formality=0.5, complexity=0.5, emotionality=0.3, evidence="Test"),
+        linguistic_markers=[LinguisticMarker(marker="formal", evidence="Test", interpretation="Test")],
+        overall_assessment=assessment,
+        confidence_score=confidence,
+        potential_biases=["Test bias"],
+        limitations=["Test limitation"]
+    )
+
+def _metrics(value):
+    return ProfileMetrics(
+        persuasion_susceptibility=value, deception_capacity=value, information_hoarding=value,
+        risk_tolerance=value, group_affiliation=value, cognitive_rigidity=value
+    )
+
+def test_diff_content_finds_new_passages():
+    """Test that appended, inserted and rewritten sentences are found, and deletions measured."""
+    appended = diff_content(LOG_TEXT, LOG_TEXT + " Day 50: The launch slipped again.")
+    assert appended.text == "Day 50: The launch slipped again."
+    assert appended.removed_tokens == 0
+
+    edited = LOG_TEXT.replace("Day 10: I checked", "Day 10: I skipped").replace("Day 20: I checked every plan twice before the meeting. ", "")
+    delta = diff_content(LOG_TEXT, edited)
+    assert delta.added == ["Day 10: I skipped every plan twice before the meeting. "]
+    assert 0 < delta.removed_fraction < 0.1
+    assert diff_content(LOG_TEXT, LOG_TEXT).added == []
+
+@patch('src.ciabot.core.ciaprofile.calculate_metrics')
+@patch('src.ciabot.core.ciaprofile.generate_structured_profile')
+def test_update_profile_analyzes_only_new_content(mock_generate, mock_metrics):
+    """Test that an update profiles the appended text alone and merges it into the stored results."""
+    mock_generate.return_value = _simple_profile("analytical", 0.6, "Careful planner")
+    mock_metrics.return_value = _metrics(0.2)
+    profile = CIAProfile("log")
+    profile.update_content(LOG_TEXT)
+    profile.update_profile()
+    mock_generate.assert_called_once_with(LOG_TEXT, "balanced")
+    mock_metrics.assert_called_once_with(LOG_TEXT)
+
+    addition = " Day 50: Everything went wrong and I panicked."
+    mock_generate.return_value = _simple_profile("anxious", 0.9, "Stressed by setbacks")
+    mock_metrics.return_value = _metrics(0.8)
+    profile.update_content(LOG_TEXT + addition)
+    delta = profile.update_profile()
+    assert delta.text == addition.strip()
+    mock_generate.assert_called_with(addition.strip(), "balanced")
+    mock_metrics.assert_called_with(addition.strip())
+    assert {trait.trait for trait in profile.profile.personality_traits} == {"analytical", "anxious"}
+    assert "Update 1: Stressed by setbacks" in profile.profile.overall_assessment
+    # The small addition moves the metrics only slightly
+    assert 0.2 < profile.metrics.risk_tolerance < 0.25
+    assert profile.analyzed_content == profile.content
+
+    # A rewrite of most of the text is analyzed in full
+    profile.update_content("A completely different text about something else.")
+    profile.update_profile()
+    mock_generate.assert_called_with("A completely different text about something else.", "balanced")
+    assert profile.updates == 0
+
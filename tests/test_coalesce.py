@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+from src.ciabot.core.coalesce import SingleFlight
+from src.ciabot.core.analysis import analysis_flights, analyze
+
+async def test_concurrent_callers_share_one_run():
+    """Test that callers with the same key get the result of a single computation."""
+    flights = SingleFlight()
+    runs = []
+
+    async def compute(value):
+        runs.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    results = await asyncio.gather(
+        flights.run("a", lambda: compute(1)),
+        flights.run("a", lambda: compute(1)),
+        flights.run("b", lambda: compute(5)),
+    )
+    assert results == [2, 2, 10]
+    assert runs == [1, 5]
+    assert flights.to_dict() == {"in_flight": 0, "started": 2, "joined": 1}
+
+    # Finished computations are not reused
+    assert await flights.run("a", lambda: compute(3)) == 6
+
+async def test_cancelling_one_caller_keeps_the_run():
+    """Test that the computation survives a caller going away, but not all of them."""
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(flights.run("a", compute))
+    second = asyncio.ensure_future(flights.run("a", compute))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    release.clear()
+    only = asyncio.ensure_future(flights.run("b", compute))
+    await asyncio.sleep(0)
+    only.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await only
+    await asyncio.sleep(0)
+    assert flights.in_flight == 0
+
+async def test_duplicate_analyses_make_one_set_of_calls():
+    """Test that identical concurrent analyses share their model calls."""
+    mock_client = MagicMock()
+
+    async def respond(**request):
+        await asyncio.sleep(0.01)
+        return MagicMock(choices=[MagicMock(message=MagicMock(content="Test response"))])
+
+    mock_client.chat.completions.create = AsyncMock(side_effect=respond)
+    with patch('src.ciabot.core.ciaprofile.async_client', mock_client):
+        first, second = await asyncio.gather(analyze("Same text."), analyze("Same text."))
+        calls = mock_client.chat.completions.create.await_count
+        assert first is second
+        await analyze("Same text.", tone="critical")
+    assert mock_client.chat.completions.create.await_count == 2 * calls
+    assert analysis_flights.in_flight == 0
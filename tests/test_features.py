@@ -0,0 +1,79 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from src.ciabot.core.features import compute_neurolinguistic_features
+from src.ciabot.core.ciaprofile import (
+    NeurolinguisticFeature,
+    extract_neurolinguistic_features,
+    generate_structured_profile
+)
+
+SAMPLE_TEXT = (
+    "I think we might be wrong about this. They told me it was fine yesterday. "
+    "You will certainly see that I know what I am doing, because I always plan ahead."
+)
+
+PROFILE_DATA = {
+    "personality_traits": [{"trait": "analytical", "evidence": "Test", "confidence": 0.8}],
+    "emotional_states": [{"emotion": "calm", "evidence": "Test", "intensity": 0.6}],
+    "cognitive_patterns": [{"pattern": "logical", "evidence": "Test", "significance": 0.7}],
+    "writing_style": {"formality": 0.7, "complexity": 0.5, "emotionality": 0.3, "evidence": "Test"},
+    "linguistic_markers": [{"marker": "formal", "evidence": "Test", "interpretation": "Test"}],
+    "overall_assessment": "Test assessment",
+    "confidence_score": 0.8,
+    "potential_biases": ["Test bias"],
+    "limitations": ["Test limitation"]
+}
+
+def test_counts_are_exact_and_reproducible():
+    """Test pronoun and temporal ratios against hand-counted values."""
+    features = compute_neurolinguistic_features(SAMPLE_TEXT)
+    # I: I, me, I, I, I = 5; we: 1; you: 1; they: 1
+    assert features["pronoun_ratio"] == {"I": 0.625, "we": 0.125, "you": 0.125, "they": 0.125}
+    assert sum(features["temporal_orientation"].values()) == pytest.approx(1.0, abs=1e-3)
+    assert features == compute_neurolinguistic_features(SAMPLE_TEXT)
+
+def test_hedges_and_certainty():
+    """Test hedge density and certainty scoring."""
+    hedged = compute_neurolinguistic_features("Perhaps it might work. Maybe it could.")
+    certain = compute_neurolinguistic_features("It will definitely work. I know it always does.")
+    assert hedged["hedge_density"] == 1.0
+    assert hedged["certainty_score"] == 0.0
+    assert certain["hedge_density"] == 0.0
+    assert certain["certainty_score"] == 1.0
+    assert compute_neurolinguistic_features("Plain words here.")["certainty_score"] == 0.5
+
+def test_syntactic_complexity_ordering():
+    """Test that longer, clause-heavy sentences score as more complex."""
+    simple = compute_neurolinguistic_features("I ran. She sat. We ate.")
+    complex_text = compute_neurolinguistic_features(
+        "Although the committee, which had convened after the incident, agreed that the "
+        "procedures were flawed, it deferred action because the evidence, while suggestive, "
+        "was incomplete."
+    )
+    assert 0.0 <= simple["syntactic_complexity"] < complex_text["syntactic_complexity"] <= 1.0
+
+def test_extract_returns_model():
+    """Test that the ciaprofile wrapper fills the NeurolinguisticFeature model."""
+    features = extract_neurolinguistic_features(SAMPLE_TEXT)
+    assert isinstance(features, NeurolinguisticFeature)
+    assert features.evidence
+
+@patch('src.ciabot.core.ciaprofile.client')
+def test_structured_profile_uses_local_features(mock_client):
+    """Test that the profile carries local features and the prompt omits the LLM schema."""
+    llm_data = dict(PROFILE_DATA, neurolinguistic_evidence=["Frequent first-person framing"])
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content=json.dumps(llm_data)))]
+    )
+
+    profile = generate_structured_profile(SAMPLE_TEXT, analysis="Existing analysis")
+    system_prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+    assert "neurolinguistic" not in system_prompt
+    assert profile.neurolinguistic_features == extract_neurolinguistic_features(SAMPLE_TEXT)
+
+    overlay = generate_structured_profile(SAMPLE_TEXT, analysis="Existing analysis", llm_neurolinguistics=True)
+    system_prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+    assert "neurolinguistic_evidence" in system_prompt
+    assert overlay.neurolinguistic_features.pronoun_ratio == profile.neurolinguistic_features.pronoun_ratio
+    assert overlay.neurolinguistic_features.evidence[-1] == "Frequent first-person framing"
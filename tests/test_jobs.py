@@ -0,0 +1,132 @@
+import asyncio
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock, AsyncMock
+from src.api import text_api
+from src.ciabot.core.jobs import JobQueue, JobStore, QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED
+
+async def _wait_until_finished(queue, job_id, timeout=2.0):
+    """Poll a job until it reaches a final state."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not queue.get(job_id).finished:
+        assert asyncio.get_running_loop().time() < deadline, "job did not finish"
+        await asyncio.sleep(0.01)
+    return queue.get(job_id)
+
+def test_store_claims_by_priority_then_age(tmp_path):
+    """Test that higher priorities are claimed first, ties in submission order."""
+    store = JobStore(tmp_path / "jobs.sqlite")
+    low = store.add({"n": 1}, priority=0)
+    high = store.add({"n": 2}, priority=5)
+    low_later = store.add({"n": 3}, priority=0)
+
+    assert [store.claim_next().id for _ in range(3)] == [high.id, low.id, low_later.id]
+    assert store.claim_next() is None
+    assert store.get(low.id).status == RUNNING
+
+def test_store_requeues_interrupted_jobs(tmp_path):
+    """Test that running jobs survive a restart by returning to the queue."""
+    store = JobStore(tmp_path / "jobs.sqlite")
+    job = store.add({"n": 1})
+    store.claim_next()
+    store.close()
+
+    reopened = JobStore(tmp_path / "jobs.sqlite")
+    assert reopened.requeue_running() == 1
+    assert reopened.get(job.id).status == QUEUED
+    assert reopened.get(job.id).payload == {"n": 1}
+
+async def test_queue_bounds_concurrency_and_records_results(tmp_path):
+    """Test that a burst is queued and run no more than `concurrency` at a time."""
+    active = 0
+    peak = 0
+
+    async def handler(payload):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if payload["n"] == 3:
+            raise ValueError("bad input")
+        return {"double": payload["n"] * 2}
+
+    queue = JobQueue(handler, JobStore(tmp_path / "jobs.sqlite"), concurrency=2)
+    await queue.start()
+    try:
+        jobs = [queue.submit({"n": n}) for n in range(6)]
+        finished = [await _wait_until_finished(queue, job.id) for job in jobs]
+    finally:
+        await queue.stop()
+
+    assert peak == 2
+    assert finished[1].status == SUCCEEDED
+    assert finished[1].result == {"double": 2}
+    assert finished[3].status == FAILED
+    assert finished[3].error == "bad input"
+
+async def test_queue_cancels_queued_and_running_jobs(tmp_path):
+    """Test cancellation before and during execution."""
+    started = asyncio.Event()
+
+    async def handler(payload):
+        started.set()
+        await asyncio.sleep(10)
+        return {}
+
+    queue = JobQueue(handler, JobStore(tmp_path / "jobs.sqlite"), concurrency=1)
+    await queue.start()
+    try:
+        running = queue.submit({"n": 1})
+        await asyncio.wait_for(started.wait(), 1)
+        waiting = queue.submit({"n": 2})
+
+        assert queue.cancel(waiting.id).status == CANCELLED
+        assert queue.cancel(running.id).status == CANCELLED
+        await asyncio.sleep(0.01)
+        assert not queue._running
+        assert queue.get(running.id).status == CANCELLED
+    finally:
+        await queue.stop()
+
+async def test_stop_interrupts_running_job_and_requeues_it(tmp_path):
+    """Test that stopping the queue with a job in flight returns and requeues the job."""
+    started = asyncio.Event()
+
+    async def handler(payload):
+        started.set()
+        await asyncio.sleep(10)
+        return {}
+
+    queue = JobQueue(handler, JobStore(tmp_path / "jobs.sqlite"), concurrency=1)
+    await queue.start()
+    job = queue.submit({"n": 1})
+    await asyncio.wait_for(started.wait(), 1)
+
+    await asyncio.wait_for(queue.stop(), 1)
+    assert not queue.started
+    assert queue.get(job.id).status == QUEUED
+
+def test_job_endpoints_submit_and_poll(tmp_path):
+    """Test submitting an analysis job over the API and polling for its result."""
+    mock_async = MagicMock()
+    mock_async.chat.completions.create = AsyncMock(
+        return_value=MagicMock(choices=[MagicMock(message=MagicMock(content="Test response"))])
+    )
+    queue = JobQueue(text_api.run_analysis_job, JobStore(tmp_path / "jobs.sqlite"), poll_interval=0.01)
+    with patch("src.ciabot.core.ciaprofile.async_client", mock_async), \
+            patch.object(text_api, "job_queue", queue), \
+            TestClient(text_api.app) as client:
+        response = client.post("/api/jobs", json={"content": "This is a test text", "priority": 3})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        for _ in range(200):
+            job = client.get(f"/api/jobs/{job_id}").json()
+            if job["status"] == SUCCEEDED:
+                break
+        assert job["status"] == SUCCEEDED
+        assert job["priority"] == 3
+        assert job["result"]["reasoning"] == "Test response"
+
+        assert client.get("/api/jobs/missing").status_code == 404
+        assert client.delete(f"/api/jobs/{job_id}").json()["status"] == SUCCEEDED
@@ -0,0 +1,115 @@
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from src.ciabot.core import llm_cache
+from src.ciabot.core.llm_cache import (
+    MemoryTier,
+    SQLiteTier,
+    ResponseCache,
+    configure_cache,
+    make_cache_key
+)
+from src.ciabot.core.ciaprofile import analyze_text_with_reasoning
+
+REQUEST = {
+    "model": "gpt-4o",
+    "messages": [{"role": "user", "content": "Sample text"}],
+    "response_format": {"type": "json_object"},
+}
+
+@pytest.fixture
+def reset_cache():
+    """Restore the process-wide cache configuration after a test."""
+    yield
+    llm_cache._response_cache = None
+    llm_cache._configured = False
+
+def test_cache_key_is_canonical():
+    """Test that key order does not matter but every parameter does."""
+    reordered = {"response_format": {"type": "json_object"}, "messages": REQUEST["messages"], "model": "gpt-4o"}
+    assert make_cache_key(REQUEST) == make_cache_key(reordered)
+    assert make_cache_key(REQUEST) != make_cache_key({**REQUEST, "model": "gpt-4o-mini"})
+    assert make_cache_key(REQUEST) != make_cache_key({**REQUEST, "temperature": 0.2})
+
+def test_memory_tier_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    tier = MemoryTier(max_entries=2)
+    tier.set("a", "1")
+    tier.set("b", "2")
+    tier.get("a")
+    tier.set("c", "3")
+    assert tier.get("a") == "1"
+    assert tier.get("b") is None
+    assert len(tier) == 2
+
+def test_sqlite_tier_ttl_and_size_bound(tmp_path):
+    """Test expiry and size-bounded eviction of the disk tier."""
+    tier = SQLiteTier(tmp_path / "cache.sqlite", ttl_seconds=60, max_bytes=10)
+    tier.set("a", "12345")
+    tier.set("b", "12345")
+    tier.set("c", "12345")
+    assert tier.get("a") is None
+    assert tier.get("c") == "12345"
+    assert len(tier) == 2
+
+    with patch("src.ciabot.core.llm_cache.time.time", return_value=time.time() + 120):
+        assert tier.get("c") is None
+
+def test_response_cache_counters_and_promotion(tmp_path):
+    """Test hit/miss counting and promotion of disk hits into memory."""
+    memory = MemoryTier()
+    disk = SQLiteTier(tmp_path / "cache.sqlite")
+    cache = ResponseCache([memory, disk])
+
+    assert cache.get(REQUEST) is None
+    cache.set(REQUEST, "cached response")
+    memory.clear()
+
+    assert cache.get(REQUEST) == "cached response"
+    assert cache.get(REQUEST) == "cached response"
+    assert cache.stats.to_dict()["hits"] == 2
+    assert cache.stats.misses == 1
+    assert cache.stats.tier_hits == {"sqlite": 1, "memory": 1}
+
+    # The disk tier survives a new cache instance
+    assert ResponseCache([SQLiteTier(tmp_path / "cache.sqlite")]).get(REQUEST) == "cached response"
+
+async def test_async_lookups_run_blocking_tiers_off_the_event_loop(tmp_path):
+    """Test that aget and aset run a cache with a disk tier in the executor, not on the loop thread."""
+    import threading
+
+    class RecordingTier(SQLiteTier):
+        threads = []
+
+        def get(self, key):
+            self.threads.append(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, value):
+            self.threads.append(threading.get_ident())
+            super().set(key, value)
+
+    cache = ResponseCache([MemoryTier(), RecordingTier(tmp_path / "cache.sqlite")])
+    assert await cache.aget(REQUEST) is None
+    await cache.aset(REQUEST, "cached response")
+    cache.tiers[0].clear()
+    assert await cache.aget(REQUEST) == "cached response"
+    assert len(RecordingTier.threads) == 3
+    assert threading.get_ident() not in RecordingTier.threads
+
+    memory_only = ResponseCache([MemoryTier()])
+    await memory_only.aset(REQUEST, "cached response")
+    assert await memory_only.aget(REQUEST) == "cached response"
+
+@patch('src.ciabot.core.ciaprofile.client')
+def test_repeat_call_served_from_cache(mock_client, reset_cache):
+    """Test that an identical model call is only sent once when caching is on."""
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content="Analysis result"))]
+    )
+    configure_cache("memory")
+
+    first = analyze_text_with_reasoning("Sample text", "Prompt")
+    second = analyze_text_with_reasoning("Sample text", "Prompt")
+    assert first == second == "Analysis result"
+    mock_client.chat.completions.create.assert_called_once()
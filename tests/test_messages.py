@@ -0,0 +1,48 @@
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+from src.ciabot.core.messages import (
+    TEXT_REFERENCE,
+    assemble_messages,
+    duplicated_tokens,
+    find_duplicated_content
+)
+from src.ciabot.core.ciaprofile import analyze_text_with_reasoning, generate_profile_prompt
+
+AUTHOR_SAMPLE = (Path(__file__).parent.parent / "src" / "examples" / "author_sample.txt").read_text()
+
+def test_embedded_text_is_sent_once():
+    """Test that a system prompt embedding the user text gets a reference instead."""
+    prompt = generate_profile_prompt(AUTHOR_SAMPLE)
+    messages = assemble_messages(prompt, AUTHOR_SAMPLE)
+    assert messages[1] == {"role": "user", "content": AUTHOR_SAMPLE}
+    assert AUTHOR_SAMPLE.strip() not in messages[0]["content"]
+    assert TEXT_REFERENCE in messages[0]["content"]
+    assert duplicated_tokens(messages) == 0
+
+def test_duplication_check_flags_repeated_content():
+    """Test that the check estimates tokens spent on repeated content."""
+    naive = [
+        {"role": "system", "content": generate_profile_prompt(AUTHOR_SAMPLE)},
+        {"role": "user", "content": AUTHOR_SAMPLE},
+    ]
+    assert duplicated_tokens(naive) >= len(AUTHOR_SAMPLE.strip()) // 4
+
+    line = "This sentence is long enough to count as a repeated line of content here."
+    repeated_lines = [
+        {"role": "system", "content": f"Instructions.\n{line}"},
+        {"role": "user", "content": f"{line}\nSomething else."},
+    ]
+    duplicates = find_duplicated_content(repeated_lines)
+    assert [(d.chars, d.occurrences) for d in duplicates] == [(len(line), 2)]
+    assert duplicated_tokens([{"role": "user", "content": "short"}] * 2) == 0
+
+@patch('src.ciabot.core.ciaprofile.client')
+def test_reasoning_call_does_not_repeat_the_document(mock_client):
+    """Test that the reasoning request carries the document only in the user message."""
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content="Analysis result"))]
+    )
+    analyze_text_with_reasoning(AUTHOR_SAMPLE, generate_profile_prompt(AUTHOR_SAMPLE))
+    messages = mock_client.chat.completions.create.call_args.kwargs["messages"]
+    assert duplicated_tokens(messages) == 0
+    assert sum(len(m["content"]) for m in messages) < len(generate_profile_prompt(AUTHOR_SAMPLE)) + len(AUTHOR_SAMPLE) - 8000
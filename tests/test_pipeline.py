@@ -0,0 +1,126 @@
+import asyncio
+import time
+import pytest
+from src.ciabot.core.pipeline import AnalysisContext, Stage, StageError, StageScheduler
+from src.ciabot.core.retry import remaining_time
+
+@pytest.mark.asyncio
+async def test_independent_stages_run_concurrently():
+    """Test that stages without dependencies overlap in time."""
+    async def slow(value):
+        await asyncio.sleep(0.2)
+        return value
+
+    scheduler = StageScheduler([
+        Stage("a", lambda: slow("a")),
+        Stage("b", lambda: slow("b")),
+        Stage("c", lambda: time.sleep(0.2) or "c"),
+    ])
+    start = time.perf_counter()
+    results = await scheduler.run()
+    elapsed = time.perf_counter() - start
+
+    assert [results[name].value for name in ("a", "b", "c")] == ["a", "b", "c"]
+    assert elapsed < 0.5
+
+@pytest.mark.asyncio
+async def test_dependent_stage_receives_inputs():
+    """Test that a stage receives its dependencies' results as keyword arguments."""
+    scheduler = StageScheduler([
+        Stage("combined", lambda first, second: f"{first}+{second}", depends_on=["first", "second"]),
+        Stage("first", lambda: "one"),
+        Stage("second", lambda: "two"),
+    ])
+    results = await scheduler.run()
+    assert results["combined"].value == "one+two"
+    assert scheduler.order.index("combined") == 2
+
+@pytest.mark.asyncio
+async def test_failed_dependency_skips_stage():
+    """Test that a failure is recorded and propagated to dependent stages only."""
+    def broken():
+        raise RuntimeError("boom")
+
+    scheduler = StageScheduler([
+        Stage("broken", broken),
+        Stage("dependent", lambda broken: broken, depends_on=["broken"]),
+        Stage("independent", lambda: "ok"),
+    ])
+    results = await scheduler.run()
+    assert isinstance(results["broken"].error, RuntimeError)
+    assert isinstance(results["dependent"].error, StageError)
+    assert results["independent"].ok
+    assert results["independent"].value == "ok"
+
+def test_invalid_graphs_rejected():
+    """Test validation of unknown dependencies, duplicates and cycles."""
+    with pytest.raises(StageError):
+        StageScheduler([Stage("a", lambda missing: None, depends_on=["missing"])])
+    with pytest.raises(StageError):
+        StageScheduler([Stage("a", lambda: None), Stage("a", lambda: None)])
+    with pytest.raises(StageError):
+        StageScheduler([
+            Stage("a", lambda b: None, depends_on=["b"]),
+            Stage("b", lambda a: None, depends_on=["a"]),
+        ])
+
+@pytest.mark.asyncio
+async def test_context_records_and_reuses_outputs():
+    """Test that a context collects outputs and prevents recomputing them."""
+    calls = []
+
+    def reasoning():
+        calls.append("reasoning")
+        return "analysis"
+
+    context = AnalysisContext(text="sample")
+    stages = [
+        Stage("reasoning", reasoning),
+        Stage("profile", lambda reasoning: f"profile of {reasoning}", depends_on=["reasoning"]),
+    ]
+    await StageScheduler(stages, context=context).run()
+    assert context.get("reasoning") == "analysis"
+    assert context.get("profile") == "profile of analysis"
+
+    results = await StageScheduler(stages, context=context).run()
+    assert results["profile"].value == "profile of analysis"
+    assert calls == ["reasoning"]
+
+@pytest.mark.asyncio
+async def test_stage_timeout_fails_only_that_stage():
+    """Test that a slow stage times out while independent stages complete."""
+    async def slow():
+        await asyncio.sleep(1)
+        return "late"
+
+    results = await StageScheduler([
+        Stage("slow", slow, timeout=0.05),
+        Stage("after_slow", lambda slow: slow, depends_on=["slow"]),
+        Stage("fast", lambda: "done", timeout=0.05),
+    ]).run()
+    assert isinstance(results["slow"].error, StageError)
+    assert "timed out" in str(results["slow"].error)
+    assert not results["after_slow"].ok
+    assert results["fast"].value == "done"
+
+@pytest.mark.asyncio
+async def test_deadline_applies_to_every_stage():
+    """Test that the run deadline bounds stages and is visible to the calls they make."""
+    seen = {}
+
+    def sync_stage():
+        seen["sync"] = remaining_time()
+        return "ok"
+
+    async def async_stage():
+        seen["async"] = remaining_time()
+        await asyncio.sleep(1)
+
+    results = await StageScheduler(
+        [Stage("sync", sync_stage), Stage("async", async_stage)],
+        deadline=0.1
+    ).run()
+    assert results["sync"].value == "ok"
+    assert 0 < seen["sync"] <= 0.1
+    assert 0 < seen["async"] <= 0.1
+    assert "timed out" in str(results["async"].error)
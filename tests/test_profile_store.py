@@ -0,0 +1,53 @@
+import pytest
+from src.ciabot.core.ciaprofile import ProfileMetrics
+from src.ciabot.core.profile_store import ProfileStore, content_hash
+
+TEXT = "I have been analyzing the patterns in our security protocols. " * 20
+
+def test_runs_are_indexed_and_artifacts_deduplicated(tmp_path):
+    """Test that runs are listed by subject and content, and identical artifacts are stored once."""
+    store = ProfileStore(tmp_path / "profiles.sqlite")
+    metrics = ProfileMetrics(persuasion_susceptibility=0.4, deception_capacity=0.2, information_hoarding=0.3,
+                             risk_tolerance=0.7, group_affiliation=0.5, cognitive_rigidity=0.6)
+    with store.batch() as writer:
+        first = writer.save_run("alice", TEXT, {"metrics": metrics, "report": "# Report"}, created_at=1.0)
+        second = writer.save_run("alice", TEXT, {"metrics": metrics, "report": "# Report 2"},
+                                 tone="negative", model="gpt-4o", created_at=2.0)
+        writer.save_run("bob", "Something else entirely.", {"report": "# Report"}, created_at=3.0)
+
+    assert [run.id for run in store.list_runs(subject="alice")] == [second.id, first.id]
+    assert store.latest("alice").id == second.id
+    assert store.latest("alice", tone="balanced").id == first.id
+    assert [run.id for run in store.find(TEXT)] == [second.id, first.id]
+    assert store.list_runs(content_hash=content_hash(TEXT), model="gpt-4o")[0].id == second.id
+    assert [run.subject for run in store.list_runs(before=3.0, limit=1)] == ["alice"]
+    assert [run.id for run in store.list_runs(artifact="metrics")] == [second.id, first.id]
+    assert store.latest("bob", artifact="metrics") is None
+
+    assert store.load_artifact(first.id, "metrics")["risk_tolerance"] == 0.7
+    assert store.load_artifacts(second) == {"metrics": metrics.model_dump(), "report": "# Report 2"}
+    assert store.load_artifact(first, "content") == TEXT
+    with pytest.raises(KeyError):
+        store.load_artifact(first, "missing")
+
+    stats = store.stats()
+    assert stats["runs"] == 3 and stats["subjects"] == 2
+    assert stats["blobs"] == 5  # Two texts, one metrics blob and two distinct reports
+    assert stats["stored_bytes"] < stats["bytes"]
+    store.close()
+
+def test_failed_batch_is_rolled_back(tmp_path):
+    """Test that a batch is written in one transaction."""
+    path = tmp_path / "profiles.sqlite"
+    store = ProfileStore(path)
+    with pytest.raises(RuntimeError):
+        with store.batch() as writer:
+            writer.save_run("alice", TEXT, {"report": "# Report"})
+            raise RuntimeError("interrupted")
+    store.save_run("bob", TEXT, {"report": "# Report"})
+    store.close()
+
+    reopened = ProfileStore(path)
+    assert [run.subject for run in reopened.list_runs()] == ["bob"]
+    assert reopened.load_artifact(reopened.latest("bob"), "report") == "# Report"
+    reopened.close()
@@ -0,0 +1,180 @@
+import asyncio
+import threading
+import httpx
+import openai
+import pytest
+from unittest.mock import patch, MagicMock
+from src.ciabot.core.rate_limit import (
+    MESSAGE_OVERHEAD_TOKENS,
+    ConcurrencyLimiter,
+    RateLimiter,
+    TokenBucket,
+    estimate_request_tokens,
+    parse_reset_duration
+)
+from src.ciabot.core.ciaprofile import _observe_rate_limits
+
+async def test_async_limit_bounds_in_flight_calls():
+    """Test that no more than max_concurrent async calls hold a slot at once."""
+    limiter = ConcurrencyLimiter(3)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.alimit():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(call() for _ in range(10)))
+    assert peak == 3
+    assert limiter.in_flight == 0
+
+def test_limit_works_across_event_loops():
+    """Test that one limiter can be used from successive event loops."""
+    limiter = ConcurrencyLimiter(1)
+
+    async def calls():
+        async def call():
+            async with limiter.alimit():
+                await asyncio.sleep(0)
+        await asyncio.gather(call(), call())
+
+    asyncio.run(calls())
+    asyncio.run(calls())
+
+def test_sync_limit_bounds_threads():
+    """Test that synchronous callers in threads share the bound."""
+    limiter = ConcurrencyLimiter(2)
+    peak = 0
+    lock = threading.Lock()
+    barrier = threading.Event()
+
+    def call():
+        nonlocal peak
+        with limiter.limit():
+            with lock:
+                peak = max(peak, limiter.in_flight)
+            barrier.wait(0.05)
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2
+
+def test_invalid_bound():
+    """Test that the limiter needs at least one slot."""
+    with pytest.raises(ValueError):
+        ConcurrencyLimiter(0)
+
+def test_bucket_queues_reservations_in_order():
+    """Test that reservations beyond the budget wait for the refill, first come first served."""
+    bucket = TokenBucket(60, period=60.0)  # one unit per second
+    assert bucket.reserve(60, now=bucket.updated) == 0.0
+    assert bucket.reserve(1, now=bucket.updated) == pytest.approx(1.0)
+    assert bucket.reserve(1, now=bucket.updated) == pytest.approx(2.0)
+    # Nothing more is owed once the debt has been refilled
+    assert bucket.reserve(0, now=bucket.updated + 2.0) == 0.0
+
+def test_limiter_budgets_requests_and_tokens():
+    """Test that the larger of the RPM and TPM waits applies, and usage corrects the estimate."""
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=6000)
+    with patch("src.ciabot.core.rate_limit.time.monotonic", return_value=limiter.tokens.updated):
+        assert limiter.reserve(6000) == 0.0
+        # 100 tokens/second refill, so 1000 more tokens wait 10 seconds
+        assert limiter.reserve(1000) == pytest.approx(10.0)
+        limiter.record_usage(estimated=1000, actual=400)
+        assert limiter.tokens.level == pytest.approx(-400)
+    assert limiter.waits == 1
+
+def test_oversized_and_failed_reservations_are_accounted_exactly():
+    """Test that usage is corrected against the tokens actually reserved and failed calls give them back."""
+    limiter = RateLimiter(tokens_per_minute=6000)
+    with patch("src.ciabot.core.rate_limit.time.monotonic", return_value=limiter.tokens.updated):
+        # Only the bucket's capacity is taken for a larger estimate
+        reserved = limiter.acquire(10000)
+        assert reserved == 6000
+        limiter.record_usage(reserved, actual=5000)
+        assert limiter.tokens.level == pytest.approx(1000)
+
+        reserved = limiter.acquire(800)
+        limiter.release(reserved)
+        assert limiter.tokens.level == pytest.approx(1000)
+
+@patch("src.ciabot.core.retry.time.sleep")
+@patch("src.ciabot.core.ciaprofile.estimate_request_tokens", return_value=1000)
+@patch("src.ciabot.core.ciaprofile.client")
+def test_failed_attempts_release_their_reservation(mock_client, mock_estimate, mock_sleep):
+    """Test that a retried call is charged for its tokens once, not once per attempt."""
+    from src.ciabot.core import rate_limit
+    from src.ciabot.core.ciaprofile import analyze_text_with_reasoning
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    error = openai.InternalServerError("error", response=httpx.Response(500, request=request), body=None)
+    mock_client.chat.completions.create.side_effect = [
+        error, error, MagicMock(choices=[MagicMock(message=MagicMock(content="Analysis"))], usage=None)
+    ]
+    limiter = RateLimiter(tokens_per_minute=6000)
+    with patch.object(rate_limit, "_rate_limiter", limiter):
+        assert analyze_text_with_reasoning("Sample text", "Prompt") == "Analysis"
+    assert mock_client.chat.completions.create.call_count == 3
+    assert limiter.tokens.capacity - limiter.tokens.level == pytest.approx(1000, abs=10)
+
+def test_limiter_learns_limits_from_headers():
+    """Test that unset budgets are adopted from headers and levels follow the server."""
+    limiter = RateLimiter()
+    assert limiter.reserve(10**6) == 0.0
+
+    limiter.observe_headers({
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-remaining-requests": "499",
+        "x-ratelimit-limit-tokens": "30000",
+        "x-ratelimit-remaining-tokens": "100",
+    })
+    assert limiter.requests.capacity == 500
+    assert limiter.tokens.capacity == 30000
+    assert limiter.tokens.level <= 101
+    assert limiter.reserve(1100) > 0
+
+    configured = RateLimiter(tokens_per_minute=1000)
+    configured.observe_headers({"x-ratelimit-limit-tokens": "30000"})
+    assert configured.tokens.capacity == 1000
+
+def test_429_pauses_all_calls():
+    """Test that a rate-limited response holds back subsequent calls for its Retry-After."""
+    limiter = RateLimiter(requests_per_minute=6000)
+    limiter.observe_headers({"retry-after": "2"}, status_code=429)
+    assert limiter.reserve(1) == pytest.approx(2.0, abs=0.05)
+
+def test_malformed_headers_are_ignored():
+    """Test that unparseable rate-limit headers do not raise or change the budgets."""
+    limiter = RateLimiter(requests_per_minute=6000)
+    limiter.observe_headers({
+        "x-ratelimit-limit-tokens": "lots",
+        "x-ratelimit-remaining-requests": "nan",
+        "retry-after-ms": "soon",
+        "retry-after": "-5",
+        "x-ratelimit-reset-requests": "inf",
+    }, status_code=429)
+    assert limiter.tokens is None
+    assert limiter.requests.capacity == 6000
+    # No usable delay, so the default one-second pause applies
+    assert limiter.reserve(1) == pytest.approx(1.0, abs=0.05)
+
+def test_reset_durations_and_estimates():
+    """Test parsing of reset headers and pre-flight token estimates."""
+    assert parse_reset_duration("6m0s") == 360.0
+    assert parse_reset_duration("20ms") == pytest.approx(0.02)
+    assert parse_reset_duration("1.5") == 1.5
+    assert parse_reset_duration("soon") is None
+
+    request = {"messages": [{"role": "user", "content": "x" * 400}], "max_tokens": 50}
+    assert estimate_request_tokens(request) == 100 + MESSAGE_OVERHEAD_TOKENS + 50
+
+def test_response_hook_feeds_shared_limiter():
+    """Test that API responses seen by the HTTP transport update the shared limiter."""
+    limiter = RateLimiter()
+    response = httpx.Response(200, headers={"x-ratelimit-limit-requests": "100"})
+    with patch("src.ciabot.core.ciaprofile.get_rate_limiter", return_value=limiter):
+        _observe_rate_limits(response)
+    assert limiter.requests.capacity == 100
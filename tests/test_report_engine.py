@@ -0,0 +1,72 @@
+from src.ciabot.core.ciaprofile import (
+    CognitivePattern, EmotionalState, LinguisticMarker, PersonalityTrait, PsychologicalProfile, WritingStyle
+)
+from src.ciabot.reporting.engine import Code, Each, ReportTemplate, Section, Text
+from src.ciabot.reporting.templates import generate_comprehensive_report, generate_comprehensive_reports
+
+TEMPLATE = ReportTemplate(
+    "Report",
+    Section("Summary", Text("{name} scored **{score:.1f}**\n- Tags: {tags!j}")),
+    Section("Details", Section("Traits", Each("traits", "- **{trait}** ({confidence})", empty="None found")),
+            Section("Sample", Code("{sample}"))),
+    subtitle="For {name}",
+)
+
+SUBJECT = {
+    "name": "A <b>",
+    "score": 0.75,
+    "tags": ["x", "y"],
+    "traits": [{"trait": "Analytical", "confidence": 0.9}, {"trait": "Calm", "confidence": 0.5}],
+    "sample": "Some **text**",
+}
+
+def test_template_renders_markdown_html_and_json():
+    """Test that one template renders all three formats."""
+    assert TEMPLATE.render(SUBJECT) == (
+        "# Report\n## For A <b>\n\n---\n\n"
+        "## Summary\n\nA <b> scored **0.8**\n- Tags: x, y\n\n---\n\n"
+        "## Details\n\n### Traits\n- **Analytical** (0.9)\n- **Calm** (0.5)\n\n"
+        "### Sample\n```\nSome **text**\n```\n"
+    )
+
+    page = TEMPLATE.render(SUBJECT, "html")
+    assert "<p>A &lt;b&gt; scored <strong>0.8</strong></p>" in page
+    assert "<ul>\n<li><strong>Analytical</strong> (0.9)</li>\n<li><strong>Calm</strong> (0.5)</li>\n</ul>" in page
+    assert "<pre>Some **text**</pre>" in page
+
+    assert TEMPLATE.render(SUBJECT, "json") == {
+        "title": "Report",
+        "subtitle": "For A <b>",
+        "Summary": "A <b> scored 0.8\n- Tags: x, y",
+        "Details": {"Traits": ["Analytical (0.9)", "Calm (0.5)"], "Sample": "Some **text**"},
+    }
+
+def test_plan_is_compiled_once_and_missing_fields_render_empty():
+    """Test batch rendering with one compiled plan."""
+    plan = TEMPLATE.plan("markdown")
+    reports = list(TEMPLATE.render_many([SUBJECT, {"name": "B"}]))
+    assert TEMPLATE.plan("markdown") is plan
+    assert reports[0] == TEMPLATE.render(SUBJECT)
+    assert "B scored ****\n- Tags: \n" in reports[1]
+    assert "### Traits\nNone found\n" in reports[1]
+
+def test_comprehensive_report():
+    """Test rendering a PsychologicalProfile without the optional components."""
+    profile = PsychologicalProfile(
+        personality_traits=[PersonalityTrait(trait="analytical", evidence="Uses data", confidence=0.8)],
+        emotional_states=[EmotionalState(emotion="calm", evidence="Test", intensity=0.5)],
+        cognitive_patterns=[CognitivePattern(pattern="logical", evidence="Test", significance=0.7)],
+        writing_style=WritingStyle(formality=0.5, complexity=0.5, emotionality=0.3, evidence="Test"),
+        linguistic_markers=[LinguisticMarker(marker="formal", evidence="Test", interpretation="Test")],
+        overall_assessment="Test assessment",
+        confidence_score=0.8,
+        potential_biases=["Short sample"],
+        limitations=[]
+    )
+    report = generate_comprehensive_report(profile)
+    assert "- **analytical** (Confidence: 0.80)\n  Uses data" in report
+    assert "No security profile available" in report
+    assert report.endswith("Report generated by CIABot\nConfidence Score: 0.80\n")
+    assert next(generate_comprehensive_reports([profile], "json"))["Confidence Assessment"]["Potential Biases"] == [
+        "Short sample"
+    ]
@@ -11,7 +11,9 @@ from src.utils.report_generator import (
     format_prediction,
     format_countermeasure,
     generate_profile_report,
-    save_report
+    save_report,
+    ReportSections,
+    MISSING_SECTION
 )
 
 # Sample data for testing
@@ -139,6 +141,20 @@ def test_load_comprehensive_profile():
         profile = load_comprehensive_profile()
         assert profile == SAMPLE_PROFILE
 
+def test_load_comprehensive_profile_of_subject_skips_runs_without_it(tmp_path):
+    """Test that a newer run without a comprehensive profile does not hide an older one."""
+    from src.ciabot.core.profile_store import ProfileStore
+    path = tmp_path / "profiles.sqlite"
+    store = ProfileStore(path)
+    store.save_run("alice", "First text.", {"comprehensive_profile": SAMPLE_PROFILE}, created_at=1.0)
+    store.save_run("alice", "Second text.", {"report": "# Report"}, created_at=2.0)
+    store.close()
+
+    with patch("src.utils.report_generator.open_profile_store", lambda: ProfileStore(path)):
+        assert load_comprehensive_profile(subject="alice") == SAMPLE_PROFILE
+        with pytest.raises(FileNotFoundError):
+            load_comprehensive_profile(subject="bob")
+
 def test_format_trait():
     """Test formatting a personality trait."""
     trait = {
@@ -235,6 +251,45 @@ def test_generate_profile_report(mock_file):
     # Verify the file was opened with the correct filename
     mock_file.assert_called_once_with("profile_report.md", 'w')
 
+@patch("builtins.open", new_callable=mock_open)
+def test_generate_profile_report_uses_item_formatters(mock_file):
+    """Test that the report lists items exactly as the format_* helpers format them."""
+    generate_profile_report(SAMPLE_PROFILE)
+    report_content = mock_file.return_value.write.call_args[0][0]
+    core = SAMPLE_PROFILE["core_profile"]
+    for item in core["personality_traits"]:
+        assert format_trait(item) in report_content
+    for item in core["linguistic_markers"]:
+        assert format_marker(item) in report_content
+    for item in core["behavioral_predictions"]:
+        assert format_prediction(item) in report_content
+
+def test_report_sections():
+    """Test indexing the sections of the integrated report."""
+    sections = ReportSections(SAMPLE_PROFILE["integrated_report"])
+    assert sections.section("Motivation Layer") == "\nTest motivation\n\n"
+    assert sections.section("final verdict") == "\nTest final verdict"
+    assert sections.before("Core Assessment") == "## Executive Summary\nTest summary\n\n"
+    assert "Strategic Liabilities" in sections
+    assert sections.section("Missing") == MISSING_SECTION
+
+def test_report_sections_keep_unlisted_subheadings():
+    """Test that a `## ` heading that is not a known section stays inside the current section."""
+    text = "## Core Assessment\nIntro\n## Key Findings\nFinding\n## Final Verdict\nVerdict"
+    sections = ReportSections(text, headings=["Core Assessment", "Final Verdict"])
+    assert sections.section("Core Assessment") == "\nIntro\n## Key Findings\nFinding\n"
+    assert "Key Findings" not in sections
+    assert ReportSections(text).section("Core Assessment") == "\nIntro\n"
+
+@patch("builtins.open", new_callable=mock_open)
+def test_generate_profile_report_with_missing_sections(mock_file):
+    """Test that sections missing from the integrated report do not break the report."""
+    profile = dict(SAMPLE_PROFILE, integrated_report="## Executive Summary\nShort\n\n## Final Verdict\nDone")
+    generate_profile_report(profile)
+    report_content = mock_file.return_value.write.call_args[0][0]
+    assert "## MOTIVATION LAYER\n\n" + MISSING_SECTION in report_content
+    assert "## FINAL VERDICT\n\n\nDone" in report_content
+
 def test_save_report():
     """Test saving a report to a file."""
     report_text = "Test report content"
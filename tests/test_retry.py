@@ -0,0 +1,124 @@
+import httpx
+import openai
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+from src.ciabot.core.retry import (
+    DeadlineExceeded,
+    RetryPolicy,
+    acall_with_retry,
+    call_with_retry,
+    deadline,
+    remaining_time
+)
+from src.ciabot.core.ciaprofile import aanalyze_text_with_reasoning
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+def _status_error(cls, status, headers=None):
+    response = httpx.Response(status, request=REQUEST, headers=headers or {})
+    return cls("error", response=response, body=None)
+
+def test_backoff_is_jittered_and_capped():
+    """Test that delays stay within the capped exponential envelope."""
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+    delays = [policy.backoff(attempt) for attempt in range(1, 8) for _ in range(20)]
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert len(set(delays)) > 1
+
+@patch("src.ciabot.core.retry.time.sleep")
+def test_transient_errors_are_retried(mock_sleep):
+    """Test that connection and server errors are retried until a call succeeds."""
+    func = MagicMock(side_effect=[
+        openai.APIConnectionError(request=REQUEST),
+        _status_error(openai.InternalServerError, 503),
+        "ok"
+    ])
+    assert call_with_retry(func, RetryPolicy(max_attempts=3)) == "ok"
+    assert func.call_count == 3
+    assert mock_sleep.call_count == 2
+
+@patch("src.ciabot.core.retry.time.sleep")
+def test_permanent_errors_and_exhaustion_are_raised(mock_sleep):
+    """Test that bad requests are not retried and attempts are bounded."""
+    bad_request = MagicMock(side_effect=_status_error(openai.BadRequestError, 400))
+    with pytest.raises(openai.BadRequestError):
+        call_with_retry(bad_request, RetryPolicy(max_attempts=3))
+    assert bad_request.call_count == 1
+
+    always_down = MagicMock(side_effect=openai.APIConnectionError(request=REQUEST))
+    with pytest.raises(openai.APIConnectionError):
+        call_with_retry(always_down, RetryPolicy(max_attempts=3))
+    assert always_down.call_count == 3
+
+@patch("src.ciabot.core.retry.time.sleep")
+def test_retry_after_is_honored(mock_sleep):
+    """Test that the delay is at least what a 429 response asks for."""
+    func = MagicMock(side_effect=[_status_error(openai.RateLimitError, 429, {"retry-after": "7"}), "ok"])
+    assert call_with_retry(func, RetryPolicy(base_delay=0.01)) == "ok"
+    assert mock_sleep.call_args.args[0] == 7.0
+
+def test_deadline_limits_retries():
+    """Test that no retry is scheduled past the deadline, and expired deadlines fail fast."""
+    func = MagicMock(side_effect=_status_error(openai.RateLimitError, 429, {"retry-after": "60"}))
+    with deadline(1.0):
+        assert 0 < remaining_time() <= 1.0
+        with pytest.raises(openai.RateLimitError):
+            call_with_retry(func)
+    assert func.call_count == 1
+    assert remaining_time() is None
+
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            call_with_retry(MagicMock())
+
+def test_inner_deadline_cannot_extend_outer():
+    """Test that nested deadlines keep the earlier one."""
+    with deadline(1.0):
+        with deadline(100.0):
+            assert remaining_time() <= 1.0
+
+@patch("src.ciabot.core.retry.asyncio.sleep", new_callable=AsyncMock)
+async def test_async_transient_errors_are_retried_and_permanent_ones_raised(mock_sleep):
+    """Test that acall_with_retry makes a fresh attempt per retry and raises non-transient errors."""
+    func = AsyncMock(side_effect=[
+        openai.APIConnectionError(request=REQUEST),
+        _status_error(openai.InternalServerError, 503),
+        "ok"
+    ])
+    assert await acall_with_retry(func, RetryPolicy(max_attempts=3)) == "ok"
+    assert func.await_count == 3
+    assert mock_sleep.await_count == 2
+
+    bad_request = AsyncMock(side_effect=_status_error(openai.BadRequestError, 400))
+    with pytest.raises(openai.BadRequestError):
+        await acall_with_retry(bad_request, RetryPolicy(max_attempts=3))
+    assert bad_request.await_count == 1
+
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            await acall_with_retry(AsyncMock())
+
+@patch("src.ciabot.core.retry.asyncio.sleep", new_callable=AsyncMock)
+async def test_failed_call_is_retried_without_losing_the_stage(mock_sleep):
+    """Test that a transient failure in one model call is retried inside that call."""
+    mock_async = MagicMock()
+    mock_async.chat.completions.create = AsyncMock(side_effect=[
+        _status_error(openai.RateLimitError, 429),
+        MagicMock(choices=[MagicMock(message=MagicMock(content="Analysis result"))])
+    ])
+    with patch("src.ciabot.core.ciaprofile.async_client", mock_async):
+        result = await aanalyze_text_with_reasoning("Sample text", "Prompt")
+    assert result == "Analysis result"
+    assert mock_async.chat.completions.create.await_count == 2
+    mock_sleep.assert_awaited_once()
+
+async def test_async_deadline_sets_call_timeout():
+    """Test that calls made under a deadline are given the remaining time as their timeout."""
+    mock_async = MagicMock()
+    mock_async.chat.completions.create = AsyncMock(
+        return_value=MagicMock(choices=[MagicMock(message=MagicMock(content="Analysis result"))])
+    )
+    with patch("src.ciabot.core.ciaprofile.async_client", mock_async):
+        with deadline(30.0):
+            await aanalyze_text_with_reasoning("Sample text", "Prompt")
+    assert 0 < mock_async.chat.completions.create.call_args.kwargs["timeout"] <= 30.0
@@ -0,0 +1,97 @@
+import json
+from unittest.mock import patch, MagicMock
+from src.ciabot.core.schemas import json_schema_format, strict_json_schema
+from src.ciabot.core.ciaprofile import (
+    PROFILE_RESPONSE_FORMAT,
+    ProfileMetrics,
+    PsychologicalProfile,
+    SecurityProfile,
+    STRUCTURED_PROFILE_INSTRUCTIONS,
+    calculate_metrics,
+    generate_structured_profile
+)
+
+def _objects(node):
+    """Yield every object schema in a schema tree."""
+    if isinstance(node, dict):
+        if node.get("type") == "object":
+            yield node
+        for value in node.values():
+            yield from _objects(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _objects(item)
+
+def test_strict_schema_requires_every_property():
+    """Test that every object lists all its properties as required and forbids others."""
+    schema = PROFILE_RESPONSE_FORMAT["json_schema"]["schema"]
+    objects = list(_objects(schema))
+    assert len(objects) > 10
+    for node in objects:
+        assert node["required"] == list(node["properties"])
+        assert node["additionalProperties"] is False
+    text = json.dumps(schema)
+    for keyword in ('"default"', '"minimum"', '"maximum"', '"title"'):
+        assert keyword not in text
+    assert PROFILE_RESPONSE_FORMAT["json_schema"]["strict"] is True
+
+def test_strict_schema_moves_bounds_to_description_and_excludes_fields():
+    """Test that numeric bounds are described and excluded fields and their definitions dropped."""
+    metrics = strict_json_schema(ProfileMetrics)
+    assert metrics["properties"]["risk_tolerance"] == {
+        "type": "number", "description": "Number between 0 and 1."
+    }
+    profile = PROFILE_RESPONSE_FORMAT["json_schema"]["schema"]
+    assert "neurolinguistic_features" not in profile["properties"]
+    assert "NeurolinguisticFeature" not in profile["$defs"]
+    assert "TeamDynamics" not in profile["$defs"]
+    assert "security_profile" in profile["properties"]
+
+def test_strict_schema_keeps_fields_named_like_keywords():
+    """Test that fields named like stripped keywords stay in the schema."""
+    from pydantic import BaseModel
+
+    class Pattern(BaseModel):
+        format: str
+        default: float = 0.5
+        title: str = ""
+
+    schema = strict_json_schema(Pattern)
+    assert list(schema["properties"]) == ["format", "default", "title"]
+    assert schema["required"] == ["format", "default", "title"]
+    assert schema["properties"]["default"] == {"type": "number"}
+    assert "title" not in schema
+
+def test_response_formats_are_built_once():
+    """Test that the compiled format is cached per model."""
+    assert json_schema_format(SecurityProfile, "security_profile") is json_schema_format(SecurityProfile, "security_profile")
+
+@patch('src.ciabot.core.ciaprofile.client')
+def test_extraction_requests_use_structured_outputs(mock_client):
+    """Test that extraction sends the schema as response_format rather than in the prompt."""
+    profile = {
+        "personality_traits": [], "emotional_states": [], "cognitive_patterns": [],
+        "writing_style": {"formality": 0.5, "complexity": 0.5, "emotionality": 0.5, "evidence": "Test"},
+        "linguistic_markers": [], "overall_assessment": "Test", "confidence_score": 0.5,
+        "potential_biases": [], "limitations": [], "dark_triad_profile": None,
+        "behavioral_predictions": None, "cognitive_biases": None, "cultural_context": None,
+        "profile_metrics": None, "security_profile": None
+    }
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content=json.dumps(profile)))]
+    )
+    result = generate_structured_profile("Sample text.", analysis="Existing analysis")
+    assert isinstance(result, PsychologicalProfile)
+    request = mock_client.chat.completions.create.call_args.kwargs
+    assert request["response_format"] is PROFILE_RESPONSE_FORMAT
+    assert "personality_traits" not in STRUCTURED_PROFILE_INSTRUCTIONS
+
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content=json.dumps({
+            "persuasion_susceptibility": 0.4, "deception_capacity": 0.3, "information_hoarding": 0.5,
+            "risk_tolerance": 0.6, "group_affiliation": 0.7, "cognitive_rigidity": 0.2
+        })))]
+    )
+    assert calculate_metrics("Sample text.").risk_tolerance == 0.6
+    request = mock_client.chat.completions.create.call_args.kwargs
+    assert request["response_format"]["json_schema"]["name"] == "profile_metrics"
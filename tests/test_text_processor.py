@@ -4,6 +4,7 @@ from unittest.mock import patch, mock_open
 from src.ciabot.core.text_processor import (
     TextInput,
     TextProcessor,
+    iter_text_file,
     read_text_file
 )
 import json
@@ -161,4 +162,63 @@ def test_error_handling():
     
     with patch("builtins.open", return_value=mock_file):
         with pytest.raises(UnicodeDecodeError):
-            TextProcessor.from_file("test.txt") 
\ No newline at end of file
+            TextProcessor.from_file("test.txt") 
+
+# Tests for streaming ingestion
+def test_stream_file_matches_whole_file_processing(tmp_path):
+    """Test that a streamed file yields the stripped text in bounded segments."""
+    content = "\n  " + "Héllo wörld. How are you?\n\n" * 50 + "   \n\n"
+    path = tmp_path / "long.txt"
+    path.write_text(content, encoding="utf-8")
+
+    stream = TextProcessor.stream_file(str(path), chunk_size=7)
+    segments = list(stream)
+    assert "".join(segments) == content.strip()
+    assert stream.metadata["length"] == len(content.strip())
+    assert "processed_timestamp" in stream.metadata
+    assert max(len(segment) for segment in segments) <= 14
+
+    text_input = TextProcessor.from_file(str(path))
+    assert text_input.content == content.strip()
+    assert text_input.metadata["length"] == len(content.strip())
+
+def test_stream_sentences_and_chunks(tmp_path):
+    """Test that sentences and chunks are produced across segment boundaries as for the whole text."""
+    from src.ciabot.core.tokens import chunk_text, split_sentences
+    text = " ".join(f"Sentence number {i} describes how I planned the project." for i in range(100))
+    path = tmp_path / "long.txt"
+    path.write_text(text, encoding="utf-8")
+
+    stream = TextProcessor.stream_file(str(path), chunk_size=33)
+    assert list(stream.sentences()) == split_sentences(text)
+    assert list(stream.chunks(100)) == chunk_text(text, 100)
+
+def test_stream_sentences_cut_long_runs_without_boundaries(tmp_path):
+    """Test that text with no sentence boundary is not held back past max_sentence_length."""
+    text = " ".join(f"word{i}" for i in range(2000))
+    path = tmp_path / "run_on.txt"
+    path.write_text(text, encoding="utf-8")
+
+    stream = TextProcessor.stream_file(str(path), chunk_size=64)
+    stream.max_sentence_length = 100
+    pieces = list(stream.sentences())
+    assert "".join(pieces) == text
+    assert max(len(piece) for piece in pieces) <= 100
+    # Pieces are cut after whitespace, never inside a word
+    assert all(piece.endswith(" ") for piece in pieces[:-1])
+
+    path.write_text("x" * 1000, encoding="utf-8")
+    stream = TextProcessor.stream_file(str(path), chunk_size=64)
+    stream.max_sentence_length = 100
+    assert [len(piece) for piece in stream.sentences()] == [100] * 10
+
+def test_iter_text_file_streams_unstripped_segments(tmp_path):
+    """Test that iter_text_file yields the file as read, in segments of at most chunk_size."""
+    content = "  Line one.\nLine two.\n\n"
+    path = tmp_path / "lines.txt"
+    path.write_text(content, encoding="utf-8")
+
+    segments = list(iter_text_file(str(path), chunk_size=4))
+    assert "".join(segments) == content
+    assert max(len(segment) for segment in segments) <= 4
+    assert read_text_file(str(path)) == content
@@ -0,0 +1,123 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+from src.ciabot.core.tokens import chunk_text, count_tokens, fit_to_budget, split_sentences
+from src.ciabot.core.ciaprofile import (
+    PsychologicalProfile,
+    agenerate_structured_profile,
+    analyze_text_with_reasoning,
+    generate_intelligence_report,
+    merge_profiles,
+    split_chunk_analyses
+)
+
+LONG_TEXT = " ".join(
+    f"Sentence number {i} describes how I planned the project with the team." for i in range(200)
+)
+
+def _profile_json(trait, confidence, formality):
+    return json.dumps({
+        "personality_traits": [{"trait": trait, "evidence": "Test", "confidence": confidence}],
+        "emotional_states": [{"emotion": "calm", "evidence": "Test", "intensity": 0.5}],
+        "cognitive_patterns": [{"pattern": "logical", "evidence": "Test", "significance": 0.7}],
+        "writing_style": {"formality": formality, "complexity": 0.5, "emotionality": 0.3, "evidence": "Test"},
+        "linguistic_markers": [{"marker": "formal", "evidence": "Test", "interpretation": "Test"}],
+        "overall_assessment": f"Mostly {trait}",
+        "confidence_score": confidence,
+        "potential_biases": ["Small sample"],
+        "limitations": ["Written text only"]
+    })
+
+def test_split_sentences_round_trips():
+    """Test that sentences keep their trailing whitespace and rejoin to the text."""
+    text = 'He left. "Why?" she asked!\n\nNew paragraph without end'
+    sentences = split_sentences(text)
+    assert sentences == ['He left. ', '"Why?" ', 'she asked!\n\n', 'New paragraph without end']
+    assert "".join(sentences) == text
+
+def test_chunk_text_respects_budget_and_sentences():
+    """Test that chunks fit the budget, end on sentence boundaries and cover the text."""
+    chunks = chunk_text(LONG_TEXT, 200)
+    assert len(chunks) > 1
+    assert "".join(chunks) == LONG_TEXT
+    for chunk in chunks:
+        assert count_tokens(chunk) <= 200
+        assert chunk.rstrip().endswith(".")
+    assert chunk_text("Short text.", 200) == ["Short text."]
+
+def test_chunk_text_splits_overlong_sentence_between_words():
+    """Test that a sentence over budget is split at word boundaries."""
+    sentence = "word " * 100
+    chunks = chunk_text(sentence, 20)
+    assert "".join(chunks) == sentence
+    assert all(count_tokens(chunk) <= 20 for chunk in chunks)
+    with pytest.raises(ValueError):
+        chunk_text(sentence, 0)
+
+def test_fit_to_budget_marks_excerpt():
+    """Test that an over-budget text is cut on a sentence boundary with a note."""
+    assert fit_to_budget("Short text.", 100) == "Short text."
+    excerpt = fit_to_budget(LONG_TEXT, 300)
+    assert count_tokens(excerpt) <= 300
+    assert excerpt.startswith("Sentence number 0 ")
+    assert "tokens are omitted.]" in excerpt
+
+def test_merge_profiles_reduces_parts():
+    """Test that partial profiles merge into one, keeping the strongest trait instances."""
+    profiles = [
+        PsychologicalProfile(**json.loads(_profile_json("analytical", 0.6, 0.2))),
+        PsychologicalProfile(**json.loads(_profile_json("Analytical", 0.9, 0.8))),
+        PsychologicalProfile(**json.loads(_profile_json("cautious", 0.5, 0.5))),
+    ]
+    merged = merge_profiles(profiles, weights=[1, 1, 2])
+    traits = {trait.trait.lower(): trait.confidence for trait in merged.personality_traits}
+    assert traits == {"analytical": 0.9, "cautious": 0.5}
+    assert merged.writing_style.formality == pytest.approx(0.5)
+    assert merged.confidence_score == pytest.approx(0.625)
+    assert len(merged.emotional_states) == 1
+    assert merged.potential_biases == ["Small sample"]
+    assert merged.overall_assessment.startswith("Part 1: Mostly analytical")
+    assert merge_profiles(profiles[:1]) is profiles[0]
+
+@patch('src.ciabot.core.ciaprofile.MAX_INPUT_TOKENS', 300)
+@patch('src.ciabot.core.ciaprofile.client')
+def test_long_text_reasoning_is_chunked(mock_client):
+    """Test that a long text is analyzed per chunk, each chunk sent once."""
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content="Chunk analysis"))]
+    )
+    analysis = analyze_text_with_reasoning(LONG_TEXT, f"Analyze this.\n\nText to analyze:\n{LONG_TEXT}")
+    calls = mock_client.chat.completions.create.call_args_list
+    chunks = chunk_text(LONG_TEXT, 300)
+    assert len(calls) == len(chunks) > 1
+    assert sorted(call.kwargs["messages"][1]["content"] for call in calls) == sorted(chunks)
+    assert all(LONG_TEXT not in call.kwargs["messages"][0]["content"] for call in calls)
+    assert split_chunk_analyses(analysis) == ["Chunk analysis"] * len(chunks)
+
+@patch('src.ciabot.core.ciaprofile.MAX_INPUT_TOKENS', 300)
+async def test_long_text_profile_is_map_reduced():
+    """Test that a long text is profiled per chunk and the partial profiles merged."""
+    mock_client = MagicMock()
+    mock_client.chat.completions.create = AsyncMock(side_effect=lambda **request: MagicMock(
+        choices=[MagicMock(message=MagicMock(
+            content=_profile_json("analytical", 0.7, 0.5)
+            if request.get("response_format") else "Chunk analysis"
+        ))]
+    ))
+    with patch('src.ciabot.core.ciaprofile.async_client', mock_client):
+        profile = await agenerate_structured_profile(LONG_TEXT)
+    chunks = chunk_text(LONG_TEXT, 300)
+    assert mock_client.chat.completions.create.await_count == 2 * len(chunks)
+    assert isinstance(profile, PsychologicalProfile)
+    assert len(profile.personality_traits) == 1
+    assert profile.overall_assessment.count("Part ") == len(chunks)
+    assert profile.neurolinguistic_features is not None
+
+@patch('src.ciabot.core.ciaprofile.client')
+def test_intelligence_report_sends_whole_text_within_budget(mock_client):
+    """Test that the intelligence report is no longer cut to its first 1000 characters."""
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content="Report"))]
+    )
+    generate_intelligence_report(LONG_TEXT)
+    assert LONG_TEXT in mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
@@ -0,0 +1,76 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from src.ciabot.core.usage import UsageTracker
+from src.ciabot.core.ciaprofile import (
+    calculate_metrics,
+    generate_profile_prompt,
+    _intelligence_report_request,
+    _metrics_request,
+    _security_profile_request
+)
+
+def _usage(prompt, cached, completion):
+    return SimpleNamespace(
+        prompt_tokens=prompt,
+        completion_tokens=completion,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached)
+    )
+
+def _common_prefix(a, b):
+    n = 0
+    while n < min(len(a), len(b)) and a[n] == b[n]:
+        n += 1
+    return n
+
+def test_tracker_splits_cached_and_uncached_tokens():
+    """Test per-purpose and overall totals of cached versus uncached prompt tokens."""
+    tracker = UsageTracker()
+    tracker.record("reasoning", "gpt-4o", _usage(3000, 2048, 500))
+    tracker.record("reasoning", "gpt-4o", _usage(3000, 0, 400))
+    tracker.record("metrics", "gpt-4o", _usage(1000, 1000, 50))
+    assert tracker.record("metrics", "gpt-4o", MagicMock()) is None
+
+    report = tracker.report()
+    assert report["by_purpose"]["reasoning"]["calls"] == 2
+    assert report["by_purpose"]["reasoning"]["uncached_tokens"] == 3952
+    assert report["overall"]["cached_tokens"] == 3048
+    assert report["overall"]["cached_ratio"] == pytest.approx(3048 / 7000, abs=1e-4)
+    assert tracker.recent_calls(limit=1)[0]["purpose"] == "metrics"
+
+def test_prompts_put_static_content_first():
+    """Test that requests for different texts differ only after a shared static prefix."""
+    first, second = "First document text.", "A different document entirely."
+
+    prompt_a = generate_profile_prompt(first)
+    prompt_b = generate_profile_prompt(second)
+    assert prompt_a.endswith(first)
+    assert _common_prefix(prompt_a, prompt_b) == len(prompt_a) - len(first)
+
+    for build in (_metrics_request, _security_profile_request, _intelligence_report_request):
+        args = (first, "balanced") if build is _intelligence_report_request else (first,)
+        other = (second, "balanced") if build is _intelligence_report_request else (second,)
+        request_a, request_b = build(*args), build(*other)
+        assert request_a["messages"][0] == request_b["messages"][0]
+        assert request_a["messages"][-1]["content"].startswith(request_b["messages"][-1]["content"][:20])
+
+def test_tones_share_intelligence_prefix():
+    """Test that tone-independent instructions lead the intelligence report prompt."""
+    positive = _intelligence_report_request("text", "positive")["messages"][0]["content"]
+    negative = _intelligence_report_request("text", "negative")["messages"][0]["content"]
+    assert _common_prefix(positive, negative) > 2000
+    assert positive is _intelligence_report_request("other", "positive")["messages"][0]["content"]
+
+@patch('src.ciabot.core.ciaprofile.client')
+def test_calls_record_usage(mock_client):
+    """Test that each model call records its usage under its purpose."""
+    tracker = UsageTracker()
+    mock_client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content='{"persuasion_susceptibility": 0.1, '
+            '"deception_capacity": 0.1, "information_hoarding": 0.1, "risk_tolerance": 0.1, '
+            '"group_affiliation": 0.1, "cognitive_rigidity": 0.1}'))],
+        usage=_usage(1200, 1024, 60)
+    )
+    with patch("src.ciabot.core.ciaprofile.get_usage_tracker", return_value=tracker):
+        calculate_metrics("Sample text")
+    assert tracker.report()["by_purpose"]["metrics"]["cached_tokens"] == 1024